@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, select
+from sqlalchemy.orm import Session, aliased
 from typing import List, Optional
 from datetime import datetime
 from ..database import SessionLocal
 from ..models import models
-from sqlalchemy import or_
+from ..services.item_counts import COUNT_MODES, count_items, filters_key
+from ..services.pagination import LISTING_ORDER, cursor_page, encode_cursor
+from ..services.search import apply_search, search_criterion
 
 router = APIRouter()
 
@@ -25,12 +28,21 @@ async def get_items(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     user_id: Optional[int] = None,
-    use_keywords: bool = False
+    use_keywords: bool = False,
+    sort: str = "date",
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    collapse_duplicates: bool = False
 ):
     print(f"Received request - country: '{country}', search: '{search}', user_id: '{user_id}'")
     
+    if count not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count must be one of: {', '.join(COUNT_MODES)}")
+    
     # Start with a base query
     query = db.query(models.Item)
+    keyword_words = []
+    keyword_ids = []
     
     # Si se especifica user_id y use_keywords es True, filtrar por palabras clave del usuario
     if user_id and use_keywords:
@@ -41,45 +53,79 @@ async def get_items(
         # Obtener las palabras clave del usuario
         user_keywords = db.query(models.Keyword).filter(models.Keyword.user_id == user_id).all()
         if user_keywords:
-            # Crear una condición OR para cada palabra clave
-            keyword_conditions = []
-            for keyword in user_keywords:
-                keyword_conditions.append(
-                    or_(
-                        models.Item.title.ilike(f"%{keyword.word}%"),
-                        models.Item.description.ilike(f"%{keyword.word}%")
-                    )
-                )
-            # Aplicar el filtro de palabras clave
-            if keyword_conditions:
-                query = query.filter(or_(*keyword_conditions))
-    
-    if search:
-        query = query.filter(
-            or_(
-                models.Item.title.ilike(f"%{search}%"),
-                models.Item.description.ilike(f"%{search}%")
-            )
-        )
+            # Basta con que coincida una de las palabras clave (coincidencias precalculadas en la ingesta)
+            keyword_words = [keyword.word for keyword in user_keywords]
+            keyword_ids = [keyword.id for keyword in user_keywords]
     
-    # Apply country filter if provided
     if country:
         print(f"Applying country filter for: '{country}'")
-        query = query.filter(models.Item.country.ilike(country))
-    
     if start_date:
         start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        query = query.filter(models.Item.presentation_date >= start_date)
-    
     if end_date:
         end_date = datetime.strptime(end_date, "%Y-%m-%d")
-        query = query.filter(models.Item.presentation_date <= end_date)
     
-    # Get total count before pagination
-    total = query.count()
+    def item_filters(entity):
+        # Filtros del listado sobre Item o sobre un alias (ver collapse_duplicates)
+        criteria = []
+        if keyword_ids:
+            criteria.append(entity.id.in_(
+                select(models.ItemKeywordMatch.item_id).where(models.ItemKeywordMatch.keyword_id.in_(keyword_ids))
+            ))
+        if country:
+            criteria.append(entity.country.ilike(country))
+        if start_date:
+            criteria.append(entity.presentation_date >= start_date)
+        if end_date:
+            criteria.append(entity.presentation_date <= end_date)
+        return criteria
+    
+    query = query.filter(*item_filters(models.Item))
+    
+    if search:
+        # Con sort=relevance los resultados se ordenan primero por relevancia
+        query = apply_search(query, db, [search], rank=(sort == "relevance"))
+    
+    if collapse_duplicates:
+        # Un item por cluster de casi duplicados, elegido entre los que cumplen
+        # los filtros: el primero ingerido (menor id) de cada cluster. Cada
+        # fila busca por el índice de cluster_id un item anterior de su
+        # cluster que también los cumpla, sin recorrer todo el resultado.
+        earlier = aliased(models.Item)
+        earlier_filters = item_filters(earlier)
+        if search:
+            earlier_filters.append(search_criterion(db, [search], earlier))
+        query = query.filter(~exists().where(
+            earlier.cluster_id == models.Item.cluster_id,
+            earlier.id < models.Item.id,
+            *earlier_filters
+        ))
+    
+    # Modo cursor: ?cursor= (vacío) pide la primera página y cada respuesta trae next_cursor
+    use_cursor = cursor is not None
+    if use_cursor and sort == "relevance":
+        raise HTTPException(status_code=400, detail="cursor pagination is only available with sort=date")
+    
+    # Get total count before pagination (en modo cursor solo en la primera página)
+    total, total_is_estimate = None, False
+    if not use_cursor or not cursor:
+        key = filters_key(
+            search=search,
+            country=country,
+            start_date=start_date,
+            end_date=end_date,
+            keywords=keyword_words,
+            collapse_duplicates=collapse_duplicates or None
+        )
+        total, total_is_estimate = count_items(query, db, key, count)
     
     # Apply pagination and get items
-    items = query.order_by(models.Item.presentation_date.desc()).offset(skip).limit(limit).all()
+    if use_cursor:
+        try:
+            items = cursor_page(query, cursor, limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        items = query.order_by(*LISTING_ORDER).offset(skip).limit(limit).all()
     
     # Convert items to dictionaries
     items_list = []
@@ -88,9 +134,14 @@ async def get_items(
         items_list.append(item_dict)
         print(f"Item: {item.title}")
     
+    # Hay página siguiente si la actual vino completa
+    next_cursor = encode_cursor(items[-1]) if sort != "relevance" and items and len(items) == limit else None
+    
     return {
         "total": total,
-        "items": items_list
+        "total_is_estimate": total_is_estimate,
+        "items": items_list,
+        "next_cursor": next_cursor
     }
 
 @router.get("/items/{item_id}")
@@ -1,26 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func
 from datetime import datetime
+from typing import Optional
 import asyncio
-import json
+import os
 
 from ..database import SessionLocal
 from ..models import models
-from ..scrapers.anamed_scraper import scrape_anamed
-from ..scrapers.congreso_scraper import scrape_congreso
-from ..scrapers.expediente_scraper import scrape_expediente
-from ..scrapers.digesa_scraper import scrape_digesa
-from ..scrapers.digesa_noticias_scraper import scrape_digesa_noticias
-from ..scrapers.diputados_noticias_scraper import scrape_diputados_noticias
-from ..scrapers.diputados_proyectos_scraper import scrape_diputados_proyectos
-from ..scrapers.ispch_noticias_scraper import scrape_ispch_noticias
-from ..scrapers.ispch_resoluciones_scraper import scrape_ispch_resoluciones
-from ..scrapers.minsa_normas_scraper import scrape_minsa_normas
-from ..scrapers.minsa_noticias_scraper import scrape_minsa_noticias
-from ..scrapers.senado_noticias_scraper import scrape_senado_noticias
-from ..scrapers.digemid_noticias_scraper import scrape_digemid_noticias
+from ..services import cleanup, near_duplicates, run_state
+from ..services.ingest import save_items_to_db
+from ..services.status_bus import parse_last_event_id, status_bus
+from ..scrapers import conditional_cache, executor, failures, registry, watermark
 
 router = APIRouter()
 
@@ -31,100 +22,59 @@ def get_db():
     finally:
         db.close()
 
-async def save_items_to_db(items, db: Session):
-    try:
-        print(f"Intentando guardar {len(items)} items")
-        for item in items:
-            try:
-                # Verificar si el item ya existe por título y fecha o URL
-                existing_item = db.query(models.Item).filter(
-                    or_(
-                        and_(
-                            models.Item.title == item['title'],
-                            models.Item.presentation_date == item['presentation_date']
-                        ),
-                        models.Item.source_url == item['source_url']
-                    )
-                ).first()
-                
-                if not existing_item:
-                    print(f"Guardando nuevo item: {item['title']} - País: {item['country']}")
-                    print(f"Fecha: {item['presentation_date']}")
-                    print(f"URL: {item['source_url']}")
-                    print(f"Source Type: {item['source_type']}")
-                    
-                    # Asegurarse de que los campos de texto estén en UTF-8
-                    title = item['title'].encode('utf-8').decode('utf-8')
-                    description = item['description'].encode('utf-8').decode('utf-8')
-                    
-                    db_item = models.Item(
-                        title=title,
-                        description=description,
-                        country=item['country'],
-                        source_url=item['source_url'],
-                        source_type=item['source_type'],
-                        presentation_date=item['presentation_date'],
-                        extra_data=item.get('extra_data')
-                    )
-                    db.add(db_item)
-                    db.flush()  # Flush to get the ID
-                else:
-                    print(f"Item ya existe: {item['title']}")
-            except Exception as item_error:
-                print(f"Error procesando item individual: {str(item_error)}")
-                print(f"Item problemático: {item}")
-                continue
-        
-        db.commit()
-        print("Items guardados exitosamente")
-    except Exception as e:
-        db.rollback()
-        print(f"Error detallado al guardar items: {str(e)}")
-        print(f"Tipo de error: {type(e)}")
-        raise
+# Límites de concurrencia del proceso de scraping (configurables por entorno)
+SCRAPING_MAX_CONCURRENCY = int(os.getenv("SCRAPING_MAX_CONCURRENCY", "4"))
+SCRAPING_MAX_PER_HOST = int(os.getenv("SCRAPING_MAX_PER_HOST", "1"))
+# Cada cuántos segundos el worker que ejecuta un run renueva su heartbeat
+SCRAPING_RUN_HEARTBEAT = int(os.getenv("SCRAPING_RUN_HEARTBEAT", "30"))
 
-# Estado global del proceso de scraping
-scraping_status = {
-    "is_running": False,
-    "total_sources": 0,
-    "completed_sources": 0,
-    "current_source": None,
-    "start_time": None,
-    "results": []
-}
+# El estado de los runs (lock de ejecución, progreso y eventos) se guarda en la
+# base de datos para que todos los workers de gunicorn vean el mismo
 
-async def status_event_generator():
-    global scraping_status
-    while scraping_status["is_running"]:
-        # Crear el mensaje de estado
-        status_data = {
-            "is_running": scraping_status["is_running"],
-            "total_sources": scraping_status["total_sources"],
-            "completed_sources": scraping_status["completed_sources"],
-            "current_source": scraping_status["current_source"],
-            "results": scraping_status["results"]
-        }
-        
-        # Enviar el mensaje como evento SSE
-        yield f"data: {json.dumps(status_data)}\n\n"
-        
-        # Esperar un poco antes de enviar la siguiente actualización
-        await asyncio.sleep(0.5)
-    
-    # Enviar un último mensaje cuando el proceso termina
-    final_status = {
-        "is_running": False,
-        "total_sources": scraping_status["total_sources"],
-        "completed_sources": scraping_status["completed_sources"],
-        "results": scraping_status["results"]
-    }
-    yield f"data: {json.dumps(final_status)}\n\n"
+async def status_snapshot():
+    return await executor.run_in_thread(run_state.fetch_snapshot)
+
+def _record_event(run_id, event, data):
+    with run_state.session_scope() as db:
+        return run_state.record_event(db, run_id, event, data)
+
+def _start_run(total_sources, trigger):
+    with run_state.session_scope() as db:
+        return run_state.start_run(db, total_sources, trigger)
+
+def _finish_run(run_id, status):
+    with run_state.session_scope() as db:
+        run_state.finish_run(db, run_id, status)
+
+def _heartbeat(run_id):
+    with run_state.session_scope() as db:
+        return run_state.heartbeat(db, run_id)
+
+def _cluster_new_items():
+    with run_state.session_scope() as db:
+        return near_duplicates.cluster_pending_items(db)
+
+async def publish(run_id, event, data):
+    """Guarda el evento del run y lo reparte a los suscriptores de este worker."""
+    try:
+        stored = await executor.run_in_thread(_record_event, run_id, event, data)
+    except Exception as e:
+        print(f"Error guardando el evento {event}: {str(e)}")
+        return
+    # Los demás workers lo reciben con su poller
+    status_bus.extend([stored])
 
 @router.get("/scraping/status/stream")
-async def stream_status():
+async def stream_status(last_event_id: Optional[str] = Header(None)):
+    """
+    Stream SSE del estado de scraping. Envía un snapshot al conectarse y luego
+    solo los cambios (run_started, source_started, source_finished, run_finished).
+    Al reconectarse con Last-Event-ID se reenvían únicamente los eventos perdidos.
+    """
     return StreamingResponse(
-        status_event_generator(),
-        media_type="text/event-stream"
+        status_bus.subscribe(status_snapshot, parse_last_event_id(last_event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/scraping/status")
@@ -132,171 +82,259 @@ async def get_scraping_status():
     """
     Endpoint para consultar el estado actual del proceso de scraping.
     """
-    global scraping_status
-    print(f"Estado actual: {scraping_status}")
+    _, state = await status_snapshot()
+    print(f"Estado actual: {state}")
+    return state
+
+async def scrape_source(run_id, job, client, global_semaphore, host_semaphores, progress, force=False):
+    """
+    Ejecuta el scraper de una fuente respetando el límite por host y el límite
+    global, guarda sus items con una sesión de base de datos propia y registra
+    el resultado en la fuente (last_scraped, fallos consecutivos y próxima
+    ejecución). La fuente falla si su scraper lanza una excepción o reporta un
+    paso fallido (ver failures.report_failure). Con `force` se ignoran los
+    validadores HTTP y se procesan las páginas aunque no hayan cambiado.
+    """
+    name, host = job.name, job.host
+    # Primero el límite por host, para no ocupar un cupo global mientras se espera al host
+    async with host_semaphores[host]:
+        async with global_semaphore:
+            await publish(run_id, "source_started", {"source": name})
+            print(f"Iniciando scraping de {name} ({host})")
+            db = SessionLocal()
+            result = {"source": name, "status": "error", "message": "Scraping interrumpido"}
+            try:
+                # Con `force` se ignora la marca de agua y se reprocesa todo el listado
+                source_watermark = None if force else await executor.run_in_thread(
+                    watermark.load_watermark, db, job.source_id
+                )
+                # Los validadores HTTP y la marca de agua solo se guardan si la
+                # fuente se scrapea e ingiere sin ningún paso fallido
+                with failures.source_failures() as source_failures, \
+                        conditional_cache.source_validators(force=force) as validators, \
+                        watermark.source_watermark(source_watermark):
+                    # El módulo del scraper se importa recién aquí
+                    scraper_func = registry.load_scraper(job.scraper_type)
+                    # Ejecutar el scraping
+                    items = await executor.run_scraper(scraper_func, client)
+                    # Solo se ingiere lo posterior a la marca de agua de la fuente
+                    new_items, known_items = watermark.split(items, source_watermark)
+                    if new_items:
+                        # La ingesta es síncrona: se ejecuta en el pool de hilos para no bloquear la API
+                        saved = await executor.run_in_thread(save_items_to_db, new_items, db)
+                        known = len(known_items) + saved["skipped"] - saved["invalid"]
+                        result = {
+                            "source": name,
+                            "status": "success",
+                            "message": f"Scraping completado. Se encontraron {len(items)} items ({saved['inserted']} nuevos, {known} ya conocidos).",
+                            "inserted": saved["inserted"],
+                            "skipped": saved["skipped"] + len(known_items),
+                            "new": saved["inserted"],
+                            "known": known
+                        }
+                        print(f"✓ {name}: {len(items)} items encontrados, {saved['inserted']} nuevos, {known} ya conocidos")
+                    else:
+                        result = {
+                            "source": name,
+                            "status": "success",
+                            "message": "No se encontraron nuevos items.",
+                            "new": 0,
+                            "known": len(known_items)
+                        }
+                        print(f"✓ {name}: No se encontraron nuevos items ({len(known_items)} ya conocidos)")
+                    if source_failures:
+                        # Lo ingerido se conserva, pero la fuente cuenta como fallida
+                        result["status"] = "error"
+                        result["message"] += f" Fallaron {len(source_failures)} pasos: {source_failures[0]}"
+                        print(f"✗ {name}: {len(source_failures)} pasos fallidos, se reintentará")
+                    else:
+                        await executor.run_in_thread(conditional_cache.save_validators, validators)
+                        await executor.run_in_thread(watermark.save_watermark, db, job.source_id, items)
+            except Exception as e:
+                print(f"✗ Error en {name}: {str(e)}")
+                result = {
+                    "source": name,
+                    "status": "error",
+                    "message": str(e)
+                }
+            finally:
+                try:
+                    await executor.run_in_thread(
+                        registry.record_result, db, job.source_id, result["status"] == "success"
+                    )
+                except Exception as e:
+                    print(f"Error registrando el resultado de {name}: {str(e)}")
+                db.close()
+                progress["completed_sources"] += 1
+                await publish(run_id, "source_finished", {
+                    "source": name,
+                    "result": result,
+                    "completed_sources": progress["completed_sources"]
+                })
+                print(f"Progreso: {progress['completed_sources']}/{progress['total_sources']}")
+
+async def keep_alive(run_id):
+    """Renueva el heartbeat del run mientras se ejecuta."""
+    while True:
+        await asyncio.sleep(SCRAPING_RUN_HEARTBEAT)
+        try:
+            if not await executor.run_in_thread(_heartbeat, run_id):
+                print(f"El run {run_id} ya no figura en ejecución")
+        except Exception as e:
+            print(f"Error renovando el heartbeat del run {run_id}: {str(e)}")
+
+async def process_sources(run_id, jobs, max_concurrency, client, force=False):
+    """
+    Ejecuta las fuentes del run de forma concurrente, con un máximo de
+    `max_concurrency` fuentes a la vez y `SCRAPING_MAX_PER_HOST` por host.
+    Todos comparten el cliente HTTP de la aplicación. Al terminar agrupa los
+    items nuevos con sus casi duplicados y libera el lock de ejecución.
+    """
+    start_time = datetime.utcnow()
+    progress = {"total_sources": len(jobs), "completed_sources": 0}
+    global_semaphore = asyncio.Semaphore(max_concurrency)
+    host_semaphores = {
+        job.host: asyncio.Semaphore(SCRAPING_MAX_PER_HOST)
+        for job in jobs
+    }
+    heartbeat_task = asyncio.create_task(keep_alive(run_id))
+    status = "interrupted"
+    try:
+        await asyncio.gather(*[
+            scrape_source(run_id, job, client, global_semaphore, host_semaphores, progress, force)
+            for job in jobs
+        ])
+        # Clusters de los items nuevos de todas las fuentes, fuera de su ingesta
+        try:
+            clustered = await executor.run_in_thread(_cluster_new_items)
+            print(f"Items nuevos agrupados con un casi duplicado: {clustered}")
+        except Exception as e:
+            print(f"Error agrupando casi duplicados (se reintentará en el próximo run): {str(e)}")
+        status = "finished"
+    finally:
+        heartbeat_task.cancel()
+        elapsed = (datetime.utcnow() - start_time).total_seconds()
+        print(f"Finalizando proceso de scraping ({elapsed:.1f}s)")
+        await publish(run_id, "run_finished", progress)
+        await executor.run_in_thread(_finish_run, run_id, status)
+
+async def start_run(jobs, trigger):
+    """
+    Toma el lock de ejecución compartido y publica el inicio del run. Devuelve
+    el id del run, o None si otro worker (o el scheduler) ya está scrapeando.
+    """
+    run_id = await executor.run_in_thread(_start_run, len(jobs), trigger)
+    if run_id is None:
+        return None
+    await publish(run_id, "run_started", {
+        "run_id": run_id,
+        "total_sources": len(jobs),
+        "start_time": datetime.utcnow()
+    })
+    return run_id
+
+async def run_scheduled(jobs, client):
+    """Ejecuta las fuentes pendientes del scheduler si no hay otro proceso en curso."""
+    run_id = await start_run(jobs, "scheduler")
+    if run_id is None:
+        print("Scheduler: scraping ya en ejecución, se reintentará")
+        return
+    print(f"Scheduler: iniciando scraping de {len(jobs)} fuentes (run {run_id})")
+    await process_sources(run_id, jobs, SCRAPING_MAX_CONCURRENCY, client)
+
+def already_running(state):
+    print("Scraping ya en ejecución")
     return {
-        "is_running": scraping_status["is_running"],
-        "total_sources": scraping_status["total_sources"],
-        "completed_sources": scraping_status["completed_sources"],
-        "current_source": scraping_status["current_source"],
-        "results": scraping_status["results"]
+        "message": "El proceso de scraping ya está en ejecución",
+        "is_running": True,
+        "run_id": state["run_id"],
+        "total_sources": state["total_sources"],
+        "completed_sources": state["completed_sources"],
+        "running_sources": state["running_sources"]
     }
 
 @router.post("/scraping", include_in_schema=True)
 @router.post("/scraping/", include_in_schema=True)
 async def scrape_all_sources(
+    request: Request,
     background_tasks: BackgroundTasks,
+    concurrent: bool = True,
+    max_concurrency: Optional[int] = None,
+    force: bool = False,
     db: Session = Depends(get_db)
 ):
-    global scraping_status
+    """
+    Inicia el scraping de las fuentes activas de la tabla sources que no se
+    actualizaron dentro de su intervalo de actualización (todas las activas
+    con `force`). Solo puede haber un run a la vez entre todos los workers.
+    """
+    # Si ya está corriendo (en este u otro worker), retornar estado actual
+    _, state = await status_snapshot()
+    if state["is_running"]:
+        return already_running(state)
     
-    # Si ya está corriendo, retornar estado actual
-    if scraping_status["is_running"]:
-        print("Scraping ya en ejecución")
+    # En modo secuencial se procesa una fuente a la vez
+    if not concurrent:
+        max_concurrency = 1
+    elif not max_concurrency or max_concurrency < 1:
+        max_concurrency = SCRAPING_MAX_CONCURRENCY
+    
+    jobs = registry.sources_to_scrape(db, force=force)
+    if not jobs:
+        print("No hay fuentes que actualizar")
         return {
-            "message": "El proceso de scraping ya está en ejecución",
-            "is_running": True,
-            "total_sources": scraping_status["total_sources"],
-            "completed_sources": scraping_status["completed_sources"],
-            "current_source": scraping_status["current_source"]
+            "message": "No hay fuentes activas pendientes de actualizar",
+            "is_running": False,
+            "total_sources": 0,
+            "completed_sources": 0,
+            "running_sources": []
         }
     
-    # Lista de scrapers disponibles
-    scrapers = [
-        ("ANAMED", scrape_anamed),
-        ("Congreso PE", scrape_congreso),
-        ("Expediente PE", scrape_expediente),
-        ("DIGESA", scrape_digesa),
-        ("DIGESA Noticias", scrape_digesa_noticias),
-        ("Diputados Noticias", scrape_diputados_noticias),
-        ("Diputados Proyectos", scrape_diputados_proyectos),
-        ("ISPCH Noticias", scrape_ispch_noticias),
-        ("ISPCH Resoluciones", scrape_ispch_resoluciones),
-        ("MINSA Normas", scrape_minsa_normas),
-        ("MINSA Noticias", scrape_minsa_noticias),
-        ("Senado Noticias", scrape_senado_noticias),
-        ("DIGEMID Noticias", scrape_digemid_noticias)
-    ]
+    # El lock es atómico: si otro worker se adelantó, no se inicia un segundo run
+    run_id = await start_run(jobs, "api")
+    if run_id is None:
+        _, state = await status_snapshot()
+        return already_running(state)
     
-    print("Iniciando nuevo proceso de scraping")
-    # Inicializar estado
-    scraping_status.update({
-        "is_running": True,
-        "total_sources": len(scrapers),
-        "completed_sources": 0,
-        "current_source": None,
-        "results": []
-    })
-    
-    async def process_sources():
-        global scraping_status
-        try:
-            for name, scraper_func in scrapers:
-                try:
-                    scraping_status["current_source"] = name
-                    print(f"[{scraping_status['completed_sources'] + 1}/{len(scrapers)}] Iniciando scraping de {name}")
-                    
-                    # Ejecutar el scraping
-                    items = await scraper_func()
-                    if items:
-                        await save_items_to_db(items, db)
-                        scraping_status["results"].append({
-                            "source": name,
-                            "status": "success",
-                            "message": f"Scraping completado. Se encontraron {len(items)} items."
-                        })
-                        print(f"✓ {name}: {len(items)} items encontrados")
-                    else:
-                        scraping_status["results"].append({
-                            "source": name,
-                            "status": "success",
-                            "message": "No se encontraron nuevos items."
-                        })
-                        print(f"✓ {name}: No se encontraron items")
-                except Exception as e:
-                    print(f"✗ Error en {name}: {str(e)}")
-                    scraping_status["results"].append({
-                        "source": name,
-                        "status": "error",
-                        "message": str(e)
-                    })
-                
-                scraping_status["completed_sources"] += 1
-                print(f"Progreso: {scraping_status['completed_sources']}/{scraping_status['total_sources']}")
-                
-        finally:
-            print("Finalizando proceso de scraping")
-            scraping_status["is_running"] = False
-            scraping_status["current_source"] = None
-    
-    background_tasks.add_task(process_sources)
+    print(f"Iniciando nuevo proceso de scraping de {len(jobs)} fuentes (run {run_id}, concurrencia: {max_concurrency})")
+    background_tasks.add_task(process_sources, run_id, jobs, max_concurrency, request.app.state.http_client, force)
     
     return {
         "message": "Proceso de scraping iniciado",
         "is_running": True,
-        "total_sources": len(scrapers),
+        "run_id": run_id,
+        "total_sources": len(jobs),
         "completed_sources": 0,
-        "current_source": None
+        "running_sources": []
     }
 
 @router.post("/cleanup")
-async def cleanup_duplicates(db: Session = Depends(get_db)):
+async def cleanup_duplicates(
+    dry_run: bool = False,
+    batch_size: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Elimina los items duplicados por URL y por título y fecha, conservando el
+    más antiguo. Con `dry_run` solo devuelve cuántos se eliminarían.
+    """
     try:
-        # Encontrar duplicados basados en URL
-        url_duplicates = db.query(
-            models.Item.source_url,
-            func.count(models.Item.id).label('count'),
-            func.min(models.Item.id).label('min_id')
-        ).group_by(
-            models.Item.source_url
-        ).having(
-            func.count(models.Item.id) > 1
-        ).all()
-        
-        # Encontrar duplicados basados en título y fecha
-        title_date_duplicates = db.query(
-            models.Item.title,
-            models.Item.presentation_date,
-            func.count(models.Item.id).label('count'),
-            func.min(models.Item.id).label('min_id')
-        ).group_by(
-            models.Item.title,
-            models.Item.presentation_date
-        ).having(
-            func.count(models.Item.id) > 1
-        ).all()
+        if dry_run:
+            counts = await executor.run_in_thread(cleanup.count_duplicates, db)
+            return {
+                "message": f"Se eliminarían {counts['total']} registros duplicados",
+                "dry_run": True,
+                "duplicates": counts
+            }
         
-        total_deleted = 0
-        
-        # Eliminar duplicados por URL
-        for url, count, min_id in url_duplicates:
-            items_to_delete = db.query(models.Item).filter(
-                models.Item.source_url == url,
-                models.Item.id != min_id
-            ).all()
-            
-            for item in items_to_delete:
-                print(f"Eliminando duplicado - ID: {item.id}, Título: {item.title}, URL: {item.source_url}, Fecha: {item.presentation_date}")
-                db.delete(item)
-                total_deleted += 1
-        
-        # Eliminar duplicados por título y fecha
-        for title, date, count, min_id in title_date_duplicates:
-            items_to_delete = db.query(models.Item).filter(
-                models.Item.title == title,
-                models.Item.presentation_date == date,
-                models.Item.id != min_id
-            ).all()
-            
-            for item in items_to_delete:
-                print(f"Eliminando duplicado - ID: {item.id}, Título: {item.title}, URL: {item.source_url}, Fecha: {item.presentation_date}")
-                db.delete(item)
-                total_deleted += 1
-        
-        db.commit()
+        # Borrado en lotes cortos fuera del event loop, para seguir atendiendo lecturas
+        deleted = await executor.run_in_thread(
+            cleanup.remove_duplicates, db, batch_size or cleanup.CLEANUP_BATCH_SIZE
+        )
         return {
-            "message": f"Se eliminaron {total_deleted} registros duplicados",
-            "details": "Se identificaron duplicados basados en URL, título y fecha"
+            "message": f"Se eliminaron {deleted['total']} registros duplicados",
+            "details": "Se identificaron duplicados basados en URL, título y fecha",
+            "deleted": deleted
         }
         
     except Exception as e:
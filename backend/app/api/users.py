@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from ..database import SessionLocal
 from ..models import models
+from ..services.keyword_matching import match_keyword
 from pydantic import BaseModel
 from datetime import datetime
 from passlib.context import CryptContext
@@ -86,6 +88,10 @@ async def create_keyword(
     db.add(db_keyword)
     db.commit()
     db.refresh(db_keyword)
+    
+    # Precalcular las coincidencias de la nueva palabra clave con los items
+    # existentes, fuera del event loop (recorre toda la tabla de items)
+    await run_in_threadpool(match_keyword, db, db_keyword)
     return db_keyword
 
 @router.get("/{user_id}/keywords/", response_model=List[Keyword])
@@ -112,6 +118,9 @@ async def delete_keyword(
     if not keyword:
         raise HTTPException(status_code=404, detail="Keyword not found")
     
+    db.query(models.ItemKeywordMatch).filter(
+        models.ItemKeywordMatch.keyword_id == keyword.id
+    ).delete(synchronize_session=False)
     db.delete(keyword)
     db.commit()
     return {"message": "Keyword deleted successfully"}
@@ -21,3 +21,21 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base para los modelos
 Base = declarative_base()
 
+
+def missing_columns(bind=engine):
+    """
+    Columnas de los modelos que no existen en las tablas ya creadas de la base.
+    `create_all` solo crea tablas nuevas: las columnas agregadas después las
+    crea migrate_db.py.
+    """
+    from sqlalchemy import inspect
+
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    return missing
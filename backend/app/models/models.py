@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Table
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Boolean, Table, Index, LargeBinary, text
 from sqlalchemy.orm import relationship
 from ..database import Base
 from datetime import datetime
@@ -31,17 +31,25 @@ class Keyword(Base):
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        Index("ix_items_title_presentation_date", "title", "presentation_date"),
+        # Paginación por cursor en el orden (presentation_date DESC, id DESC)
+        Index("ix_items_presentation_date_id", "presentation_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
     description = Column(Text)
     country = Column(String, index=True)
-    source_url = Column(String)
+    source_url = Column(String, unique=True, index=True)  # URL normalizada
     source_type = Column(String, index=True)
     presentation_date = Column(DateTime, default=datetime.utcnow)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     extra_data = Column(Text)  # JSON con información adicional específica de cada fuente
+    fingerprint = Column(String(64), unique=True, index=True)  # Hash de título, fecha y fuente normalizados
+    search_text = Column(Text)  # Título y descripción normalizados para el índice de texto completo
+    cluster_id = Column(Integer, index=True)  # Cluster de casi duplicados (id de su primer item)
 
     def to_dict(self):
         return {
@@ -53,9 +61,20 @@ class Item(Base):
             "date": self.presentation_date,  # Mapear presentation_date a date para el frontend
             "created_at": self.created_at,
             "updated_at": self.updated_at,
-            "extra_data": self.extra_data
+            "extra_data": self.extra_data,
+            "cluster_id": self.cluster_id
         }
 
+class ItemKeywordMatch(Base):
+    __tablename__ = "item_keyword_matches"
+    __table_args__ = (
+        Index("ix_item_keyword_matches_item_id", "item_id"),
+    )
+
+    # Coincidencias precalculadas entre items y palabras clave (ver services/keyword_matching.py)
+    keyword_id = Column(Integer, ForeignKey("keywords.id", ondelete="CASCADE"), primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+
 class Source(Base):
     __tablename__ = "sources"
 
@@ -66,3 +85,74 @@ class Source(Base):
     active = Column(Boolean, default=True)  # Activo o inactivo
     created_at = Column(DateTime, default=datetime.utcnow)
     last_scraped = Column(DateTime)
+    refresh_interval = Column(Integer)  # Segundos entre actualizaciones (vacío: el del tipo de scraper)
+    consecutive_failures = Column(Integer, default=0)
+    next_scrape_at = Column(DateTime)  # Próxima ejecución programada
+    watermark_date = Column(DateTime)  # Fecha del item más nuevo ingerido
+    watermark_urls = Column(Text)  # JSON con las URLs vistas en las últimas ejecuciones
+
+class ItemSignature(Base):
+    __tablename__ = "item_signatures"
+
+    # Firma MinHash de cada item (ver services/near_duplicates.py)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary)
+
+class ItemLshBucket(Base):
+    __tablename__ = "item_lsh_buckets"
+
+    # Índice LSH: items cuya firma cae en el mismo bucket de una banda son candidatos a casi duplicados
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id", ondelete="CASCADE"), primary_key=True)
+
+class ScrapingRun(Base):
+    __tablename__ = "scraping_runs"
+    __table_args__ = (
+        # Lock de ejecución compartido entre workers: a lo sumo un run en estado "running"
+        Index(
+            "uq_scraping_runs_running", "status", unique=True,
+            sqlite_where=text("status = 'running'"),
+            postgresql_where=text("status = 'running'")
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String, default="running")  # running, finished, interrupted
+    trigger = Column(String)  # api o scheduler
+    total_sources = Column(Integer, default=0)
+    worker = Column(String)  # host:pid del worker que ejecuta el run
+    started_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+class ScrapingEvent(Base):
+    __tablename__ = "scraping_events"
+
+    # Eventos de progreso de los runs; su id es el id del evento SSE
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(Integer, ForeignKey("scraping_runs.id", ondelete="CASCADE"), index=True)
+    event = Column(String)
+    data = Column(Text)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class BackfillCheckpoint(Base):
+    __tablename__ = "backfill_checkpoints"
+
+    # Avance del backfill de cada fuente, para retomarlo tras una interrupción
+    source_id = Column(Integer, ForeignKey("sources.id", ondelete="CASCADE"), primary_key=True)
+    next_page = Column(Integer, default=1)  # Primera página aún no ingerida
+    items_seen = Column(Integer, default=0)
+    items_inserted = Column(Integer, default=0)
+    finished = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class HttpValidator(Base):
+    __tablename__ = "http_validators"
+
+    # Validadores HTTP de las páginas de listado para hacer GET condicionales
+    url = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    body_hash = Column(String(64))  # SHA-256 del cuerpo, para fuentes sin validadores
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
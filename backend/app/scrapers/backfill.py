@@ -0,0 +1,149 @@
+import asyncio
+import os
+import time
+
+from ..database import SessionLocal
+from ..models import models
+from ..services.ingest import save_items_to_db
+from ..services.near_duplicates import cluster_pending_items
+from . import executor, registry
+from .dates import wall_time
+
+# Límites del modo backfill (configurables por entorno): páginas de una fuente
+# que se descargan a la vez, fuentes en paralelo y páginas máximas por fuente
+BACKFILL_PAGE_CONCURRENCY = int(os.getenv("BACKFILL_PAGE_CONCURRENCY", "4"))
+BACKFILL_SOURCE_CONCURRENCY = int(os.getenv("BACKFILL_SOURCE_CONCURRENCY", "2"))
+BACKFILL_MAX_PAGES = int(os.getenv("BACKFILL_MAX_PAGES", "500"))
+
+
+def load_checkpoint(source_id, restart=False):
+    db = SessionLocal()
+    try:
+        checkpoint = db.query(models.BackfillCheckpoint).filter(
+            models.BackfillCheckpoint.source_id == source_id
+        ).first()
+        if checkpoint is None or restart:
+            return {"next_page": 1, "items_seen": 0, "items_inserted": 0, "finished": False}
+        return {
+            "next_page": checkpoint.next_page,
+            "items_seen": checkpoint.items_seen,
+            "items_inserted": checkpoint.items_inserted,
+            "finished": checkpoint.finished
+        }
+    finally:
+        db.close()
+
+
+def save_checkpoint(source_id, checkpoint):
+    db = SessionLocal()
+    try:
+        db.merge(models.BackfillCheckpoint(source_id=source_id, **checkpoint))
+        db.commit()
+    finally:
+        db.close()
+
+
+def ingest_page(items):
+    db = SessionLocal()
+    try:
+        return save_items_to_db(items, db)
+    finally:
+        db.close()
+
+
+def cluster_new_items():
+    db = SessionLocal()
+    try:
+        return cluster_pending_items(db)
+    finally:
+        db.close()
+
+
+def _older_than(item, since):
+    date = item.get("presentation_date")
+    return since is not None and date is not None and wall_time(date) < since
+
+
+async def backfill_source(job, client, page_concurrency=BACKFILL_PAGE_CONCURRENCY,
+                          max_pages=BACKFILL_MAX_PAGES, since=None, restart=False):
+    """
+    Recorre el archivo paginado de una fuente desde su checkpoint. Descarga
+    `page_concurrency` páginas a la vez, ingiere cada página en orden con la
+    ingesta en bloque (sin acumular el archivo en memoria) y guarda el
+    checkpoint después de cada tanda. Termina al llegar a una página vacía,
+    repetida, anterior a `since` o a `max_pages`. Devuelve las estadísticas
+    de la ejecución.
+    """
+    stats = {"source": job.name, "pages": 0, "items": 0, "inserted": 0, "elapsed": 0.0, "status": "ok"}
+    archive_page = registry.load_archive(job.scraper_type)
+    if archive_page is None:
+        stats["status"] = "sin archivo"
+        return stats
+
+    checkpoint = await executor.run_in_thread(load_checkpoint, job.source_id, restart)
+    if checkpoint["finished"]:
+        stats["status"] = "completo"
+        return stats
+
+    start = time.perf_counter()
+    previous_urls = set()
+    finished = False
+    # Los parseos respetan el modo de ejecución declarado por el scraper
+    with executor.scraper_context(registry.load_scraper(job.scraper_type)):
+        try:
+            while not finished and checkpoint["next_page"] <= max_pages:
+                first = checkpoint["next_page"]
+                pages = range(first, min(first + page_concurrency, max_pages + 1))
+                results = await asyncio.gather(*[archive_page(client, page) for page in pages])
+
+                for items in results:
+                    urls = {item.get("source_url") for item in items}
+                    # Una página vacía o igual a la anterior indica el fin del archivo
+                    if not items or urls <= previous_urls:
+                        finished = True
+                        break
+                    previous_urls = urls
+                    recent = [item for item in items if not _older_than(item, since)]
+                    if recent:
+                        saved = await executor.run_in_thread(ingest_page, recent)
+                        checkpoint["items_inserted"] += saved["inserted"]
+                        stats["inserted"] += saved["inserted"]
+                    checkpoint["items_seen"] += len(recent)
+                    checkpoint["next_page"] += 1
+                    stats["pages"] += 1
+                    stats["items"] += len(recent)
+                    if len(recent) < len(items):
+                        # El archivo ya llegó a fechas anteriores a `since`
+                        finished = True
+                        break
+
+                checkpoint["finished"] = finished
+                await executor.run_in_thread(save_checkpoint, job.source_id, checkpoint)
+                print(f"[Backfill] {job.name}: página {checkpoint['next_page'] - 1}, "
+                      f"{checkpoint['items_seen']} items, {checkpoint['items_inserted']} nuevos")
+        except Exception as e:
+            # El checkpoint queda en la última tanda ingerida: se retoma desde ahí
+            print(f"[Backfill] Error en {job.name} (página {checkpoint['next_page']}): {str(e)}")
+            stats["status"] = "error"
+    stats["elapsed"] = time.perf_counter() - start
+    if stats["status"] == "ok" and not finished:
+        stats["status"] = "límite de páginas"
+    return stats
+
+
+async def backfill(jobs, client, source_concurrency=BACKFILL_SOURCE_CONCURRENCY, **options):
+    """
+    Ejecuta el backfill de las fuentes, con un máximo de `source_concurrency`
+    a la vez, y al final agrupa los items nuevos con sus casi duplicados.
+    """
+    semaphore = asyncio.Semaphore(source_concurrency)
+
+    async def run(job):
+        async with semaphore:
+            print(f"[Backfill] Iniciando {job.name}")
+            return await backfill_source(job, client, **options)
+
+    results = await asyncio.gather(*[run(job) for job in jobs])
+    clustered = await executor.run_in_thread(cluster_new_items)
+    print(f"[Backfill] Items agrupados con un casi duplicado: {clustered}")
+    return results
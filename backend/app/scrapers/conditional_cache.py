@@ -0,0 +1,76 @@
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from ..database import SessionLocal
+from ..models import models
+
+# Validadores pendientes de la fuente en curso y si se debe ignorar la caché
+_pending_validators = ContextVar("pending_validators", default=None)
+_force_refresh = ContextVar("force_refresh", default=False)
+
+
+def body_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+@contextmanager
+def source_validators(force=False):
+    """
+    Acumula los validadores obtenidos por un scraper para guardarlos solo
+    cuando la fuente se procesó e ingirió correctamente (ver `save_validators`).
+    Con `force=True` se descargan y procesan las páginas aunque no hayan cambiado.
+    """
+    pending = {}
+    pending_token = _pending_validators.set(pending)
+    force_token = _force_refresh.set(force)
+    try:
+        yield pending
+    finally:
+        _force_refresh.reset(force_token)
+        _pending_validators.reset(pending_token)
+
+
+def is_force_refresh():
+    return _force_refresh.get()
+
+
+def get_validator(url):
+    db = SessionLocal()
+    try:
+        return db.query(models.HttpValidator).filter(models.HttpValidator.url == url).first()
+    finally:
+        db.close()
+
+
+def record_validator(url, etag, last_modified, content_hash):
+    """
+    Registra los validadores de una respuesta. Dentro de `source_validators`
+    quedan pendientes hasta que la fuente termina; fuera de él se guardan de inmediato.
+    """
+    validator = {
+        "etag": etag,
+        "last_modified": last_modified,
+        "body_hash": content_hash
+    }
+    pending = _pending_validators.get()
+    if pending is not None:
+        pending[url] = validator
+    else:
+        save_validators({url: validator})
+
+
+def save_validators(validators):
+    if not validators:
+        return
+    db = SessionLocal()
+    try:
+        for url, validator in validators.items():
+            db.merge(models.HttpValidator(url=url, updated_at=datetime.utcnow(), **validator))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error guardando validadores HTTP: {str(e)}")
+    finally:
+        db.close()
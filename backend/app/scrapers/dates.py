@@ -0,0 +1,95 @@
+import re
+import unicodedata
+from datetime import datetime
+from functools import lru_cache
+
+# Meses por sus tres primeras letras (sin tildes): cubre nombres completos y
+# abreviaturas como "Dic", "Dic." o "setiembre"
+MESES = {
+    'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'ago': 8, 'sep': 9, 'set': 9, 'oct': 10, 'nov': 11, 'dic': 12
+}
+
+# 2024-12-05, 2024-12-05T21:27:54-05:00, 2024-12-07 08:29:00.000
+ISO_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?')
+# 08-11-2024, 05/12/2024, 05.12.2024
+NUMERIC_PATTERN = re.compile(r'(\d{1,2})[./-](\d{1,2})[./-](\d{4})')
+# 05 Dic 2024, 04 Dic. 2024, 2 diciembre, 2024, 2 de marzo de 2024
+TEXT_PATTERN = re.compile(r'(\d{1,2})\s+(?:de\s+)?([a-z]{3,})\.?,?\s+(?:de(?:l)?\s+)?(\d{4})')
+
+DATE_CACHE_SIZE = 4096
+
+
+def _strip_accents(text):
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def wall_time(value):
+    """
+    Datetime sin zona horaria con la hora local publicada por la fuente, igual
+    que se guarda en la base de datos. El offset se descarta en lugar de
+    convertir a UTC: la mayoría de las fuentes solo publican la fecha (sin
+    hora ni zona) y así una noticia chilena de las 21:00 (-03:00) queda en su
+    día, igual que las demás, y no en el siguiente.
+    """
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    return value
+
+
+def _parse_iso(text):
+    match = ISO_PATTERN.search(text)
+    if not match:
+        return None
+    value = match.group(0)
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return wall_time(datetime.fromisoformat(value))
+
+
+def _parse_numeric(text):
+    match = NUMERIC_PATTERN.search(text)
+    if not match:
+        return None
+    dia, mes, anio = match.groups()
+    return datetime(int(anio), int(mes), int(dia))
+
+
+def _parse_text(text):
+    match = TEXT_PATTERN.search(_strip_accents(text).lower())
+    if not match:
+        return None
+    dia, mes, anio = match.groups()
+    mes_num = MESES.get(mes[:3])
+    if not mes_num:
+        return None
+    return datetime(int(anio), mes_num, int(dia))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(text):
+    """
+    Convierte una fecha tal como aparece en las páginas de las fuentes en un
+    datetime sin zona horaria, en la hora local de la fuente. Detecta el formato (ISO, numérico día/mes/año
+    o con el mes en español) y devuelve None si no se reconoce, dejando
+    registro del texto. Los resultados se memorizan, ya que las mismas fechas
+    se repiten mucho en los listados.
+    """
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        # Camino rápido según el primer carácter: ISO empieza con el año
+        if text[:4].isdigit() and text[4:5] == '-':
+            parsers = (_parse_iso, _parse_numeric, _parse_text)
+        else:
+            parsers = (_parse_numeric, _parse_text, _parse_iso)
+        for parser in parsers:
+            value = parser(text)
+            if value is not None:
+                return value
+    except ValueError as e:
+        print(f"Fecha inválida '{text}': {str(e)}")
+        return None
+    print(f"Formato de fecha no reconocido: '{text}'")
+    return None
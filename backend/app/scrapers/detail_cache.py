@@ -0,0 +1,33 @@
+from ..database import SessionLocal
+from ..models import models
+from ..services.normalization import normalize_url
+
+DETAIL_CACHE_BATCH_SIZE = 500
+
+
+def known_dates(urls):
+    """
+    Fechas ya resueltas para las URLs de detalle, tomadas de los items
+    guardados en ejecuciones anteriores: {url: presentation_date}.
+    Permite a los scrapers omitir la descarga de páginas de detalle ya vistas.
+    """
+    by_normalized = {normalize_url(url): url for url in urls}
+    keys = list(by_normalized)
+    dates = {}
+    db = SessionLocal()
+    try:
+        for start in range(0, len(keys), DETAIL_CACHE_BATCH_SIZE):
+            rows = db.query(
+                models.Item.source_url,
+                models.Item.presentation_date
+            ).filter(
+                models.Item.source_url.in_(keys[start:start + DETAIL_CACHE_BATCH_SIZE])
+            ).all()
+            for source_url, presentation_date in rows:
+                if presentation_date is not None:
+                    dates[by_normalized[source_url]] = presentation_date
+    except Exception as e:
+        print(f"Error consultando fechas conocidas: {str(e)}")
+    finally:
+        db.close()
+    return dates
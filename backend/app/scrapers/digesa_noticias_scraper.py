@@ -1,11 +1,12 @@
-import asyncio
 from datetime import datetime, timedelta
 import re
-from bs4 import BeautifulSoup
-import aiohttp
 from urllib.parse import urljoin
 import calendar
 import json
+from .dates import parse_date
+from .executor import execution_mode, run_parser
+from .http_client import fetch_archive_page, run_with_client
+from .parsing import only, parse_html
 
 # Diccionario de meses en español
 MESES = {
@@ -23,7 +24,12 @@ MESES = {
     12: "Diciembre"
 }
 
-async def get_month_news(soup, month_number, year):
+BASE_URL = "http://www.digesa.minsa.gob.pe/noticias/index.asp"
+
+# Fecha al inicio del texto de cada noticia: "05.12.2024. Título"
+PREFIJO_FECHA = re.compile(r'^\d{2}\.\d{2}\.\d{4}\.\s*')
+
+def get_month_news(soup, month_number, year):
     month_name = MESES[month_number]
     # Buscar el encabezado del mes
     header = soup.find('h4', string=re.compile(f"{month_name}.*{year}", re.IGNORECASE))
@@ -38,17 +44,15 @@ async def get_month_news(soup, month_number, year):
         for link in current_list.find_all('a'):
             href = link.get('href')
             texto = link.text.strip()
-            fecha_match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', texto)
+            fecha = parse_date(texto)
             
-            if fecha_match:
-                dia, mes, anio = fecha_match.groups()
-                fecha = datetime.strptime(f"{anio}-{mes}-{dia}", "%Y-%m-%d")
+            if fecha:
                 
                 # Construir URL completa de la noticia
                 noticia_url = urljoin("http://www.digesa.minsa.gob.pe/noticias/index.asp", href)
                 
                 # Extraer el título (eliminando la fecha del inicio)
-                titulo = re.sub(r'^\d{2}\.\d{2}\.\d{4}\.\s*', '', texto).strip()
+                titulo = PREFIJO_FECHA.sub('', texto).strip()
                 
                 metadata = {
                     'tipo': 'noticia',
@@ -73,50 +77,74 @@ async def get_month_news(soup, month_number, year):
     
     return items
 
-async def scrape_digesa_noticias():
+def parse_digesa_noticias(html):
+    soup = parse_html(html, only(['h4', 'ul']))
+    
+    # Obtener el mes y año actual
+    current_date = datetime.now()
+    current_month = current_date.month
+    current_year = current_date.year
+    
+    # Calcular mes anterior
+    if current_month == 1:
+        previous_month = 12
+        previous_year = current_year - 1
+    else:
+        previous_month = current_month - 1
+        previous_year = current_year
+    
+    # Noticias del mes actual y del anterior, para no perder las de fin de mes (o de año)
+    items = get_month_news(soup, current_month, current_year)
+    items += get_month_news(soup, previous_month, previous_year)
+    
+    print(f"[DIGESA Noticias Scraper] Se encontraron {len(items)} noticias")
+    return items
+
+# Encabezado de cada sección mensual: "Diciembre 2024"
+SECCION_MES = re.compile(r'(%s)\D*(\d{4})' % '|'.join(MESES.values()), re.IGNORECASE)
+
+def parse_digesa_noticias_archivo(html):
+    """Noticias de todas las secciones mensuales de la página (modo backfill)."""
+    soup = parse_html(html, only(['h4', 'ul']))
+    numeros = {nombre.lower(): numero for numero, nombre in MESES.items()}
+    
+    items = []
+    for header in soup.find_all('h4'):
+        match = SECCION_MES.search(header.get_text())
+        if match:
+            items += get_month_news(soup, numeros[match.group(1).lower()], int(match.group(2)))
+    
+    print(f"[DIGESA Noticias Scraper] Archivo: {len(items)} noticias")
+    return items
+
+@execution_mode("process")
+async def scrape_digesa_noticias(client):
     print("[DIGESA Noticias Scraper] Iniciando scraping...")
     
     # URL base de DIGESA Noticias
-    base_url = "http://www.digesa.minsa.gob.pe/noticias/index.asp"
+    base_url = BASE_URL
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(base_url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Obtener el mes y año actual
-                    current_date = datetime.now()
-                    current_month = current_date.month
-                    current_year = current_date.year
-                    
-                    # Intentar obtener noticias del mes actual
-                    items = await get_month_news(soup, current_month, current_year)
-                    
-                    # Si no hay noticias del mes actual, intentar con el mes anterior
-                    if not items:
-                        print(f"[DIGESA Noticias Scraper] No se encontraron noticias en {MESES[current_month]}, buscando en el mes anterior...")
-                        
-                        # Calcular mes anterior
-                        if current_month == 1:
-                            previous_month = 12
-                            previous_year = current_year - 1
-                        else:
-                            previous_month = current_month - 1
-                            previous_year = current_year
-                        
-                        items = await get_month_news(soup, previous_month, previous_year)
-                    
-                    print(f"[DIGESA Noticias Scraper] Se encontraron {len(items)} noticias")
-                    return items
-                else:
-                    print(f"[DIGESA Noticias Scraper] Error al acceder a la página: {response.status}")
-                    return []
-                    
+        response = await client.get_if_changed(base_url)
+        if response is None:
+            # La página no cambió desde la última ejecución
+            return []
+        if response.status_code == 200:
+            return await run_parser(parse_digesa_noticias, response.text)
+        else:
+            print(f"[DIGESA Noticias Scraper] Error al acceder a la página: {response.status_code}")
+            response.raise_for_status()
+            return []
+    
     except Exception as e:
         print(f"[DIGESA Noticias Scraper] Error durante el scraping: {str(e)}")
+        raise
+
+async def archive_page(client, page):
+    # Todos los meses publicados están en una sola página: el archivo completo es la página 1
+    if page > 1:
         return []
+    return await fetch_archive_page(client, BASE_URL, parse_digesa_noticias_archivo)
 
 if __name__ == "__main__":
-    asyncio.run(scrape_digesa_noticias())
+    run_with_client(scrape_digesa_noticias)
@@ -1,81 +1,105 @@
-import asyncio
-from datetime import datetime
 import re
-from bs4 import BeautifulSoup
-import aiohttp
+from datetime import datetime
 from urllib.parse import urljoin
 import json
+from .dates import parse_date
+from .executor import execution_mode, run_parser
+from .http_client import fetch_archive_page, run_with_client
+from .parsing import parse_html
+
+BASE_URL = "http://www.digesa.minsa.gob.pe/noticias/comunicados.asp"
+
+# Encabezado de cada sección anual: "Comunicados 2024"
+SECCION_ANIO = re.compile(r'Comunicados\s+(\d{4})')
+
+def parse_digesa(html, base_url, years=None):
+    """
+    Comunicados de las secciones anuales de la página. Con `years` solo se
+    leen esas secciones; sin él, todas (modo backfill).
+    """
+    soup = parse_html(html)
+    
+    headers = []
+    for header in soup.find_all('h4'):
+        match = SECCION_ANIO.search(header.get_text())
+        if match and (years is None or int(match.group(1)) in years):
+            headers.append((header, match.group(1)))
+    if not headers:
+        print(f"[DIGESA Scraper] No se encontraron secciones de comunicados ({years or 'todas'})")
+        return []
+    
+    items = []
+    for header, anio in headers:
+        # Obtener todos los enlaces después del encabezado hasta el siguiente h4
+        current = header.find_next()
+        while current and current.name != 'h4':
+            if current.name == 'a':
+                href = current.get('href')
+                if href and ('.pdf' in href.lower() or 'comunicado' in href.lower()):
+                    texto = current.text.strip()
+                    
+                    try:
+                        # Sin fecha reconocible en el texto se usa la fecha actual
+                        fecha = parse_date(texto) or datetime.utcnow()
+                        
+                        # Construir URL completa del PDF
+                        pdf_url = urljoin(base_url, href)
+                        
+                        metadata = {
+                            'tipo': 'comunicado',
+                            'institucion': 'DIGESA',
+                            'año': anio,
+                            'pais': 'Perú'
+                        }
+                        
+                        item = {
+                            'title': texto,
+                            'description': texto,
+                            'country': 'Perú',
+                            'source_url': pdf_url,
+                            'source_type': 'DIGESA',
+                            'presentation_date': fecha,
+                            'extra_data': json.dumps(metadata)
+                        }
+                        items.append(item)
+                    except Exception as e:
+                        print(f"[DIGESA Scraper] Error procesando item: {str(e)}")
+                        continue
+            current = current.find_next()
+    
+    print(f"[DIGESA Scraper] Se encontraron {len(items)} comunicados de {', '.join(anio for _, anio in headers)}")
+    return items
 
-async def scrape_digesa():
+@execution_mode("process")
+async def scrape_digesa(client):
     print("[DIGESA Scraper] Iniciando scraping...")
     
     # URL base de DIGESA
-    base_url = "http://www.digesa.minsa.gob.pe/noticias/comunicados.asp"
+    base_url = BASE_URL
+    # Año actual y anterior, para no perder los comunicados de fin de año
+    anio = datetime.now().year
     
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(base_url) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # Buscar el encabezado de 2024
-                    header_2024 = soup.find('h4', string='Comunicados 2024')
-                    if not header_2024:
-                        print("[DIGESA Scraper] No se encontró la sección de comunicados 2024")
-                        return []
-                    
-                    items = []
-                    # Obtener todos los enlaces después del encabezado hasta el siguiente h4
-                    current = header_2024.find_next()
-                    while current and current.name != 'h4':
-                        if current.name == 'a':
-                            href = current.get('href')
-                            if href and ('.pdf' in href.lower() or 'comunicado' in href.lower()):
-                                texto = current.text.strip()
-                                fecha_match = re.search(r'(\d{2})[./](\d{2})[./](\d{4})', texto)
-                                
-                                try:
-                                    if fecha_match:
-                                        dia, mes, anio = fecha_match.groups()
-                                        fecha = datetime.strptime(f"{anio}-{mes}-{dia}", "%Y-%m-%d")
-                                    else:
-                                        fecha = datetime.utcnow()
-                                    
-                                    # Construir URL completa del PDF
-                                    pdf_url = urljoin(base_url, href)
-                                    
-                                    metadata = {
-                                        'tipo': 'comunicado',
-                                        'institucion': 'DIGESA',
-                                        'año': '2024',
-                                        'pais': 'Perú'
-                                    }
-                                    
-                                    item = {
-                                        'title': texto,
-                                        'description': texto,
-                                        'country': 'Perú',
-                                        'source_url': pdf_url,
-                                        'source_type': 'DIGESA',
-                                        'presentation_date': fecha,
-                                        'extra_data': json.dumps(metadata)
-                                    }
-                                    items.append(item)
-                                except Exception as e:
-                                    print(f"[DIGESA Scraper] Error procesando item: {str(e)}")
-                                    continue
-                        current = current.find_next()
-                    
-                    print(f"[DIGESA Scraper] Se encontraron {len(items)} comunicados de 2024")
-                    return items
-                else:
-                    print(f"[DIGESA Scraper] Error al acceder a la página: {response.status}")
-                    return []
-                    
+        response = await client.get_if_changed(base_url)
+        if response is None:
+            # La página no cambió desde la última ejecución
+            return []
+        if response.status_code == 200:
+            return await run_parser(parse_digesa, response.text, base_url, (anio, anio - 1))
+        else:
+            print(f"[DIGESA Scraper] Error al acceder a la página: {response.status_code}")
+            response.raise_for_status()
+            return []
+    
     except Exception as e:
         print(f"[DIGESA Scraper] Error durante el scraping: {str(e)}")
+        raise
+
+async def archive_page(client, page):
+    # Todos los años están en una sola página: el archivo completo es la página 1
+    if page > 1:
         return []
+    return await fetch_archive_page(client, BASE_URL, parse_digesa, BASE_URL)
 
 if __name__ == "__main__":
-    asyncio.run(scrape_digesa())
+    run_with_client(scrape_digesa)
@@ -1,71 +1,85 @@
-import asyncio
-from datetime import datetime
-import aiohttp
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import json
+from .dates import parse_date
+from .executor import execution_mode, run_parser
+from .http_client import fetch_archive_page, run_with_client
+from .parsing import only, parse_html
 
-async def scrape_diputados_noticias():
-    base_url = "https://www.camara.cl/cms/noticias/"
+def parse_diputados_noticias(html):
+    soup = parse_html(html, only('div', class_='td_module_4'))
     items = []
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(base_url) as response:
-            if response.status != 200:
-                print(f"[Diputados Noticias Scraper] Error al obtener la página: {response.status}")
-                return []
+    # Encontrar todos los módulos de noticias
+    noticias = soup.find_all('div', class_='td_module_4')
+    
+    for noticia in noticias:
+        try:
+            # Extraer el enlace y título
+            link_element = noticia.find('h3', class_='entry-title').find('a')
+            title = link_element['title']
+            url = link_element['href']
+            
+            # Extraer la descripción
+            description = noticia.find('div', class_='td-excerpt').text.strip()
             
-            html = await response.text()
-            soup = BeautifulSoup(html, 'html.parser')
+            # Extraer la fecha
+            date_text = noticia.find('time', class_='entry-date')['datetime']
+            # Convertir el string ISO (con zona horaria) a datetime UTC
+            date = parse_date(date_text)
+            if not date:
+                continue
             
-            # Encontrar todos los módulos de noticias
-            noticias = soup.find_all('div', class_='td_module_4')
+            # Extraer categoría
+            category = noticia.find('a', class_='td-post-category')
+            category_text = category.text.strip() if category else "Sin categoría"
             
-            for noticia in noticias:
-                try:
-                    # Extraer el enlace y título
-                    link_element = noticia.find('h3', class_='entry-title').find('a')
-                    title = link_element['title']
-                    url = link_element['href']
-                    
-                    # Extraer la descripción
-                    description = noticia.find('div', class_='td-excerpt').text.strip()
-                    
-                    # Extraer la fecha
-                    date_text = noticia.find('time', class_='entry-date')['datetime']
-                    # Convertir el string ISO a objeto datetime
-                    date = datetime.fromisoformat(date_text.replace('-03:00', '+00:00'))
-                    
-                    # Extraer categoría
-                    category = noticia.find('a', class_='td-post-category')
-                    category_text = category.text.strip() if category else "Sin categoría"
-                    
-                    # Extraer imagen
-                    img = noticia.find('img', class_='entry-thumb')
-                    img_url = img['src'] if img else None
-                    
-                    # Crear el objeto de noticia
-                    item = {
-                        "title": title,
-                        "description": description,
-                        "source_url": url,
-                        "source_type": "diputados_noticias_cl",
-                        "country": "Chile",
-                        "presentation_date": date,  # Ahora es un objeto datetime
-                        "extra_data": json.dumps({
-                            "category": category_text,
-                            "image_url": img_url
-                        })
-                    }
-                    
-                    items.append(item)
-                    
-                except Exception as e:
-                    print(f"[Diputados Noticias Scraper] Error procesando noticia: {str(e)}")
-                    continue
+            # Extraer imagen
+            img = noticia.find('img', class_='entry-thumb')
+            img_url = img['src'] if img else None
+            
+            # Crear el objeto de noticia
+            item = {
+                "title": title,
+                "description": description,
+                "source_url": url,
+                "source_type": "diputados_noticias_cl",
+                "country": "Chile",
+                "presentation_date": date,  # Ahora es un objeto datetime
+                "extra_data": json.dumps({
+                    "category": category_text,
+                    "image_url": img_url
+                })
+            }
+            
+            items.append(item)
+        
+        except Exception as e:
+            print(f"[Diputados Noticias Scraper] Error procesando noticia: {str(e)}")
+            continue
     
     print(f"[Diputados Noticias Scraper] Se encontraron {len(items)} noticias")
     return items
 
+@execution_mode("process")
+async def scrape_diputados_noticias(client):
+    base_url = "https://www.camara.cl/cms/noticias/"
+    
+    response = await client.get_if_changed(base_url)
+    if response is None:
+        # La página no cambió desde la última ejecución
+        return []
+    if response.status_code != 200:
+        print(f"[Diputados Noticias Scraper] Error al obtener la página: {response.status_code}")
+        response.raise_for_status()
+        return []
+    
+    return await run_parser(parse_diputados_noticias, response.text)
+
+# Archivo paginado para el modo backfill
+ARCHIVE_URL = "https://www.camara.cl/cms/noticias/page/{page}/"
+
+async def archive_page(client, page):
+    return await fetch_archive_page(client, ARCHIVE_URL.format(page=page), parse_diputados_noticias)
+
 if __name__ == "__main__":
-    asyncio.run(scrape_diputados_noticias())
+    run_with_client(scrape_diputados_noticias)
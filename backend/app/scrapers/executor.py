@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Tamaño de los pools (configurables por entorno); con 0 workers de parseo
+# el HTML se parsea en el pool de hilos
+SCRAPING_THREAD_WORKERS = int(os.getenv("SCRAPING_THREAD_WORKERS", "4"))
+SCRAPING_PARSE_WORKERS = int(os.getenv("SCRAPING_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Modos de ejecución que puede declarar un scraper:
+# - async: solo espera I/O con el cliente compartido; el parseo va al pool de hilos
+# - process: parsea páginas grandes, el parseo va al pool de procesos
+# - thread: función síncrona y bloqueante (sin cliente), se ejecuta completa en el pool de hilos
+EXECUTION_MODES = ("async", "process", "thread")
+
+_thread_pool = None
+_process_pool = None
+_parse_in_process = ContextVar("parse_in_process", default=False)
+
+
+def execution_mode(mode):
+    """Decorador con el que cada scraper declara cómo debe ejecutarse."""
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"Modo de ejecución desconocido: {mode}")
+
+    def decorator(func):
+        func.execution_mode = mode
+        return func
+    return decorator
+
+
+def get_execution_mode(func):
+    return getattr(func, "execution_mode", "async")
+
+
+def _get_thread_pool():
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=SCRAPING_THREAD_WORKERS,
+            thread_name_prefix="scraping"
+        )
+    return _thread_pool
+
+
+def _get_process_pool():
+    global _process_pool
+    if _process_pool is None:
+        # spawn: los workers no heredan el event loop ni los hilos del servidor
+        _process_pool = ProcessPoolExecutor(
+            max_workers=SCRAPING_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """Ejecuta código bloqueante (I/O síncrono, base de datos) fuera del event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_thread_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_parser(func, *args):
+    """
+    Ejecuta una función de parseo fuera del event loop: en el pool de procesos
+    si el scraper en curso declaró el modo `process`, o en el pool de hilos en
+    otro caso. `func` debe ser una función de nivel de módulo y sus argumentos
+    y resultado serializables con pickle.
+    """
+    global _process_pool
+    if not _parse_in_process.get() or SCRAPING_PARSE_WORKERS < 1:
+        return await run_in_thread(func, *args)
+
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_process_pool(), func, *args)
+    except BrokenProcessPool:
+        # Un worker murió: se recrea el pool en la próxima llamada y esta se parsea en un hilo
+        print("Pool de procesos de parseo caído, se recreará")
+        _process_pool = None
+        return await run_in_thread(func, *args)
+
+
+@contextmanager
+def scraper_context(scraper_func):
+    """Aplica el modo declarado por el scraper a los parseos que haga dentro del bloque."""
+    token = _parse_in_process.set(get_execution_mode(scraper_func) == "process")
+    try:
+        yield
+    finally:
+        _parse_in_process.reset(token)
+
+
+async def run_scraper(scraper_func, client):
+    """Ejecuta un scraper según su modo declarado."""
+    with scraper_context(scraper_func):
+        if get_execution_mode(scraper_func) == "thread":
+            return await run_in_thread(scraper_func)
+        return await scraper_func(client)
+
+
+def shutdown():
+    global _thread_pool, _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
@@ -0,0 +1,27 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Fallos de la fuente en curso que no cortan el scraper, por ejemplo una página
+# de detalle que no se pudo descargar. La fuente se registra como fallida y sus
+# validadores HTTP y marca de agua no se guardan, así la próxima ejecución
+# vuelve a procesar las páginas en lugar de darlas por vistas.
+_failures = ContextVar("source_failures", default=None)
+
+
+@contextmanager
+def source_failures():
+    """Acumula los fallos que reporten los scrapers de la fuente dentro del bloque."""
+    failures = []
+    token = _failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _failures.reset(token)
+
+
+def report_failure(message):
+    """Registra un paso fallido de la fuente en curso (fuera de `source_failures` solo se imprime)."""
+    print(message)
+    failures = _failures.get()
+    if failures is not None:
+        failures.append(message)
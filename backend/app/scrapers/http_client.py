@@ -0,0 +1,133 @@
+import asyncio
+import importlib.util
+import os
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import conditional_cache, executor
+
+# Política común para todas las peticiones de scraping (configurable por entorno)
+USER_AGENT = os.getenv(
+    "SCRAPING_USER_AGENT",
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+SCRAPING_TIMEOUT = float(os.getenv("SCRAPING_TIMEOUT", "30"))
+SCRAPING_MAX_CONNECTIONS = int(os.getenv("SCRAPING_MAX_CONNECTIONS", "20"))
+SCRAPING_MAX_CONNECTIONS_PER_HOST = int(os.getenv("SCRAPING_MAX_CONNECTIONS_PER_HOST", "4"))
+SCRAPING_KEEPALIVE_EXPIRY = float(os.getenv("SCRAPING_KEEPALIVE_EXPIRY", "60"))
+
+# HTTP/2 solo está disponible si se instaló el extra httpx[http2] (paquete h2)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class ScrapingClient:
+    """
+    Cliente HTTP compartido por todos los scrapers.
+
+    Mantiene un único pool de conexiones keep-alive (HTTP/2 cuando el servidor
+    lo soporta), limita las conexiones simultáneas por host y aplica el mismo
+    timeout y User-Agent a todas las peticiones. Se crea una sola vez en el
+    lifespan de la aplicación y se pasa como parámetro a cada scraper.
+    """
+
+    def __init__(self, transport=None):
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            verify=False,
+            follow_redirects=True,
+            timeout=httpx.Timeout(SCRAPING_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=SCRAPING_MAX_CONNECTIONS,
+                max_keepalive_connections=SCRAPING_MAX_CONNECTIONS,
+                keepalive_expiry=SCRAPING_KEEPALIVE_EXPIRY
+            ),
+            headers={"User-Agent": USER_AGENT},
+            transport=transport
+        )
+        self._host_semaphores = {}
+
+    def _host_semaphore(self, url):
+        host = urlsplit(str(url)).netloc
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(SCRAPING_MAX_CONNECTIONS_PER_HOST)
+        return self._host_semaphores[host]
+
+    async def request(self, method, url, **kwargs):
+        # La respuesta se lee completa antes de liberar el cupo del host
+        async with self._host_semaphore(url):
+            return await self._client.request(method, url, **kwargs)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def get_if_changed(self, url, **kwargs):
+        """
+        GET condicional para páginas de listado. Envía If-None-Match /
+        If-Modified-Since con los validadores guardados y devuelve None si la
+        página no cambió (304, o mismo hash del cuerpo cuando el servidor no
+        envía validadores), para que el scraper omita el parseo y la ingesta.
+        """
+        force = conditional_cache.is_force_refresh()
+        validator = None if force else await executor.run_in_thread(conditional_cache.get_validator, url)
+        headers = dict(kwargs.pop("headers", None) or {})
+        if validator:
+            if validator.etag:
+                headers["If-None-Match"] = validator.etag
+            if validator.last_modified:
+                headers["If-Modified-Since"] = validator.last_modified
+
+        response = await self.get(url, headers=headers, **kwargs)
+        if response.status_code == 304:
+            print(f"Sin cambios (304) en {url}")
+            return None
+        if response.status_code != 200:
+            return response
+
+        content_hash = conditional_cache.body_hash(response.content)
+        conditional_cache.record_validator(
+            url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            content_hash
+        )
+        if validator and validator.body_hash == content_hash:
+            print(f"Sin cambios (mismo contenido) en {url}")
+            return None
+        return response
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+async def fetch_archive_page(client, url, parser, *args):
+    """
+    Descarga y parsea una página de un archivo paginado (modo backfill).
+    Devuelve [] si la página no existe, lo que marca el fin del archivo.
+    """
+    response = await client.get(url)
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
+    return await executor.run_parser(parser, response.text, *args)
+
+
+def run_with_client(scraper_func):
+    """
+    Ejecuta un scraper de forma aislada (desde la línea de comandos)
+    con un cliente propio que se cierra al terminar.
+    """
+    async def main():
+        async with ScrapingClient() as client:
+            return await scraper_func(client)
+
+    return asyncio.run(main())
@@ -0,0 +1,147 @@
+import importlib
+import os
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from sqlalchemy.orm import Session
+
+from ..models import models
+
+# Planificación de cada fuente (configurable por entorno): fracción del intervalo
+# usada como jitter, jitter máximo de la primera ejecución y espera máxima con backoff
+SCRAPING_JITTER_RATIO = float(os.getenv("SCRAPING_JITTER_RATIO", "0.1"))
+SCRAPING_START_JITTER = int(os.getenv("SCRAPING_START_JITTER", "300"))
+SCRAPING_MAX_BACKOFF = int(os.getenv("SCRAPING_MAX_BACKOFF", str(24 * 3600)))
+
+HOUR = 3600
+
+ScraperEntry = namedtuple("ScraperEntry", ["module", "function", "refresh_interval"])
+
+# scraper_type de la tabla sources -> módulo y función del scraper, e intervalo
+# de actualización por defecto en segundos (sources.refresh_interval lo reemplaza).
+# Los módulos se importan recién cuando se ejecuta la fuente.
+SCRAPER_TYPES = {
+    "anamed_cl": ScraperEntry("anamed_scraper", "scrape_anamed", 3 * HOUR),
+    "congreso_pe": ScraperEntry("congreso_scraper", "scrape_congreso", HOUR),
+    "expediente_pe": ScraperEntry("expediente_scraper", "scrape_expediente", 3 * HOUR),
+    "digesa_pe": ScraperEntry("digesa_scraper", "scrape_digesa", 6 * HOUR),
+    "digesa_noticias_pe": ScraperEntry("digesa_noticias_scraper", "scrape_digesa_noticias", HOUR),
+    "diputados_noticias_cl": ScraperEntry("diputados_noticias_scraper", "scrape_diputados_noticias", HOUR),
+    "diputados_proyectos_cl": ScraperEntry("diputados_proyectos_scraper", "scrape_diputados_proyectos", 3 * HOUR),
+    "ispch_noticias_cl": ScraperEntry("ispch_noticias_scraper", "scrape_ispch_noticias", HOUR),
+    "ispch_resoluciones_cl": ScraperEntry("ispch_resoluciones_scraper", "scrape_ispch_resoluciones", 6 * HOUR),
+    "minsa_normas_pe": ScraperEntry("minsa_normas_scraper", "scrape_minsa_normas", 6 * HOUR),
+    "minsa_noticias_pe": ScraperEntry("minsa_noticias_scraper", "scrape_minsa_noticias", HOUR),
+    "senado_noticias_cl": ScraperEntry("senado_noticias_scraper", "scrape_senado_noticias", HOUR),
+    "digemid_noticias_pe": ScraperEntry("digemid_noticias_scraper", "scrape_digemid_noticias", HOUR),
+}
+
+# Fuente a scrapear: (id, nombre, scraper_type, host)
+SourceJob = namedtuple("SourceJob", ["source_id", "name", "scraper_type", "host"])
+
+
+def load_scraper(scraper_type):
+    """Importa el módulo del scraper (solo la primera vez) y devuelve su función."""
+    entry = SCRAPER_TYPES.get(scraper_type)
+    if entry is None:
+        raise ValueError(f"Tipo de scraper desconocido: {scraper_type}")
+    module = importlib.import_module(f".{entry.module}", __package__)
+    return getattr(module, entry.function)
+
+
+def load_archive(scraper_type):
+    """
+    Función `archive_page(client, page)` del scraper para el modo backfill, o
+    None si la fuente no tiene archivo paginado.
+    """
+    entry = SCRAPER_TYPES.get(scraper_type)
+    if entry is None:
+        raise ValueError(f"Tipo de scraper desconocido: {scraper_type}")
+    module = importlib.import_module(f".{entry.module}", __package__)
+    return getattr(module, "archive_page", None)
+
+
+def refresh_interval(source):
+    """Intervalo de actualización de la fuente en segundos."""
+    return source.refresh_interval or SCRAPER_TYPES[source.scraper_type].refresh_interval
+
+
+def next_scrape_at(source, now=None, failures=0):
+    """
+    Próxima ejecución de la fuente: su intervalo, duplicado por cada fallo
+    consecutivo (hasta SCRAPING_MAX_BACKOFF), más un jitter aleatorio para que
+    las fuentes no coincidan.
+    """
+    now = now or datetime.utcnow()
+    interval = refresh_interval(source)
+    delay = min(interval * 2 ** min(failures, 16), max(interval, SCRAPING_MAX_BACKOFF))
+    return now + timedelta(seconds=delay + random.uniform(0, interval * SCRAPING_JITTER_RATIO))
+
+
+def _job(source):
+    return SourceJob(source.id, source.name, source.scraper_type, urlsplit(source.url).netloc)
+
+
+def _active_sources(db: Session):
+    sources = db.query(models.Source).filter(models.Source.active == True).order_by(models.Source.id).all()
+    known = []
+    for source in sources:
+        if source.scraper_type not in SCRAPER_TYPES:
+            print(f"Fuente {source.name} omitida: tipo de scraper desconocido '{source.scraper_type}'")
+            continue
+        known.append(source)
+    return known
+
+
+def sources_to_scrape(db: Session, force=False):
+    """
+    Fuentes activas que necesitan actualizarse: las que nunca se scrapearon o
+    cuyo último scraping es más antiguo que su intervalo. Con `force` se
+    devuelven todas las fuentes activas.
+    """
+    now = datetime.utcnow()
+    return [
+        _job(source)
+        for source in _active_sources(db)
+        if force
+        or source.last_scraped is None
+        or source.last_scraped < now - timedelta(seconds=refresh_interval(source))
+    ]
+
+
+def due_sources(db: Session):
+    """
+    Fuentes activas cuya próxima ejecución programada ya llegó. Las que aún no
+    tienen una se programan con un jitter inicial en lugar de ejecutarse todas
+    a la vez al arrancar.
+    """
+    now = datetime.utcnow()
+    jobs = []
+    for source in _active_sources(db):
+        if source.next_scrape_at is None:
+            start_jitter = min(refresh_interval(source), SCRAPING_START_JITTER)
+            source.next_scrape_at = now + timedelta(seconds=random.uniform(0, start_jitter))
+        elif source.next_scrape_at <= now:
+            jobs.append(_job(source))
+    db.commit()
+    return jobs
+
+
+def record_result(db: Session, source_id, success):
+    """
+    Registra el resultado de una fuente: last_scraped si terminó bien, el
+    contador de fallos consecutivos y la próxima ejecución (con backoff).
+    """
+    source = db.query(models.Source).filter(models.Source.id == source_id).first()
+    if source is None:
+        return
+    now = datetime.utcnow()
+    if success:
+        source.last_scraped = now
+        source.consecutive_failures = 0
+    else:
+        source.consecutive_failures = (source.consecutive_failures or 0) + 1
+    source.next_scrape_at = next_scrape_at(source, now, source.consecutive_failures)
+    db.commit()
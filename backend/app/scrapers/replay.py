@@ -0,0 +1,136 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+from urllib.parse import urlsplit
+
+import httpx
+
+from .http_client import HTTP2_AVAILABLE, ScrapingClient
+
+# Cabeceras que no se guardan: el cuerpo se graba ya descomprimido y httpx
+# recalcula la longitud al reconstruir la respuesta
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+def request_key(request):
+    """
+    Clave de una petición: método, URL y hash del cuerpo, para que los POST
+    con distinto JSON (p. ej. cada página de la API de expedientes) tengan
+    fixtures distintos. Las cabeceras no cuentan: los GET condicionales
+    responden igual que los normales.
+    """
+    body_hash = hashlib.sha256(request.content or b"").hexdigest()
+    raw = f"{request.method} {request.url} {body_hash}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def fixture_path(directory, request):
+    host = urlsplit(str(request.url)).netloc.replace(":", "_") or "local"
+    return os.path.join(directory, host, f"{request.method.lower()}-{request_key(request)}.json.gz")
+
+
+def save_fixture(path, request, status_code, headers, body):
+    fixture = {
+        "method": request.method,
+        "url": str(request.url),
+        "request_body": base64.b64encode(request.content or b"").decode("ascii"),
+        "status_code": status_code,
+        "headers": [[name, value] for name, value in headers if name.lower() not in _DROPPED_HEADERS],
+        "body": base64.b64encode(body).decode("ascii"),
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # mtime=0: grabar dos veces la misma respuesta produce el mismo archivo
+    with open(path, "wb") as f:
+        f.write(gzip.compress(json.dumps(fixture, ensure_ascii=False).encode("utf-8"), mtime=0))
+
+
+def load_fixture(path):
+    with open(path, "rb") as f:
+        fixture = json.loads(gzip.decompress(f.read()))
+    fixture["body"] = base64.b64decode(fixture["body"])
+    return fixture
+
+
+class MissingFixture(httpx.TransportError):
+    """La petición no tiene respuesta grabada (solo en modo estricto)."""
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte que hace las peticiones reales y guarda cada respuesta
+    (estado, cabeceras y cuerpo) como fixture comprimido en `directory`.
+    Las redirecciones se graban paso a paso, igual que las sigue el cliente.
+    """
+
+    def __init__(self, directory, transport=None):
+        self.directory = directory
+        self.recorded = 0
+        self._transport = transport or httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, verify=False)
+
+    async def handle_async_request(self, request):
+        response = await self._transport.handle_async_request(request)
+        try:
+            body = await response.aread()
+        finally:
+            await response.aclose()
+        save_fixture(fixture_path(self.directory, request), request, response.status_code,
+                     response.headers.multi_items(), body)
+        self.recorded += 1
+        return httpx.Response(
+            response.status_code,
+            headers=[(name, value) for name, value in response.headers.multi_items()
+                     if name.lower() not in _DROPPED_HEADERS],
+            content=body,
+            request=request
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Transporte sin red que responde con los fixtures grabados. Una petición
+    sin fixture recibe un 404 (los archivos paginados terminan ahí) o, con
+    `strict=True`, levanta MissingFixture.
+    """
+
+    def __init__(self, directory, strict=False):
+        self.directory = directory
+        self.strict = strict
+        self.served = 0
+        self.missing = []
+        self._fixtures = {}
+
+    def _fixture(self, path):
+        if path not in self._fixtures:
+            self._fixtures[path] = load_fixture(path) if os.path.exists(path) else None
+        return self._fixtures[path]
+
+    async def handle_async_request(self, request):
+        await request.aread()
+        fixture = self._fixture(fixture_path(self.directory, request))
+        if fixture is None:
+            self.missing.append(f"{request.method} {request.url}")
+            if self.strict:
+                raise MissingFixture(f"Sin fixture para {request.method} {request.url}", request=request)
+            return httpx.Response(404, content=b"", request=request)
+        self.served += 1
+        return httpx.Response(
+            fixture["status_code"],
+            headers=fixture["headers"],
+            content=fixture["body"],
+            request=request
+        )
+
+
+def recording_client(directory):
+    """ScrapingClient que graba las respuestas en `directory`."""
+    return ScrapingClient(transport=RecordingTransport(directory))
+
+
+def replay_client(directory, strict=False):
+    """ScrapingClient que responde desde los fixtures de `directory`, sin red."""
+    return ScrapingClient(transport=ReplayTransport(directory, strict=strict))
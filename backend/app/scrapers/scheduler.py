@@ -0,0 +1,166 @@
+import asyncio
+import os
+import tempfile
+
+from sqlalchemy import text
+
+from ..database import SessionLocal, engine
+from . import registry
+from .executor import run_in_thread
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Scheduler de scraping (configurable por entorno): activación y cada cuántos
+# segundos revisa las fuentes pendientes
+SCRAPING_SCHEDULER_ENABLED = os.getenv("SCRAPING_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+SCRAPING_SCHEDULER_TICK = int(os.getenv("SCRAPING_SCHEDULER_TICK", "60"))
+SCRAPING_SCHEDULER_LOCK_FILE = os.getenv(
+    "SCRAPING_SCHEDULER_LOCK_FILE",
+    os.path.join(tempfile.gettempdir(), "monitorwind-scheduler.lock")
+)
+
+# Clave del advisory lock de PostgreSQL (cualquier entero fijo de 64 bits)
+ADVISORY_LOCK_KEY = 0x4D57_5343  # "MWSC"
+
+
+class SchedulerLock:
+    """
+    Lock exclusivo entre procesos para que un solo worker de gunicorn ejecute
+    el scheduler. En PostgreSQL usa un advisory lock de sesión sobre una
+    conexión propia; en otro caso un lock sobre un archivo local. Ambos se
+    liberan solos si el proceso muere, y otro worker los toma en su siguiente
+    intento.
+    """
+
+    def __init__(self, bind=engine, path=SCRAPING_SCHEDULER_LOCK_FILE):
+        self.bind = bind
+        self.path = path
+        self._conn = None
+        self._file = None
+
+    @property
+    def held(self):
+        return self._conn is not None or self._file is not None
+
+    def acquire(self):
+        """Toma el lock si está libre. Devuelve True si este proceso lo tiene."""
+        if self.held:
+            return self._check()
+        if self.bind.dialect.name == "postgresql":
+            return self._acquire_advisory()
+        return self._acquire_file()
+
+    def release(self):
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+                self._conn.close()
+            except Exception as e:
+                print(f"Error liberando el lock del scheduler: {str(e)}")
+            self._conn = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _check(self):
+        # Si se perdió la conexión que tiene el advisory lock, el lock también se perdió
+        if self._conn is None:
+            return True
+        try:
+            self._conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            print(f"Scheduler: se perdió la conexión del lock: {str(e)}")
+            self._conn = None
+            return False
+
+    def _acquire_advisory(self):
+        conn = self.bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY}
+            ).scalar()
+        except Exception:
+            conn.close()
+            raise
+        if acquired:
+            self._conn = conn
+        else:
+            conn.close()
+        return bool(acquired)
+
+    def _acquire_file(self):
+        lock_file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+
+def _due_jobs():
+    db = SessionLocal()
+    try:
+        return registry.due_sources(db)
+    finally:
+        db.close()
+
+
+class ScrapingScheduler:
+    """
+    Scheduler en proceso iniciado desde el lifespan de FastAPI. Cada
+    SCRAPING_SCHEDULER_TICK segundos, si este worker tiene el lock, ejecuta
+    con `run_jobs(jobs)` las fuentes cuya próxima ejecución ya llegó. El
+    intervalo, el jitter y el backoff de cada fuente los calcula el registry
+    al registrar su resultado.
+    """
+
+    def __init__(self, run_jobs, tick=SCRAPING_SCHEDULER_TICK, lock=None):
+        self.run_jobs = run_jobs
+        self.tick = tick
+        self.lock = lock or SchedulerLock()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.lock.release()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error en el scheduler de scraping: {str(e)}")
+            await asyncio.sleep(self.tick)
+
+    async def run_once(self):
+        was_held = self.lock.held
+        if not await run_in_thread(self.lock.acquire):
+            return
+        if not was_held:
+            print(f"Scheduler de scraping activo en este worker (pid {os.getpid()})")
+        jobs = await run_in_thread(_due_jobs)
+        if jobs:
+            await self.run_jobs(jobs)
@@ -1,127 +1,171 @@
 import asyncio
-import httpx
-from bs4 import BeautifulSoup
-from datetime import datetime
 import json
+import os
 import re
+from . import watermark
+from .dates import parse_date
+from .detail_cache import known_dates
+from .executor import execution_mode, run_in_thread, run_parser
+from .failures import report_failure
+from .http_client import run_with_client
+from .parsing import only, parse_html
 
-async def scrape_senado_noticias():
-    url = "https://www.senado.cl/comunicaciones/noticias"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+# Páginas de detalle que se descargan a la vez
+SENADO_DETAIL_CONCURRENCY = int(os.getenv("SENADO_DETAIL_CONCURRENCY", "4"))
+
+def parse_fecha_noticia(html):
+    soup_noticia = parse_html(html, only(['p', 'time']))
+    
+    # Buscar la fecha en el contenido
+    fecha = None
+    fecha_element = soup_noticia.find('p', class_='color-blue-75')
+    if fecha_element:
+        fecha = parse_date(fecha_element.text.strip())
+    
+    # Si no se encuentra en el primer intento, buscar en otros elementos
+    if not fecha:
+        fecha_element = soup_noticia.find('time')
+        if fecha_element:
+            fecha = parse_date(fecha_element.text.strip())
+    return fecha
+
+async def fetch_fecha(client, url_noticia, semaphore):
+    """
+    Descarga la página de la noticia y extrae su fecha. Si la descarga o el
+    parseo fallan, la noticia queda sin fecha y el fallo se reporta para que
+    el listado se vuelva a procesar en la próxima ejecución.
+    """
+    async with semaphore:
+        try:
+            # Hacer una petición a la página de la noticia
+            response_noticia = await client.get(url_noticia)
+            response_noticia.raise_for_status()
+        except Exception as e:
+            report_failure(f"Error obteniendo fecha de la noticia {url_noticia}: {e}")
+            return None
+    try:
+        return await run_parser(parse_fecha_noticia, response_noticia.text)
+    except Exception as e:
+        report_failure(f"Error obteniendo fecha de la noticia {url_noticia}: {e}")
+        return None
+
+def parse_tarjetas(html):
+    """Extrae (url, título, categoría, imagen) de cada tarjeta del listado."""
+    soup = parse_html(html, only('a', class_='card'))
+    
+    # Encontrar todas las noticias
+    noticias = soup.find_all('a', class_='card')
+    tarjetas = []
+    urls_procesadas = set()  # Set para trackear URLs ya procesadas
     
-    async with httpx.AsyncClient(verify=False) as client:
+    for noticia in noticias:
         try:
-            print(f"Iniciando scraping de {url}")
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
+            # Extraer URL
+            url_noticia = f"https://www.senado.cl{noticia['href']}"
             
-            print(f"Respuesta recibida. Status code: {response.status_code}")
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Saltar si ya procesamos esta URL
+            if url_noticia in urls_procesadas:
+                continue
             
-            # Encontrar todas las noticias
-            noticias = soup.find_all('a', class_='card')
-            items = []
-            urls_procesadas = set()  # Set para trackear URLs ya procesadas
+            urls_procesadas.add(url_noticia)
             
-            for noticia in noticias:
-                try:
-                    # Extraer URL
-                    url_noticia = f"https://www.senado.cl{noticia['href']}"
-                    
-                    # Saltar si ya procesamos esta URL
-                    if url_noticia in urls_procesadas:
-                        continue
-                    
-                    urls_procesadas.add(url_noticia)
-                    
-                    # Extraer título
-                    titulo = noticia.find('h3', class_='subtitle').text.strip()
-                    
-                    # Extraer categoría
-                    categorias_div = noticia.find('div', class_='categorias')
-                    categorias = [cat.text.strip() for cat in categorias_div.find_all('p')] if categorias_div else []
-                    categoria = categorias[0] if categorias else "General"
-                    
-                    # Extraer fecha del contenido
-                    fecha = None
-                    
-                    try:
-                        # Hacer una petición a la página de la noticia
-                        response_noticia = await client.get(url_noticia, headers=headers)
-                        response_noticia.raise_for_status()
-                        soup_noticia = BeautifulSoup(response_noticia.text, 'html.parser')
-                        
-                        # Buscar la fecha en el contenido
-                        fecha_element = soup_noticia.find('p', class_='color-blue-75')
-                        if fecha_element:
-                            fecha_str = fecha_element.text.strip()
-                            # Convertir mes a número
-                            meses = {
-                                'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
-                                'julio': 7, 'agosto': 8, 'septiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12
-                            }
-                            patron = r'(\d+) de (\w+) de (\d+)'
-                            match = re.search(patron, fecha_str)
-                            if match:
-                                dia, mes, anio = match.groups()
-                                mes_num = meses[mes.lower()]
-                                fecha = datetime(int(anio), mes_num, int(dia))
-                        
-                        # Si no se encuentra en el primer intento, buscar en otros elementos
-                        if not fecha:
-                            fecha_element = soup_noticia.find('time')
-                            if fecha_element:
-                                fecha_str = fecha_element.text.strip()
-                                match = re.search(patron, fecha_str)
-                                if match:
-                                    dia, mes, anio = match.groups()
-                                    mes_num = meses[mes.lower()]
-                                    fecha = datetime(int(anio), mes_num, int(dia))
-                    except Exception as e:
-                        print(f"Error obteniendo fecha de la noticia {url_noticia}: {e}")
-                    
-                    if not fecha:
-                        print(f"No se pudo extraer la fecha para la noticia: {titulo}")
-                        continue
-                    
-                    # Extraer imagen
-                    img = noticia.find('img')
+            # Extraer título
+            titulo = noticia.find('h3', class_='subtitle').text.strip()
+            
+            # Extraer categoría
+            categorias_div = noticia.find('div', class_='categorias')
+            categorias = [cat.text.strip() for cat in categorias_div.find_all('p')] if categorias_div else []
+            categoria = categorias[0] if categorias else "General"
+            
+            # Extraer imagen
+            img = noticia.find('img')
+            img_src = None
+            if img:
+                srcset = img.get('srcset', '')
+                # Extraer la URL de mayor resolución del srcset
+                urls = re.findall(r'(https://[^\s]+)', srcset)
+                img_src = urls[-1] if urls else img.get('src', '')
+                if img_src.startswith('/_next'):
                     img_src = None
-                    if img:
-                        srcset = img.get('srcset', '')
-                        # Extraer la URL de mayor resolución del srcset
-                        urls = re.findall(r'(https://[^\s]+)', srcset)
-                        img_src = urls[-1] if urls else img.get('src', '')
-                        if img_src.startswith('/_next'):
-                            img_src = None
-                    
-                    item = {
-                        'title': titulo,
-                        'description': f"[{categoria}] {titulo}",
-                        'source_url': url_noticia,
-                        'source_type': 'noticia',
-                        'country': 'Chile',
-                        'presentation_date': fecha,
-                        'extra_data': json.dumps({
-                            'categoria': categoria,
-                            'imagen_url': img_src,
-                            'tipo': 'noticia_senado'
-                        })
-                    }
-                    items.append(item)
-                    
-                except Exception as e:
-                    print(f"Error procesando noticia: {e}")
-                    continue
             
-            print(f"Se encontraron {len(items)} noticias")
-            return items
+            tarjetas.append((url_noticia, titulo, categoria, img_src))
             
         except Exception as e:
-            print(f"Error en scraping de Senado noticias: {e}")
+            print(f"Error procesando noticia: {e}")
+            continue
+    return tarjetas
+
+async def tarjetas_a_items(client, tarjetas):
+    """Completa las tarjetas con la fecha de su página de detalle y arma los items."""
+    # La fecha solo está en la página de detalle: se reutilizan las ya
+    # conocidas y el resto se descarga en paralelo, con un límite de concurrencia
+    fechas = await run_in_thread(known_dates, [tarjeta[0] for tarjeta in tarjetas])
+    pendientes = [tarjeta[0] for tarjeta in tarjetas if tarjeta[0] not in fechas]
+    print(f"Fechas conocidas: {len(fechas)}, páginas de detalle a descargar: {len(pendientes)}")
+    semaphore = asyncio.Semaphore(SENADO_DETAIL_CONCURRENCY)
+    resultados = await asyncio.gather(*[
+        fetch_fecha(client, url_noticia, semaphore)
+        for url_noticia in pendientes
+    ])
+    fechas.update(zip(pendientes, resultados))
+    
+    # Armar los items en el mismo orden de las tarjetas
+    items = []
+    for url_noticia, titulo, categoria, img_src in tarjetas:
+        fecha = fechas.get(url_noticia)
+        if not fecha:
+            print(f"No se pudo extraer la fecha para la noticia: {titulo}")
+            continue
+        
+        item = {
+            'title': titulo,
+            'description': f"[{categoria}] {titulo}",
+            'source_url': url_noticia,
+            'source_type': 'noticia',
+            'country': 'Chile',
+            'presentation_date': fecha,
+            'extra_data': json.dumps({
+                'categoria': categoria,
+                'imagen_url': img_src,
+                'tipo': 'noticia_senado'
+            })
+        }
+        items.append(item)
+    return items
+
+@execution_mode("process")
+async def scrape_senado_noticias(client):
+    url = "https://www.senado.cl/comunicaciones/noticias"
+    try:
+        print(f"Iniciando scraping de {url}")
+        response = await client.get_if_changed(url)
+        if response is None:
+            # La página no cambió desde la última ejecución
             return []
+        response.raise_for_status()
+        
+        print(f"Respuesta recibida. Status code: {response.status_code}")
+        tarjetas = await run_parser(parse_tarjetas, response.text)
+        # Las noticias ya ingeridas (marca de agua de la fuente) no se vuelven a procesar
+        tarjetas = [tarjeta for tarjeta in tarjetas if not watermark.is_known_url(tarjeta[0])]
+        items = await tarjetas_a_items(client, tarjetas)
+        print(f"Se encontraron {len(items)} noticias")
+        return items
+        
+    except Exception as e:
+        print(f"Error en scraping de Senado noticias: {e}")
+        raise
+
+# Archivo paginado para el modo backfill
+ARCHIVE_URL = "https://www.senado.cl/comunicaciones/noticias?page={page}"
+
+async def archive_page(client, page):
+    response = await client.get(ARCHIVE_URL.format(page=page))
+    if response.status_code == 404:
+        return []
+    response.raise_for_status()
+    tarjetas = await run_parser(parse_tarjetas, response.text)
+    return await tarjetas_a_items(client, tarjetas)
 
 if __name__ == "__main__":
-    asyncio.run(scrape_senado_noticias())
+    run_with_client(scrape_senado_noticias)
@@ -0,0 +1,102 @@
+import json
+import os
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from sqlalchemy.orm import Session
+
+from ..models import models
+from ..services.normalization import normalize_url
+from .dates import wall_time
+
+# URLs recientes que se recuerdan por fuente y días de tolerancia bajo la fecha
+# más nueva (para items publicados con fecha atrasada), configurables por entorno
+SCRAPING_WATERMARK_URLS = int(os.getenv("SCRAPING_WATERMARK_URLS", "500"))
+SCRAPING_WATERMARK_OVERLAP = int(os.getenv("SCRAPING_WATERMARK_OVERLAP", "7"))
+
+# Marca de agua de una fuente: fecha del item más nuevo ingerido y URLs
+# (normalizadas) vistas en las últimas ejecuciones
+Watermark = namedtuple("Watermark", ["date", "urls"])
+
+_current = ContextVar("source_watermark", default=None)
+
+
+def load_watermark(db: Session, source_id):
+    source = db.query(models.Source).filter(models.Source.id == source_id).first()
+    if source is None or (source.watermark_date is None and not source.watermark_urls):
+        return None
+    return Watermark(source.watermark_date, frozenset(json.loads(source.watermark_urls or "[]")))
+
+
+@contextmanager
+def source_watermark(watermark):
+    """Deja disponible la marca de agua de la fuente en curso para sus scrapers."""
+    token = _current.set(watermark)
+    try:
+        yield watermark
+    finally:
+        _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def is_known_url(url, watermark=None):
+    watermark = watermark or current()
+    return watermark is not None and bool(url) and normalize_url(url) in watermark.urls
+
+
+def is_known(item, watermark=None):
+    """
+    Un item ya se ingirió si su URL está entre las recientes de la fuente o si
+    es anterior a la fecha más nueva ingerida (menos SCRAPING_WATERMARK_OVERLAP días).
+    """
+    watermark = watermark or current()
+    if watermark is None:
+        return False
+    if is_known_url(item.get("source_url"), watermark):
+        return True
+    date = item.get("presentation_date")
+    if watermark.date is None or date is None:
+        return False
+    return wall_time(date) < watermark.date - timedelta(days=SCRAPING_WATERMARK_OVERLAP)
+
+
+def reached(items, watermark=None):
+    """True si el lote ya llega a entradas conocidas: las fuentes paginadas dejan de paginar."""
+    return any(is_known(item, watermark) for item in items)
+
+
+def split(items, watermark=None):
+    """Separa los items nuevos de los ya ingeridos: (nuevos, conocidos)."""
+    new, known = [], []
+    for item in items:
+        (known if is_known(item, watermark) else new).append(item)
+    return new, known
+
+
+def save_watermark(db: Session, source_id, items):
+    """
+    Avanza la marca de agua con los items vistos en la ejecución: la fecha más
+    nueva y sus URLs (de la más nueva a la más antigua) delante de las anteriores.
+    """
+    source = db.query(models.Source).filter(models.Source.id == source_id).first()
+    if source is None or not items:
+        return
+    dated = [item for item in items if item.get("presentation_date") and item.get("source_url")]
+    dated.sort(key=lambda item: wall_time(item["presentation_date"]), reverse=True)
+    urls = []
+    seen = set()
+    for url in [normalize_url(item["source_url"]) for item in dated] + json.loads(source.watermark_urls or "[]"):
+        if url not in seen:
+            seen.add(url)
+            urls.append(url)
+    if dated:
+        newest = wall_time(dated[0]["presentation_date"])
+        if source.watermark_date is None or newest > source.watermark_date:
+            source.watermark_date = newest
+    source.watermark_urls = json.dumps(urls[:SCRAPING_WATERMARK_URLS])
+    db.commit()
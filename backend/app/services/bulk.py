@@ -0,0 +1,14 @@
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+
+def insert_ignoring_conflicts(db: Session, model):
+    """INSERT específico del dialecto con ON CONFLICT DO NOTHING (SQLite y PostgreSQL)."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return insert(model)
+    return dialect_insert(model).on_conflict_do_nothing()
@@ -0,0 +1,77 @@
+import os
+import time
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .item_counts import invalidate_counts
+
+# Filas borradas por transacción y pausa entre lotes (segundos), para no
+# retener el lock de escritura mientras la API atiende lecturas
+CLEANUP_BATCH_SIZE = int(os.getenv("CLEANUP_BATCH_SIZE", "1000"))
+CLEANUP_BATCH_PAUSE = float(os.getenv("CLEANUP_BATCH_PAUSE", "0.05"))
+
+# Criterios de duplicado: se conserva el item más antiguo (menor id) de cada grupo
+DUPLICATE_RULES = {
+    "url": (models.Item.source_url,),
+    "title_date": (models.Item.title, models.Item.presentation_date),
+}
+
+
+def duplicate_ids(rule):
+    """
+    SELECT de los ids duplicados según la regla: ROW_NUMBER() sobre las
+    columnas del criterio, ordenado por id, y todo lo que no sea la fila 1.
+    """
+    columns = DUPLICATE_RULES[rule]
+    ranked = select(
+        models.Item.id,
+        func.row_number().over(partition_by=columns, order_by=models.Item.id).label("position")
+    ).where(
+        # Los items sin URL no son duplicados entre sí
+        *[column.isnot(None) for column in columns]
+    ).subquery()
+    return select(ranked.c.id).where(ranked.c.position > 1)
+
+
+def count_duplicates(db: Session):
+    """Duplicados por regla y total de items distintos que se eliminarían."""
+    counts = {
+        rule: db.execute(select(func.count()).select_from(duplicate_ids(rule).subquery())).scalar()
+        for rule in DUPLICATE_RULES
+    }
+    union = duplicate_ids("url").union(duplicate_ids("title_date")).subquery()
+    counts["total"] = db.execute(select(func.count()).select_from(union)).scalar()
+    return counts
+
+
+def delete_items(db: Session, ids):
+    """Borra los items, sus coincidencias de palabras clave y su índice LSH en una transacción."""
+    db.execute(delete(models.ItemKeywordMatch).where(models.ItemKeywordMatch.item_id.in_(ids)))
+    db.execute(delete(models.ItemLshBucket).where(models.ItemLshBucket.item_id.in_(ids)))
+    db.execute(delete(models.ItemSignature).where(models.ItemSignature.item_id.in_(ids)))
+    deleted = db.execute(delete(models.Item).where(models.Item.id.in_(ids))).rowcount
+    db.commit()
+    return deleted
+
+
+def remove_duplicates(db: Session, batch_size=CLEANUP_BATCH_SIZE, pause=CLEANUP_BATCH_PAUSE):
+    """
+    Elimina los duplicados regla por regla. Los ids se calculan con una sola
+    consulta de lectura y se borran en lotes de `batch_size`, cada uno en su
+    propia transacción corta. Devuelve los items eliminados por regla.
+    """
+    deleted = {}
+    for rule in DUPLICATE_RULES:
+        ids = db.execute(duplicate_ids(rule)).scalars().all()
+        deleted[rule] = 0
+        for start in range(0, len(ids), batch_size):
+            deleted[rule] += delete_items(db, ids[start:start + batch_size])
+            print(f"Limpieza ({rule}): {min(start + batch_size, len(ids))}/{len(ids)} duplicados eliminados")
+            if pause:
+                time.sleep(pause)
+    deleted["total"] = deleted["url"] + deleted["title_date"]
+    if deleted["total"]:
+        invalidate_counts()
+    return deleted
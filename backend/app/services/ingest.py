@@ -0,0 +1,155 @@
+import os
+from datetime import datetime
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .bulk import insert_ignoring_conflicts
+from .item_counts import invalidate_counts
+from .keyword_matching import match_new_items, normalized_item_text
+from .normalization import item_fingerprint, normalize_text, normalize_url
+from .search import normalized_tokens
+
+# Cantidad de items por consulta de existencia / INSERT multi-fila
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "2000"))
+
+
+def _normalize_date(value):
+    # Las fechas se guardan sin tzinfo en la hora local de la fuente (ver dates.wall_time)
+    if value is not None and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def _item_row(item, now):
+    """
+    Fila a insertar y el texto normalizado del item para las palabras clave.
+    El título y la descripción se normalizan una sola vez por item.
+    """
+    # Asegurarse de que los campos de texto estén en UTF-8
+    title = item['title'].encode('utf-8').decode('utf-8')
+    description = (item.get('description') or '').encode('utf-8').decode('utf-8')
+    presentation_date = _normalize_date(item['presentation_date'])
+    normalized_title = normalize_text(title)
+    normalized_description = normalize_text(description)
+    row = {
+        "title": title,
+        "description": description,
+        "country": item.get('country'),
+        "source_url": normalize_url(item.get('source_url')),
+        "source_type": item.get('source_type'),
+        "presentation_date": presentation_date,
+        "extra_data": item.get('extra_data'),
+        "fingerprint": item_fingerprint(title, presentation_date, item.get('source_type'),
+                                        normalized_title=normalized_title),
+        # El índice de texto completo se actualiza a partir de esta columna
+        # (mismo resultado que search.search_document)
+        "search_text": " ".join(normalized_tokens(normalized_title) + normalized_tokens(normalized_description)),
+        "created_at": now,
+        "updated_at": now
+    }
+    return row, normalized_item_text(normalized_title, normalized_description)
+
+
+def _dedupe_batch(items):
+    """
+    Elimina en memoria los repetidos del propio lote (por URL o por huella).
+    Devuelve las filas, su texto normalizado por huella y los inválidos.
+    """
+    now = datetime.utcnow()
+    rows = []
+    texts = {}
+    seen_urls = set()
+    seen_fingerprints = set()
+    invalid = 0
+    for item in items:
+        if not item.get('title') or not item.get('presentation_date'):
+            print(f"Item ignorado por no tener título o fecha: {item}")
+            invalid += 1
+            continue
+        row, text = _item_row(item, now)
+        if row["fingerprint"] in seen_fingerprints or (row["source_url"] and row["source_url"] in seen_urls):
+            continue
+        seen_fingerprints.add(row["fingerprint"])
+        if row["source_url"]:
+            seen_urls.add(row["source_url"])
+        rows.append(row)
+        texts[row["fingerprint"]] = text
+    return rows, texts, invalid
+
+
+def _existing_keys(db: Session, rows):
+    """
+    Busca en una sola consulta (dos búsquedas por índice único) qué huellas
+    y qué URLs del bloque ya existen en la tabla items.
+    """
+    fingerprints = {row["fingerprint"] for row in rows}
+    urls = {row["source_url"] for row in rows if row["source_url"]}
+    queries = [
+        select(models.Item.fingerprint.label("key"), literal("fingerprint").label("kind"))
+        .where(models.Item.fingerprint.in_(fingerprints))
+    ]
+    if urls:
+        queries.append(
+            select(models.Item.source_url.label("key"), literal("url").label("kind"))
+            .where(models.Item.source_url.in_(urls))
+        )
+    existing_urls = set()
+    existing_fingerprints = set()
+    for key, kind in db.execute(union_all(*queries)):
+        if kind == "url":
+            existing_urls.add(key)
+        else:
+            existing_fingerprints.add(key)
+    return existing_urls, existing_fingerprints
+
+
+def save_items_to_db(items, db: Session):
+    """
+    Guarda en bloque los items obtenidos por un scraper.
+
+    Deduplica el lote en memoria, consulta los existentes con una sola
+    consulta por bloque sobre los índices únicos de huella y URL, e inserta
+    los nuevos con un INSERT multi-fila ... ON CONFLICT DO NOTHING (los
+    índices únicos descartan cualquier duplicado concurrente). Los clusters
+    de casi duplicados no se calculan aquí: los items quedan pendientes para
+    near_duplicates.cluster_pending_items. Devuelve la cantidad de items
+    insertados y omitidos (repetidos o inválidos).
+    """
+    try:
+        print(f"Intentando guardar {len(items)} items")
+        rows, texts, invalid = _dedupe_batch(items)
+        inserted = 0
+        for start in range(0, len(rows), INGEST_CHUNK_SIZE):
+            chunk = rows[start:start + INGEST_CHUNK_SIZE]
+            existing_urls, existing_fingerprints = _existing_keys(db, chunk)
+            new_rows = [
+                row for row in chunk
+                if row["fingerprint"] not in existing_fingerprints
+                and row["source_url"] not in existing_urls
+            ]
+            if new_rows:
+                # RETURNING solo devuelve las filas realmente insertadas
+                result = db.execute(
+                    insert_ignoring_conflicts(db, models.Item)
+                    .values(new_rows)
+                    .returning(models.Item.id, models.Item.fingerprint)
+                )
+                ids_by_fingerprint = {fingerprint: item_id for item_id, fingerprint in result}
+                inserted += len(ids_by_fingerprint)
+                # Coincidencias con las palabras clave de los usuarios, calculadas una sola vez
+                match_new_items(db, [
+                    (item_id, texts[fingerprint]) for fingerprint, item_id in ids_by_fingerprint.items()
+                ])
+        db.commit()
+        if inserted:
+            invalidate_counts()
+        skipped = len(items) - inserted
+        print(f"Items guardados exitosamente: {inserted} nuevos, {skipped} omitidos")
+        return {"inserted": inserted, "skipped": skipped, "invalid": invalid}
+    except Exception as e:
+        db.rollback()
+        print(f"Error detallado al guardar items: {str(e)}")
+        print(f"Tipo de error: {type(e)}")
+        raise
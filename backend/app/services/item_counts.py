@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .normalization import normalize_text
+
+# Caché de totales por combinación de filtros (configurable por entorno)
+ITEM_COUNT_CACHE_TTL = float(os.getenv("ITEM_COUNT_CACHE_TTL", "300"))
+ITEM_COUNT_CACHE_MAX_ENTRIES = int(os.getenv("ITEM_COUNT_CACHE_MAX_ENTRIES", "1024"))
+# Con count=approximate nunca se cuentan más filas que este tope
+APPROXIMATE_COUNT_CAP = int(os.getenv("APPROXIMATE_COUNT_CAP", "10000"))
+
+COUNT_MODES = ("exact", "approximate", "none")
+
+# Filtros que se comparan sin tildes (búsqueda y palabras clave usan texto
+# normalizado); el resto, como country con ilike, distingue tildes
+ACCENT_INSENSITIVE_FILTERS = ("search", "keywords")
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def invalidate_counts():
+    """Descarta los totales en caché; se llama cuando la ingesta o la limpieza modifican items."""
+    with _lock:
+        _cache.clear()
+
+
+def _case_fold(text):
+    # LIKE de SQLite solo ignora mayúsculas ASCII: "PERÚ" y "Perú" no son el mismo filtro
+    return "".join(c.lower() if c.isascii() else c for c in text)
+
+
+def filters_key(**filters):
+    """
+    Clave estable para un conjunto de filtros, sin valores vacíos. Dos valores
+    comparten clave solo si la consulta los trata igual: los filtros de
+    ACCENT_INSENSITIVE_FILTERS se normalizan y los demás solo ignoran mayúsculas.
+    """
+    normalized = {}
+    for name, value in filters.items():
+        if value in (None, "", [], ()):
+            continue
+        fold = normalize_text if name in ACCENT_INSENSITIVE_FILTERS else _case_fold
+        if isinstance(value, str):
+            value = fold(value)
+        elif isinstance(value, (list, tuple, set)):
+            value = sorted(fold(str(v)) for v in value)
+        normalized[name] = value
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+def _cache_get(key):
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if time.monotonic() - stored_at > ITEM_COUNT_CACHE_TTL:
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return value
+
+
+def _cache_set(key, value):
+    with _lock:
+        _cache[key] = (value, time.monotonic())
+        _cache.move_to_end(key)
+        while len(_cache) > ITEM_COUNT_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _planner_estimate(query, db: Session):
+    # Estimación del planificador de PostgreSQL, sin recorrer la tabla
+    statement = query.statement.compile(
+        dialect=db.get_bind().dialect,
+        compile_kwargs={"literal_binds": True}
+    )
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _capped_count(query):
+    # Cuenta como máximo APPROXIMATE_COUNT_CAP + 1 filas
+    limited = query.with_entities(models.Item.id).order_by(None).limit(APPROXIMATE_COUNT_CAP + 1).subquery()
+    total = query.session.query(func.count()).select_from(limited).scalar()
+    return min(total, APPROXIMATE_COUNT_CAP), total > APPROXIMATE_COUNT_CAP
+
+
+def count_items(query, db: Session, key, mode="exact"):
+    """
+    Devuelve (total, es_estimado) para la consulta filtrada.
+
+    - exact: COUNT completo, guardado en caché por filtros hasta que la
+      ingesta escribe nuevos items (o vence el TTL).
+    - approximate: usa el total en caché si existe; si no, la estimación del
+      planificador (PostgreSQL) o un conteo con tope (SQLite).
+    - none: no cuenta.
+    """
+    if mode == "none":
+        return None, False
+
+    # max(id) es una búsqueda por índice y cambia con cualquier inserción,
+    # incluso si la hizo otro worker
+    max_id = db.query(func.max(models.Item.id)).scalar()
+    cache_key = f"{key}|{max_id}"
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        return cached, False
+
+    if mode == "approximate":
+        if db.get_bind().dialect.name == "postgresql":
+            try:
+                return _planner_estimate(query, db), True
+            except Exception as e:
+                print(f"No se pudo estimar el total con el planificador: {str(e)}")
+        total, capped = _capped_count(query)
+        if not capped:
+            _cache_set(cache_key, total)
+        return total, capped
+
+    total = query.order_by(None).count()
+    _cache_set(cache_key, total)
+    return total, False
@@ -0,0 +1,171 @@
+import threading
+from collections import deque
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .bulk import insert_ignoring_conflicts
+from .normalization import normalize_text
+
+MATCH_BATCH_SIZE = 1000
+
+
+class AhoCorasick:
+    """
+    Autómata de Aho-Corasick: busca todos los patrones en una sola pasada
+    sobre el texto, así que el costo no crece con la cantidad de palabras clave.
+    """
+
+    def __init__(self, patterns):
+        # patterns: iterable de (patrón, valor); devuelve los valores encontrados
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [set()]
+        for pattern, value in patterns:
+            if pattern:
+                self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern, value):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+            state = next_state
+        self._output[state].add(value)
+
+    def _build(self):
+        # Enlaces de falla en BFS; los estados de profundidad 1 fallan a la raíz
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def search(self, text):
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+def item_text(title, description):
+    # Misma semántica que el antiguo ilike sobre título y descripción, sin tildes
+    return normalize_text(f"{title or ''}\n{description or ''}")
+
+
+def normalized_item_text(title, description):
+    """Igual que item_text, a partir del título y la descripción ya normalizados."""
+    return " ".join(text for text in (title, description) if text)
+
+
+_matcher = None
+_matcher_version = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher(db: Session):
+    """
+    Autómata con todas las palabras clave. Se reconstruye solo cuando cambia
+    la tabla keywords (cantidad o id máximo), incluso si el cambio vino de otro worker.
+    """
+    global _matcher, _matcher_version
+    version = tuple(db.query(func.count(models.Keyword.id), func.max(models.Keyword.id)).one())
+    with _matcher_lock:
+        if _matcher is None or _matcher_version != version:
+            keywords = db.query(models.Keyword.id, models.Keyword.word).all()
+            _matcher = AhoCorasick((normalize_text(word), keyword_id) for keyword_id, word in keywords)
+            _matcher_version = version
+        return _matcher
+
+
+def _save_matches(db: Session, matches):
+    # executemany: con muchos usuarios un lote tiene más coincidencias que
+    # variables admite un único INSERT multi-fila en SQLite
+    if matches:
+        db.execute(
+            insert_ignoring_conflicts(db, models.ItemKeywordMatch),
+            [{"item_id": item_id, "keyword_id": keyword_id} for item_id, keyword_id in matches]
+        )
+
+
+def match_new_items(db: Session, items):
+    """
+    Calcula y guarda las coincidencias de items recién insertados:
+    (id, texto de normalized_item_text).
+    """
+    if not items:
+        return 0
+    matcher = get_matcher(db)
+    matches = [
+        (item_id, keyword_id)
+        for item_id, text in items
+        for keyword_id in matcher.search(text)
+    ]
+    _save_matches(db, matches)
+    return len(matches)
+
+
+def _scan_items(db: Session, matcher, commit=False):
+    # Recorre todos los items por lotes de id; con commit=True confirma cada
+    # lote, así la escritura no bloquea la base durante todo el recorrido
+    total = 0
+    last_id = 0
+    while True:
+        rows = db.query(
+            models.Item.id,
+            models.Item.title,
+            models.Item.description
+        ).filter(
+            models.Item.id > last_id
+        ).order_by(models.Item.id).limit(MATCH_BATCH_SIZE).all()
+        if not rows:
+            break
+        matches = [
+            (item_id, keyword_id)
+            for item_id, title, description in rows
+            for keyword_id in matcher.search(item_text(title, description))
+        ]
+        _save_matches(db, matches)
+        if commit:
+            db.commit()
+        total += len(matches)
+        last_id = rows[-1][0]
+    return total
+
+
+def match_keyword(db: Session, keyword):
+    """
+    Calcula las coincidencias de una palabra clave nueva con todos los items
+    existentes, por lotes de MATCH_BATCH_SIZE items confirmados uno a uno.
+    Es bloqueante: desde un endpoint async debe ejecutarse en un hilo.
+    """
+    matcher = AhoCorasick([(normalize_text(keyword.word), keyword.id)])
+    total = _scan_items(db, matcher, commit=True)
+    db.commit()
+    return total
+
+
+def rebuild_keyword_matches(db: Session):
+    """Recalcula todas las coincidencias en una sola pasada sobre items."""
+    db.query(models.ItemKeywordMatch).delete(synchronize_session=False)
+    total = _scan_items(db, get_matcher(db))
+    db.commit()
+    return total
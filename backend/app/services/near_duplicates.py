@@ -0,0 +1,322 @@
+import hashlib
+import operator
+import os
+import re
+import struct
+from collections import Counter
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .bulk import insert_ignoring_conflicts
+from .search import tokenize
+
+# Parámetros del detector (configurables por entorno): similitud mínima
+# estimada con el representante del cluster y días máximos entre fechas de un
+# mismo cluster. Con 16 bandas de 4 filas la probabilidad de ser candidato
+# supera el 50% desde una similitud de ~0.5 y ronda el 90% en ~0.6.
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.6"))
+NEAR_DUPLICATE_WINDOW_DAYS = int(os.getenv("NEAR_DUPLICATE_WINDOW_DAYS", "7"))
+# Límites del costo por item: un bucket con NEAR_DUPLICATE_MAX_BUCKET items
+# (títulos de plantilla, vocabulario muy común) deja de usarse y de crecer, y
+# solo se puntúan los NEAR_DUPLICATE_MAX_CANDIDATES clusters que comparten
+# más buckets con el item.
+NEAR_DUPLICATE_MAX_BUCKET = int(os.getenv("NEAR_DUPLICATE_MAX_BUCKET", "50"))
+NEAR_DUPLICATE_MAX_CANDIDATES = int(os.getenv("NEAR_DUPLICATE_MAX_CANDIDATES", "10"))
+
+LSH_BANDS = 16
+LSH_ROWS = 4
+NUM_PERMUTATIONS = LSH_BANDS * LSH_ROWS
+
+_SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}Q"
+_SIGNATURE_BYTES = struct.calcsize(_SIGNATURE_FORMAT)
+
+REBUILD_BATCH_SIZE = 1000
+
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def shingles(title):
+    """
+    Shingles del item: palabras normalizadas (con stemming y sin palabras
+    vacías) del título más los pares de palabras consecutivas, que distinguen
+    títulos con el mismo vocabulario. La descripción no se usa: cada fuente
+    redacta la suya y solo agrega ruido entre fuentes.
+    """
+    tokens = tokenize(title or "")
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+def minhash(tokens):
+    """
+    Firma MinHash: el mínimo de cada una de las NUM_PERMUTATIONS funciones
+    de hash sobre los shingles. Las funciones salen de un único SHAKE-128 por
+    shingle (64 valores de 64 bits), así que las firmas guardadas siguen
+    siendo comparables entre ejecuciones.
+    """
+    if not tokens:
+        return None
+    hashes = [
+        struct.unpack(_SIGNATURE_FORMAT, hashlib.shake_128(token.encode("utf-8")).digest(_SIGNATURE_BYTES))
+        for token in tokens
+    ]
+    return list(map(min, zip(*hashes)))
+
+
+def similarity(signature, other):
+    """Jaccard estimado: fracción de permutaciones con el mismo mínimo."""
+    return sum(map(operator.eq, signature, other)) / NUM_PERMUTATIONS
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return list(struct.unpack(_SIGNATURE_FORMAT, data))
+
+
+def band_buckets(signature):
+    """(banda, bucket) de la firma: hash de 64 bits con signo de cada grupo de LSH_ROWS valores."""
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<{LSH_ROWS}Q", *rows), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+def _close_in_time(date, other):
+    if date is None or other is None:
+        return True
+    return abs(date - other) <= timedelta(days=NEAR_DUPLICATE_WINDOW_DAYS)
+
+
+def source_host(source_url):
+    """Fuente del item: el host de su URL (sin www.)."""
+    host = urlsplit(source_url or "").netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def document_numbers(title):
+    """Números del título (N° de resolución, alerta, proyecto, año...)."""
+    return frozenset(_NUMBER_RE.findall(title or ""))
+
+
+def _compatible(item, representative):
+    """
+    Reglas que la similitud sola no ve: dos items de la misma fuente no son
+    duplicados entre fuentes (las series de resoluciones o alertas numeradas
+    comparten casi todo el título), y si ambos títulos citan números, los de
+    uno deben estar incluidos en los del otro (RM 858-2024 no es RM 859-2024).
+    """
+    _, title, source_url, date = item
+    _, other_title, other_source_url, other_date = representative
+    if not _close_in_time(date, other_date):
+        return False
+    host = source_host(source_url)
+    if host and host == source_host(other_source_url):
+        return False
+    numbers, other_numbers = document_numbers(title), document_numbers(other_title)
+    return not numbers or not other_numbers or numbers <= other_numbers or other_numbers <= numbers
+
+
+def _open_buckets(buckets, candidates_by_bucket, full_buckets):
+    """Buckets que no están llenos: los llenos no aportan candidatos ni reciben items."""
+    return [
+        bucket for bucket in buckets
+        if bucket not in full_buckets and len(candidates_by_bucket.get(bucket, ())) < NEAR_DUPLICATE_MAX_BUCKET
+    ]
+
+
+def _top_clusters(item_id, buckets, candidates_by_bucket, cluster_of):
+    """Clusters candidatos que más buckets comparten con el item, como máximo NEAR_DUPLICATE_MAX_CANDIDATES."""
+    votes = Counter(
+        cluster_of[candidate_id]
+        for bucket in buckets
+        for candidate_id in candidates_by_bucket.get(bucket, ())
+        if candidate_id in cluster_of
+    )
+    votes.pop(item_id, None)
+    return [cluster_id for cluster_id, _ in votes.most_common(NEAR_DUPLICATE_MAX_CANDIDATES)]
+
+
+def _load_representatives(db: Session, cluster_ids, representatives):
+    """
+    Agrega a `representatives` la firma, título, URL y fecha del primer item
+    de cada cluster; None si no tiene firma, para no volver a buscarlo.
+    """
+    cluster_ids = list(cluster_ids)
+    representatives.update(dict.fromkeys(cluster_ids))
+    for start in range(0, len(cluster_ids), REBUILD_BATCH_SIZE):
+        rows = db.execute(
+            select(models.ItemSignature.item_id, models.ItemSignature.signature, models.Item.title,
+                   models.Item.source_url, models.Item.presentation_date)
+            .join(models.Item, models.Item.id == models.ItemSignature.item_id)
+            .where(models.ItemSignature.item_id.in_(cluster_ids[start:start + REBUILD_BATCH_SIZE]))
+        )
+        for representative_id, data, title, source_url, presentation_date in rows:
+            representatives[representative_id] = (unpack_signature(data), title, source_url, presentation_date)
+
+
+def assign_clusters(db: Session, items):
+    """
+    Agrupa items recién insertados con sus casi duplicados de otras fuentes.
+
+    items: lista de (item_id, título, source_url, presentation_date). Los
+    candidatos se buscan por índice en la tabla LSH (banda, bucket), así que
+    el costo no crece con el tamaño de la tabla. Cada item se compara solo con
+    el representante de cada cluster candidato (su primer item, cuyo id
+    identifica al cluster), así un cluster no se extiende en cadena a través
+    de sus miembros; se confirma con la similitud estimada de las firmas, las
+    reglas de _compatible y la cercanía de las fechas. El item queda en el
+    cluster más parecido o inicia el suyo. No hace commit.
+
+    El costo por item está acotado: los buckets con NEAR_DUPLICATE_MAX_BUCKET
+    items se ignoran (y no crecen más) y solo se puntúan los
+    NEAR_DUPLICATE_MAX_CANDIDATES clusters que comparten más buckets con el item.
+    """
+    prepared = []
+    # Los items sin palabras indexables en el título forman su propio cluster
+    cluster_updates = []
+    for item_id, title, source_url, presentation_date in items:
+        signature = minhash(shingles(title))
+        if signature is not None:
+            features = (signature, title, source_url, presentation_date)
+            prepared.append((item_id, features, band_buckets(signature)))
+        else:
+            cluster_updates.append({"item_id": item_id, "cluster": item_id})
+    if not prepared:
+        _save_clusters(db, cluster_updates)
+        return 0
+
+    # Buckets llenos (se cuentan en la base, sin traer sus items) y candidatos
+    # ya guardados de los demás con su cluster. Se consulta banda por banda:
+    # con "band = ? AND bucket IN (...)" SQLite busca por la clave primaria,
+    # mientras que "(band, bucket) IN (...)" recorre la tabla completa.
+    bucket_table = models.ItemLshBucket
+    buckets_by_band = {}
+    for _, _, buckets in prepared:
+        for band, bucket in buckets:
+            buckets_by_band.setdefault(band, set()).add(bucket)
+    full_buckets = set()
+    candidates_by_bucket = {}
+    cluster_of = {}
+    for band, values in buckets_by_band.items():
+        values = list(values)
+        for start in range(0, len(values), REBUILD_BATCH_SIZE):
+            chunk = values[start:start + REBUILD_BATCH_SIZE]
+            full = {bucket for bucket, in db.execute(
+                select(bucket_table.bucket)
+                .where(bucket_table.band == band, bucket_table.bucket.in_(chunk))
+                .group_by(bucket_table.bucket)
+                .having(func.count() >= NEAR_DUPLICATE_MAX_BUCKET)
+            )}
+            full_buckets |= {(band, bucket) for bucket in full}
+            open_chunk = [bucket for bucket in chunk if bucket not in full]
+            if not open_chunk:
+                continue
+            rows = db.execute(
+                select(bucket_table.bucket, bucket_table.item_id,
+                       func.coalesce(models.Item.cluster_id, models.Item.id))
+                .join(models.Item, models.Item.id == bucket_table.item_id)
+                .where(bucket_table.band == band, bucket_table.bucket.in_(open_chunk))
+            )
+            for bucket, candidate_id, cluster_id in rows:
+                candidates_by_bucket.setdefault((band, bucket), set()).add(candidate_id)
+                cluster_of[candidate_id] = cluster_id
+
+    # Solo se cargan los representantes que algún item del lote va a puntuar
+    representatives = {}
+    _load_representatives(db, {
+        cluster_id
+        for item_id, _, buckets in prepared
+        for cluster_id in _top_clusters(item_id, _open_buckets(buckets, candidates_by_bucket, full_buckets),
+                                        candidates_by_bucket, cluster_of)
+    }, representatives)
+
+    clustered = 0
+    signature_rows, bucket_rows = [], []
+    for item_id, features, buckets in prepared:
+        signature = features[0]
+        buckets = _open_buckets(buckets, candidates_by_bucket, full_buckets)
+        top = _top_clusters(item_id, buckets, candidates_by_bucket, cluster_of)
+        # Clusters ya guardados que solo aparecen por items anteriores del lote
+        _load_representatives(db, [cluster_id for cluster_id in top if cluster_id not in representatives],
+                              representatives)
+        best = None
+        for cluster_id in top:
+            representative = representatives.get(cluster_id)
+            if representative is None:
+                continue
+            score = similarity(signature, representative[0])
+            if (score >= NEAR_DUPLICATE_THRESHOLD and (best is None or score > best[0])
+                    and _compatible(features, representative)):
+                best = (score, cluster_id)
+        cluster_id = best[1] if best else item_id
+        if best:
+            clustered += 1
+        cluster_updates.append({"item_id": item_id, "cluster": cluster_id})
+        signature_rows.append({"item_id": item_id, "signature": pack_signature(signature)})
+        bucket_rows.extend({"band": band, "bucket": bucket, "item_id": item_id} for band, bucket in buckets)
+        # Los items siguientes del mismo lote también pueden agruparse con este
+        cluster_of[item_id] = cluster_id
+        if cluster_id == item_id:
+            representatives[item_id] = features
+        for bucket in buckets:
+            candidates_by_bucket.setdefault(bucket, set()).add(item_id)
+
+    # INSERT sobre las tablas (sin el ORM): son muchas filas pequeñas por item
+    db.execute(insert_ignoring_conflicts(db, models.ItemSignature.__table__), signature_rows)
+    db.execute(insert_ignoring_conflicts(db, models.ItemLshBucket.__table__), bucket_rows)
+    _save_clusters(db, cluster_updates)
+    return clustered
+
+
+def _save_clusters(db: Session, cluster_updates):
+    # UPDATE masivo por clave primaria, sin tocar updated_at (el item no cambió)
+    if not cluster_updates:
+        return
+    items_table = models.Item.__table__
+    db.execute(
+        update(items_table)
+        .where(items_table.c.id == bindparam("item_id"))
+        .values(cluster_id=bindparam("cluster"), updated_at=items_table.c.updated_at),
+        cluster_updates
+    )
+
+
+def cluster_pending_items(db: Session):
+    """
+    Asigna cluster a los items que todavía no tienen (la ingesta los deja
+    pendientes para no alargar su transacción), en orden de id y por lotes
+    de REBUILD_BATCH_SIZE confirmados uno a uno. Se ejecuta al terminar cada
+    run de scraping o backfill. Devuelve los items agrupados con un casi duplicado.
+    """
+    last_id = 0
+    total = 0
+    while True:
+        rows = db.query(
+            models.Item.id, models.Item.title, models.Item.source_url, models.Item.presentation_date
+        ).filter(
+            models.Item.cluster_id.is_(None),
+            models.Item.id > last_id
+        ).order_by(models.Item.id).limit(REBUILD_BATCH_SIZE).all()
+        if not rows:
+            break
+        total += assign_clusters(db, [tuple(row) for row in rows])
+        db.commit()
+        last_id = rows[-1][0]
+    return total
+
+
+def rebuild_near_duplicates(db: Session):
+    """Recalcula firmas, índice LSH y clusters de todos los items, en orden de id."""
+    db.query(models.ItemLshBucket).delete(synchronize_session=False)
+    db.query(models.ItemSignature).delete(synchronize_session=False)
+    db.query(models.Item).update({"cluster_id": None}, synchronize_session=False)
+    db.commit()
+    return cluster_pending_items(db)
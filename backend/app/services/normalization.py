@@ -0,0 +1,47 @@
+import hashlib
+import re
+import unicodedata
+from urllib.parse import urlsplit, urlunsplit
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+def normalize_text(text):
+    """Minúsculas, sin tildes y con espacios colapsados."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return _WHITESPACE_RE.sub(" ", text).strip().lower()
+
+
+def normalize_url(url):
+    """
+    Normaliza una URL para la deduplicación: sin espacios, esquema y host en
+    minúsculas y sin el puerto por defecto. El fragmento se conserva porque
+    algunos portales (p. ej. spley-portal) enrutan con `#`.
+    """
+    if not url:
+        return None
+    url = url.strip()
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc.endswith(":" + _DEFAULT_PORTS.get(scheme, "")):
+        netloc = netloc.rsplit(":", 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, parts.fragment))
+
+
+def item_fingerprint(title, presentation_date, source_type, normalized_title=None):
+    """
+    Hash SHA-256 del título, la fecha (día) y el tipo de fuente normalizados.
+    `normalized_title` evita volver a normalizar un título ya normalizado.
+    """
+    day = presentation_date.date().isoformat() if presentation_date else ""
+    if normalized_title is None:
+        normalized_title = normalize_text(title)
+    key = "\x1f".join((normalized_title, day, normalize_text(source_type)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
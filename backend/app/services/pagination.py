@@ -0,0 +1,65 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from ..models import models
+
+# Orden del listado: los items sin fecha (solo registros antiguos, la ingesta
+# los rechaza) van al final en SQLite y en PostgreSQL
+LISTING_ORDER = (models.Item.presentation_date.desc().nulls_last(), models.Item.id.desc())
+
+# SQLite sirve ese orden con ix_items_presentation_date_id; en PostgreSQL el
+# recorrido descendente de ese índice deja los NULL primero (ver migrate_db.py)
+POSTGRES_LISTING_INDEX_DDL = """CREATE INDEX IF NOT EXISTS ix_items_presentation_date_nulls_last
+    ON items (presentation_date DESC NULLS LAST, id DESC)"""
+
+
+def encode_cursor(item):
+    """Cursor opaco con la posición (presentation_date, id) del último item de la página."""
+    date = item.presentation_date
+    payload = json.dumps({
+        "d": date.isoformat() if date is not None else None,
+        "i": item.id
+    }, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """
+    Devuelve (presentation_date, id), con presentation_date None si el cursor
+    ya está en los items sin fecha; lanza ValueError si el cursor no es válido.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        date = payload["d"]
+        return (datetime.fromisoformat(date) if date is not None else None), int(payload["i"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+def cursor_page(query, cursor, limit):
+    """
+    Página de `limit` items posteriores al cursor (vacío: la primera) en el
+    orden LISTING_ORDER. Los items con fecha y los sin fecha se leen como dos
+    rangos del índice (presentation_date, id): cuando los primeros no llenan
+    la página se completa con los sin fecha. Así el costo no depende de qué
+    tan profunda sea la página.
+    """
+    presentation_date, item_id = decode_cursor(cursor) if cursor else (None, None)
+    items = []
+    if not cursor or presentation_date is not None:
+        dated = query.filter(models.Item.presentation_date.isnot(None))
+        if cursor:
+            dated = dated.filter(
+                tuple_(models.Item.presentation_date, models.Item.id) < tuple_(presentation_date, item_id)
+            )
+        items = dated.order_by(*LISTING_ORDER).limit(limit).all()
+    if len(items) < limit:
+        undated = query.filter(models.Item.presentation_date.is_(None))
+        if cursor and presentation_date is None:
+            undated = undated.filter(models.Item.id < item_id)
+        items += undated.order_by(models.Item.id.desc()).limit(limit - len(items)).all()
+    return items
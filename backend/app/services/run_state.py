@@ -0,0 +1,185 @@
+import json
+import os
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models import models
+
+# Estado de los runs de scraping compartido entre workers (configurable por entorno):
+# segundos sin heartbeat para dar por muerto un run y cantidad de runs que se conservan
+SCRAPING_RUN_STALE = int(os.getenv("SCRAPING_RUN_STALE", "300"))
+SCRAPING_RUN_HISTORY = int(os.getenv("SCRAPING_RUN_HISTORY", "50"))
+
+# Los eventos se insertan de a uno para que sus ids se confirmen en orden y los
+# workers que leen "eventos con id > último" no se salteen ninguno
+_event_lock = threading.Lock()
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@contextmanager
+def session_scope():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def expire_stale_runs(db: Session):
+    """Marca como interrumpidos los runs cuyo worker dejó de enviar heartbeats."""
+    now = datetime.utcnow()
+    expired = db.query(models.ScrapingRun).filter(
+        models.ScrapingRun.status == "running",
+        models.ScrapingRun.heartbeat_at < now - timedelta(seconds=SCRAPING_RUN_STALE)
+    ).update({"status": "interrupted", "finished_at": now}, synchronize_session=False)
+    db.commit()
+    if expired:
+        print(f"Runs de scraping interrumpidos (sin heartbeat): {expired}")
+
+
+def start_run(db: Session, total_sources, trigger):
+    """
+    Toma el lock de ejecución creando un run en estado "running". El índice
+    único parcial sobre status garantiza que haya uno solo entre todos los
+    workers. Devuelve el id del run, o None si ya hay otro en ejecución.
+    """
+    expire_stale_runs(db)
+    run = models.ScrapingRun(
+        status="running",
+        trigger=trigger,
+        total_sources=total_sources,
+        worker=worker_id()
+    )
+    db.add(run)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    _prune_runs(db, run.id)
+    return run.id
+
+
+def _prune_runs(db: Session, run_id):
+    cutoff = run_id - SCRAPING_RUN_HISTORY
+    if cutoff <= 0:
+        return
+    db.query(models.ScrapingEvent).filter(models.ScrapingEvent.run_id <= cutoff).delete(synchronize_session=False)
+    db.query(models.ScrapingRun).filter(models.ScrapingRun.id <= cutoff).delete(synchronize_session=False)
+    db.commit()
+
+
+def heartbeat(db: Session, run_id):
+    """Renueva el heartbeat del run. Devuelve False si el run ya no está en ejecución."""
+    updated = db.query(models.ScrapingRun).filter(
+        models.ScrapingRun.id == run_id,
+        models.ScrapingRun.status == "running"
+    ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
+
+def finish_run(db: Session, run_id, status="finished"):
+    """Libera el lock de ejecución."""
+    db.query(models.ScrapingRun).filter(
+        models.ScrapingRun.id == run_id,
+        models.ScrapingRun.status == "running"
+    ).update({"status": status, "finished_at": datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+
+def record_event(db: Session, run_id, event, data):
+    """Guarda un evento del run y devuelve (id, evento, datos JSON)."""
+    payload = json.dumps(data, default=str)
+    with _event_lock:
+        row = models.ScrapingEvent(run_id=run_id, event=event, data=payload)
+        db.add(row)
+        db.query(models.ScrapingRun).filter(models.ScrapingRun.id == run_id).update(
+            {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+        )
+        db.commit()
+        return row.id, event, payload
+
+
+def last_event_id(db: Session):
+    return db.query(func.max(models.ScrapingEvent.id)).scalar() or 0
+
+
+def events_since(db: Session, after_id, limit=500):
+    rows = db.query(
+        models.ScrapingEvent.id, models.ScrapingEvent.event, models.ScrapingEvent.data
+    ).filter(models.ScrapingEvent.id > after_id).order_by(models.ScrapingEvent.id).limit(limit).all()
+    return [tuple(row) for row in rows]
+
+
+def snapshot(db: Session):
+    """
+    Estado del último run reconstruido desde sus eventos. Devuelve también el
+    id del último evento incluido, para que el stream SSE continúe desde ahí.
+    """
+    event_id = last_event_id(db)
+    run = db.query(models.ScrapingRun).order_by(models.ScrapingRun.id.desc()).first()
+    state = {
+        "run_id": None,
+        "is_running": False,
+        "total_sources": 0,
+        "completed_sources": 0,
+        "running_sources": [],
+        "results": []
+    }
+    if run is None:
+        return event_id, state
+
+    running, results = [], []
+    events = db.query(models.ScrapingEvent.event, models.ScrapingEvent.data).filter(
+        models.ScrapingEvent.run_id == run.id,
+        models.ScrapingEvent.id <= event_id,
+        models.ScrapingEvent.event.in_(["source_started", "source_finished"])
+    ).order_by(models.ScrapingEvent.id).all()
+    for event, payload in events:
+        data = json.loads(payload)
+        if event == "source_started":
+            running.append(data["source"])
+        else:
+            if data["source"] in running:
+                running.remove(data["source"])
+            results.append(data["result"])
+
+    stale_limit = datetime.utcnow() - timedelta(seconds=SCRAPING_RUN_STALE)
+    is_running = run.status == "running" and run.heartbeat_at >= stale_limit
+    state.update({
+        "run_id": run.id,
+        "is_running": is_running,
+        "total_sources": run.total_sources,
+        "completed_sources": len(results),
+        "running_sources": running if is_running else [],
+        "results": results
+    })
+    return event_id, state
+
+
+# Variantes con sesión propia para el stream SSE y el poller del bus de estado
+
+def fetch_snapshot():
+    with session_scope() as db:
+        return snapshot(db)
+
+
+def fetch_events(after_id):
+    with session_scope() as db:
+        return events_since(db, after_id)
+
+
+def fetch_last_event_id():
+    with session_scope() as db:
+        return last_event_id(db)
@@ -0,0 +1,177 @@
+import re
+
+from sqlalchemy import bindparam, false, func, inspect, literal_column, select, table, column, text
+from sqlalchemy.orm import Session
+
+from ..models import models
+from .normalization import normalize_text
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Palabras vacías que no aportan a la búsqueda
+STOPWORDS = frozenset("""
+a al ante bajo con contra de del desde e el en entre es hacia hasta la las le les lo los
+mas o para pero por que se segun sin sobre su sus tras u un una unas uno unos y ya
+""".split())
+
+# Tabla FTS5 de contenido externo sobre items.search_text (solo SQLite)
+items_fts = table("items_fts", column("rowid"), column("rank"))
+
+SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        search_text, content='items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF search_text ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO items_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+]
+
+# Índice GIN sobre el tsvector de search_text (solo PostgreSQL)
+POSTGRES_SEARCH_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_items_search_text_fts ON items
+        USING gin (to_tsvector('simple', coalesce(search_text, '')))""",
+]
+
+
+def spanish_stem(word):
+    """
+    Stemming liviano para español: quita plurales y la vocal final de género,
+    de modo que "vacunas", "vacuna" y "vacunación" comparten el prefijo "vacun".
+    Las palabras ya vienen en minúsculas y sin tildes.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("ces") and len(word) > 4:
+        word = word[:-3] + "z"
+    elif word.endswith(("os", "as", "es")) and len(word) > 4:
+        word = word[:-2]
+    elif word.endswith("s"):
+        word = word[:-1]
+    if word.endswith(("o", "a", "e")) and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(value):
+    """Tokens normalizados (sin tildes ni palabras vacías) y con stemming."""
+    return normalized_tokens(normalize_text(value))
+
+
+def normalized_tokens(text):
+    """Como `tokenize`, para un texto ya pasado por normalize_text."""
+    return [spanish_stem(token) for token in _TOKEN_RE.findall(text) if token not in STOPWORDS]
+
+
+def search_document(title, description):
+    """Texto indexado para un item: título y descripción normalizados."""
+    return " ".join(tokenize(f"{title or ''} {description or ''}"))
+
+
+def _sqlite_match(terms_groups):
+    # Cada grupo es un AND de prefijos; los grupos se combinan con OR
+    groups = [
+        "(" + " AND ".join(f'"{term}"*' for term in terms) + ")"
+        for terms in terms_groups
+    ]
+    return " OR ".join(groups)
+
+
+def _postgres_tsquery(terms_groups):
+    groups = [
+        "(" + " & ".join(f"{term}:*" for term in terms) + ")"
+        for terms in terms_groups
+    ]
+    return " | ".join(groups)
+
+
+def _postgres_vector(entity=models.Item):
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(entity.search_text, literal_column("''"))
+    )
+
+
+def search_criterion(db: Session, phrases, entity=models.Item):
+    """
+    Condición de búsqueda de `apply_search` (sin ranking) sobre `entity`, que
+    puede ser un alias de Item para usarla en una subconsulta.
+    """
+    terms_groups = [terms for terms in (tokenize(phrase) for phrase in phrases) if terms]
+    if not terms_groups:
+        return false()
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = func.to_tsquery(literal_column("'simple'"), bindparam(None, _postgres_tsquery(terms_groups)))
+        return _postgres_vector(entity).op("@@")(tsquery)
+    match = literal_column("items_fts").op("MATCH")(bindparam(None, _sqlite_match(terms_groups)))
+    return entity.id.in_(select(items_fts.c.rowid).where(match))
+
+
+def apply_search(query, db: Session, phrases, rank=False):
+    """
+    Filtra la consulta de items con el índice de texto completo.
+
+    `phrases` es una lista de textos combinados con OR; dentro de cada texto
+    todas las palabras deben aparecer (como prefijo, tras el stemming). Con
+    `rank=True` los resultados se ordenan por relevancia. Un texto sin
+    palabras indexables (solo palabras vacías o signos) no coincide con nada.
+    """
+    if not rank:
+        return query.filter(search_criterion(db, phrases))
+    terms_groups = [terms for terms in (tokenize(phrase) for phrase in phrases) if terms]
+    if not terms_groups:
+        return query.filter(false())
+
+    if db.get_bind().dialect.name == "postgresql":
+        tsquery = func.to_tsquery(literal_column("'simple'"), bindparam(None, _postgres_tsquery(terms_groups)))
+        vector = _postgres_vector()
+        return query.filter(vector.op("@@")(tsquery)).order_by(func.ts_rank(vector, tsquery).desc())
+
+    match = literal_column("items_fts").op("MATCH")(bindparam(None, _sqlite_match(terms_groups)))
+    matches = select(
+        items_fts.c.rowid.label("item_id"),
+        items_fts.c.rank.label("rank")
+    ).where(match).subquery()
+    return query.join(matches, matches.c.item_id == models.Item.id).order_by(matches.c.rank)
+
+
+def search_index_exists(engine):
+    """Indica si el índice de texto completo ya fue creado."""
+    inspector = inspect(engine)
+    if engine.dialect.name == "postgresql":
+        return any(ix["name"] == "ix_items_search_text_fts" for ix in inspector.get_indexes("items"))
+    return "items_fts" in inspector.get_table_names()
+
+
+def ensure_search_index(engine):
+    """
+    Crea el índice de texto completo si no existe. Requiere la columna
+    items.search_text (ver migrate_db.py).
+    """
+    columns = [c["name"] for c in inspect(engine).get_columns("items")]
+    if "search_text" not in columns:
+        print("Falta la columna items.search_text; ejecute migrate_db.py para crear el índice de búsqueda")
+        return False
+    statements = POSTGRES_SEARCH_DDL if engine.dialect.name == "postgresql" else SQLITE_SEARCH_DDL
+    try:
+        with engine.begin() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+    except Exception as e:
+        print(f"Error creando el índice de búsqueda: {str(e)}")
+        return False
+    return True
+
+
+def rebuild_search_index(engine):
+    """Reconstruye el índice FTS5 a partir de items (en PostgreSQL el índice GIN se mantiene solo)."""
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO items_fts(items_fts) VALUES ('rebuild')"))
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+
+from ..scrapers.executor import run_in_thread
+
+# Eventos que se conservan para retomar conexiones, segundos sin cambios antes
+# de un heartbeat y cada cuántos segundos se leen los eventos compartidos
+SCRAPING_STATUS_HISTORY = int(os.getenv("SCRAPING_STATUS_HISTORY", "500"))
+SCRAPING_STATUS_HEARTBEAT = float(os.getenv("SCRAPING_STATUS_HEARTBEAT", "15"))
+SCRAPING_STATUS_POLL = float(os.getenv("SCRAPING_STATUS_POLL", "1"))
+
+HEARTBEAT = ": heartbeat\n\n"
+
+
+def format_message(event_id, event, payload):
+    """Mensaje SSE con id, para que el navegador envíe Last-Event-ID al reconectarse."""
+    return f"id: {event_id}\nevent: {event}\ndata: {payload}\n\n"
+
+
+def format_event(event_id, event, data):
+    return format_message(event_id, event, json.dumps(data, default=str))
+
+
+def parse_last_event_id(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class StatusBus:
+    """
+    Bus de eventos del estado de scraping de un worker. Los eventos se guardan
+    en la base de datos (ver services/run_state.py), así que todos los workers
+    ven los mismos y con los mismos ids; cada worker los lee con un único
+    poller (`follow`) y los reparte a sus suscriptores, que solo se despiertan
+    cuando hay eventos nuevos. Un historial acotado permite retomar la conexión
+    desde Last-Event-ID; si el id ya no está en el historial se envía un
+    snapshot completo.
+    """
+
+    def __init__(self, history_size=SCRAPING_STATUS_HISTORY):
+        self._history = deque(maxlen=history_size)
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self._waiters = set()
+
+    def extend(self, events):
+        """
+        Agrega eventos (id, evento, datos JSON) ya guardados, ignorando los que
+        ya se conocen; se puede llamar desde cualquier hilo.
+        """
+        with self._lock:
+            added = False
+            for event_id, event, payload in events:
+                if event_id <= self._last_id:
+                    continue
+                self._last_id = event_id
+                self._history.append((event_id, format_message(event_id, event, payload)))
+                added = True
+            if not added:
+                return
+            waiters, self._waiters = self._waiters, set()
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+    async def follow(self, fetch_events, fetch_last_event_id, interval=SCRAPING_STATUS_POLL):
+        """
+        Lee periódicamente los eventos nuevos de todos los workers. Se ejecuta
+        como tarea del lifespan de la aplicación.
+        """
+        # Al arrancar solo interesan los eventos nuevos
+        start_id = await run_in_thread(fetch_last_event_id)
+        with self._lock:
+            self._last_id = max(self._last_id, start_id)
+        while True:
+            try:
+                events = await run_in_thread(fetch_events, self._last_id)
+                self.extend(events)
+                if events:
+                    continue
+            except Exception as e:
+                print(f"Error leyendo eventos de scraping: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def _pending(self, last_id):
+        # Debe llamarse con el lock tomado; None indica que hace falta un snapshot
+        oldest_id = self._history[0][0] if self._history else self._last_id + 1
+        if last_id < oldest_id - 1:
+            return None
+        return [(event_id, message) for event_id, message in self._history if event_id > last_id]
+
+    async def subscribe(self, snapshot, last_event_id=None, heartbeat=SCRAPING_STATUS_HEARTBEAT):
+        """
+        Genera los mensajes SSE para un cliente: un snapshot (o los eventos
+        perdidos desde `last_event_id`) y luego cada evento nuevo. `snapshot`
+        es una función asíncrona que devuelve (id del último evento incluido,
+        estado). Mientras no hay cambios solo se envía un heartbeat cada
+        `heartbeat` segundos.
+        """
+        loop = asyncio.get_running_loop()
+        last_id = last_event_id
+        # Un id posterior al último conocido (por ejemplo, de antes de reiniciar la base) no sirve
+        if last_id is not None and last_id > self._last_id:
+            last_id = None
+        while True:
+            waiter = None
+            if last_id is not None:
+                with self._lock:
+                    messages = self._pending(last_id)
+                    if messages == []:
+                        waiter = (loop, loop.create_future())
+                        self._waiters.add(waiter)
+            if last_id is None or messages is None:
+                last_id, state = await snapshot()
+                yield format_event(last_id, "snapshot", state)
+                continue
+
+            if messages:
+                for event_id, message in messages:
+                    yield message
+                last_id = messages[-1][0]
+                continue
+
+            try:
+                await asyncio.wait_for(waiter[1], heartbeat)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+            finally:
+                with self._lock:
+                    self._waiters.discard(waiter)
+
+
+status_bus = StatusBus()
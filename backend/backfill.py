@@ -0,0 +1,83 @@
+"""
+Backfill histórico: recorre el archivo paginado de cada fuente e ingiere todos
+sus items, para reconstruir el historial después de una caída o al agregar
+una fuente. El avance se guarda por fuente y una nueva ejecución lo retoma.
+
+Uso:
+    python backfill.py                                  # todas las fuentes activas
+    python backfill.py --source Congreso_PE --source anamed_cl
+    python backfill.py --since 2024-01-01 --max-pages 50
+    python backfill.py --restart                        # ignora los checkpoints
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from app.database import Base, SessionLocal, engine
+from app.models import models
+from app.scrapers import executor, registry
+from app.scrapers.backfill import (
+    BACKFILL_MAX_PAGES,
+    BACKFILL_PAGE_CONCURRENCY,
+    BACKFILL_SOURCE_CONCURRENCY,
+    backfill,
+)
+from app.scrapers.http_client import ScrapingClient
+
+
+def select_jobs(names):
+    db = SessionLocal()
+    try:
+        jobs = registry.sources_to_scrape(db, force=True)
+    finally:
+        db.close()
+    if names:
+        jobs = [job for job in jobs if job.name in names or job.scraper_type in names]
+    return jobs
+
+
+def print_report(results):
+    print("\nResultado del backfill")
+    print(f"  {'Fuente':28} {'Estado':18} {'Páginas':>8} {'Items':>8} {'Nuevos':>8} {'Tiempo':>9} {'Items/s':>8}")
+    for stats in results:
+        rate = stats["items"] / stats["elapsed"] if stats["elapsed"] else 0
+        print(f"  {stats['source']:28} {stats['status']:18} {stats['pages']:8} {stats['items']:8} "
+              f"{stats['inserted']:8} {stats['elapsed']:8.1f}s {rate:8.1f}")
+
+
+async def main(options):
+    # La tabla de checkpoints se crea si la base es anterior al backfill
+    Base.metadata.create_all(bind=engine)
+    jobs = select_jobs(options.source)
+    if not jobs:
+        print("No hay fuentes activas que coincidan")
+        return
+    since = datetime.strptime(options.since, "%Y-%m-%d") if options.since else None
+    print(f"Backfill de {len(jobs)} fuentes")
+    try:
+        async with ScrapingClient() as client:
+            results = await backfill(
+                jobs,
+                client,
+                source_concurrency=options.source_concurrency,
+                page_concurrency=options.page_concurrency,
+                max_pages=options.max_pages,
+                since=since,
+                restart=options.restart
+            )
+    finally:
+        executor.shutdown()
+    print_report(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill histórico de las fuentes")
+    parser.add_argument("--source", action="append", help="nombre o scraper_type de la fuente (repetible)")
+    parser.add_argument("--since", help="no ingerir items anteriores a esta fecha (AAAA-MM-DD)")
+    parser.add_argument("--max-pages", type=int, default=BACKFILL_MAX_PAGES, help="páginas máximas por fuente")
+    parser.add_argument("--page-concurrency", type=int, default=BACKFILL_PAGE_CONCURRENCY,
+                        help="páginas de una fuente descargadas a la vez")
+    parser.add_argument("--source-concurrency", type=int, default=BACKFILL_SOURCE_CONCURRENCY,
+                        help="fuentes procesadas en paralelo")
+    parser.add_argument("--restart", action="store_true", help="empezar desde la primera página")
+    asyncio.run(main(parser.parse_args()))
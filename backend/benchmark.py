@@ -0,0 +1,345 @@
+"""
+Benchmark del camino scraping -> parseo -> ingesta y de la latencia de la API,
+sin red. Los resultados se guardan en JSON y se pueden comparar con una
+ejecución anterior guardada como referencia.
+
+Mide:
+  - parse:  tiempo y pico de memoria de cada función de parseo sobre las
+            páginas grabadas (replay_fixtures/ de replay_scrapers.py). Sin
+            grabaciones usa las páginas sintéticas de las pruebas, mucho más
+            chicas que las reales: el resultado queda marcado con
+            "_pages": "synthetic", es solo una prueba de humo y no se compara
+            con la referencia
+  - ingest: items/s de save_items_to_db con 1k/10k/100k items sintéticos
+            (primera ingesta y reingesta del mismo lote), sobre bases vacías,
+            y el tiempo del paso de casi duplicados que sigue a cada run
+  - api:    p50/p99 de GET /api/items con distintas combinaciones de filtros
+
+Uso:
+    python benchmark.py                                  # todo, resultados en benchmark_results.json
+    python benchmark.py --suite ingest --ingest-sizes 1000 10000
+    python benchmark.py --suite api --api-items 1000000
+    python benchmark.py --ingest-sizes 1000 10000 --api-items 20000 --api-requests 100 --runs 3 \
+        --baseline benchmark_baseline.json --tolerance 0.3
+
+La base de la suite api es SQLALCHEMY_DATABASE_URL (por defecto una SQLite
+temporal); si ya tiene items, se usan sin generar nuevos. Para medir con
+millones de items conviene generarla antes con generate_dataset.py. Con
+--baseline el proceso termina con código 1 si alguna métrica empeora más
+que --tolerance.
+
+Las latencias de pocos milisegundos varían bastante entre ejecuciones; con
+--runs N se guarda la mediana de N ejecuciones de cada suite. Entre dos
+ejecuciones del mismo código en una máquina compartida las medianas varían
+hasta ~20%.
+
+La referencia incluida en el repositorio, benchmark_baseline.json, tiene solo
+las suites ingest y api (no había grabaciones reales para parse). La suite
+api se midió sobre una base SQLite generada con generate_dataset.py (de 2
+millones de items sintéticos quedan 1.991.533 tras la deduplicación; con
+--api-items igual a esa cantidad no se generan más). Las opciones quedan en
+su campo meta:
+
+    SQLALCHEMY_DATABASE_URL=sqlite:////tmp/bench/db.sqlite \
+        python generate_dataset.py --items 2000000 --users 10 --clusters
+    SQLALCHEMY_DATABASE_URL=sqlite:////tmp/bench/db.sqlite \
+        python benchmark.py --suite ingest api --api-items 1991533 --api-requests 50 \
+        --output benchmark_baseline.json
+
+Los tiempos dependen de la máquina: conviene regenerarla donde se compara
+antes de medir un cambio.
+"""
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+os.environ.setdefault(
+    "SQLALCHEMY_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="benchmark_"), "benchmark.db")
+)
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from sqlalchemy import create_engine, func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.api import items as items_api  # noqa: E402
+from app.database import SQLALCHEMY_DATABASE_URL, Base, SessionLocal, engine  # noqa: E402
+from app.models import models  # noqa: E402
+from app.scrapers.parsing import HTML_PARSER  # noqa: E402
+from app.services.ingest import save_items_to_db  # noqa: E402
+from app.services.keyword_matching import match_keyword  # noqa: E402
+from app.services.near_duplicates import cluster_pending_items  # noqa: E402
+from app.services.search import ensure_search_index  # noqa: E402
+from benchmark_parsing import PAGES, load_pages, measure  # noqa: E402
+from replay_scrapers import SYNTHETIC_FIXTURES_DIR  # noqa: E402
+from generate_dataset import synthetic_items  # noqa: E402
+
+SUITES = ("parse", "ingest", "api")
+
+# Métricas en las que un valor mayor es mejor; en el resto (tiempos, memoria) es peor
+HIGHER_IS_BETTER = ("items_per_s",)
+
+# Métricas que se muestran en la comparación pero no cuentan como regresión: con
+# unos cientos de peticiones el p99 es una de las pocas más lentas y varía mucho
+INFORMATIVE = ("p99_ms",)
+
+# Combinaciones de filtros de /api/items (el user_id se completa al preparar la base)
+API_SCENARIOS = {
+    "recientes": {},
+    "busqueda": {"search": "medicamentos"},
+    "pais": {"country": "Perú"},
+    "rango_fechas": {"start_date": "2024-01-01", "end_date": "2024-06-30"},
+    "busqueda_pais_fechas": {"search": "salud", "country": "Chile", "start_date": "2023-01-01"},
+    "relevancia": {"search": "alerta sanitaria", "sort": "relevance"},
+    "palabras_clave": {"use_keywords": "true"},
+    "pagina_profunda": {"skip": 5000},
+    "cursor": {"cursor": ""},
+    "conteo_aproximado": {"search": "salud", "count": "approximate"},
+    "sin_duplicados": {"collapse_duplicates": "true"},
+}
+
+BENCHMARK_KEYWORDS = ["vacuna", "dengue", "medicamento", "etiquetado"]
+
+
+@contextlib.contextmanager
+def quiet():
+    # Los scrapers, la ingesta y la API imprimen por cada item
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_parse(options):
+    results = {}
+    try:
+        pages = load_pages()
+    except SystemExit as e:
+        print(f"  {e}\n  Se usan las páginas sintéticas de las pruebas: los tiempos son solo una prueba de humo")
+        pages = load_pages(SYNTHETIC_FIXTURES_DIR)
+        results["_pages"] = "synthetic"
+    for name, module_name, func_name, _, args in PAGES:
+        html = pages[name]
+        parser = getattr(importlib.import_module(module_name), func_name)
+        elapsed, peak, count = measure(parser, html, args, options.repeat)
+        results[name] = {"ms": elapsed * 1000, "peak_mb": peak / 1024 / 1024, "items": count,
+                         "page_kb": len(html) / 1024}
+        print(f"  parse {name:22} {elapsed * 1000:8.1f} ms  {peak / 1024 / 1024:6.1f} MB  {count} items")
+    return results
+
+
+def bench_ingest(options):
+    results = {}
+    for size in options.ingest_sizes:
+        items = synthetic_items(size, seed=size)
+        # Base nueva por tamaño: la ingesta se mide siempre sobre una tabla vacía
+        directory = tempfile.mkdtemp(prefix="benchmark_ingest_")
+        ingest_engine = create_engine(f"sqlite:///{os.path.join(directory, 'ingest.db')}",
+                                      connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=ingest_engine)
+        ensure_search_index(ingest_engine)
+        db = sessionmaker(bind=ingest_engine)()
+        try:
+            with quiet():
+                start = time.perf_counter()
+                save_items_to_db(items, db)
+                first = time.perf_counter() - start
+                start = time.perf_counter()
+                cluster_pending_items(db)
+                clusters = time.perf_counter() - start
+                start = time.perf_counter()
+                save_items_to_db(items, db)
+                again = time.perf_counter() - start
+        finally:
+            db.close()
+            ingest_engine.dispose()
+        results[str(size)] = {
+            "insert_s": first, "insert_items_per_s": size / first,
+            "reingest_s": again, "reingest_items_per_s": size / again,
+            "cluster_s": clusters, "cluster_items_per_s": size / clusters,
+        }
+        print(f"  ingest {size:>8} items: {size / first:9.0f} items/s nuevos, {size / again:9.0f} items/s repetidos, "
+              f"{size / clusters:9.0f} items/s casi duplicados")
+    return results
+
+
+def prepare_api_database(api_items):
+    """Usuario con palabras clave e items sintéticos si la base está vacía; devuelve el user_id."""
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.email == "benchmark@example.com").first()
+        if user is None:
+            user = models.User(email="benchmark@example.com", hashed_password="-")
+            db.add(user)
+            db.commit()
+            for word in BENCHMARK_KEYWORDS:
+                keyword = models.Keyword(word=word, user_id=user.id)
+                db.add(keyword)
+                db.commit()
+                match_keyword(db, keyword)
+            db.commit()
+        existing = db.query(func.count(models.Item.id)).scalar()
+        if existing < api_items:
+            print(f"  api: generando {api_items - existing} items sintéticos")
+            chunk = 10000
+            for start in range(existing, api_items, chunk):
+                with quiet():
+                    save_items_to_db(synthetic_items(min(chunk, api_items - start), seed=start, start=start), db)
+            cluster_pending_items(db)
+        return user.id, db.query(func.count(models.Item.id)).scalar()
+    finally:
+        db.close()
+
+
+async def _api_latencies(params, requests):
+    app = FastAPI()
+    app.include_router(items_api.router, prefix="/api")
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Primera petición sin medir (caché de conteos, planes de consulta)
+        response = await client.get("/api/items", params=params)
+        response.raise_for_status()
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get("/api/items", params=params)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+    return latencies
+
+
+def bench_api(options):
+    user_id, total = prepare_api_database(options.api_items)
+    results = {"_items": total}
+    for name, params in API_SCENARIOS.items():
+        params = dict(params, user_id=user_id) if "use_keywords" in params else params
+        with quiet():
+            latencies = asyncio.run(_api_latencies(params, options.api_requests))
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        results[name] = {"p50_ms": cuts[49] * 1000, "p99_ms": cuts[98] * 1000}
+        print(f"  api {name:22} p50 {cuts[49] * 1000:7.2f} ms  p99 {cuts[98] * 1000:7.2f} ms")
+    return results
+
+
+def flatten(results, prefix=""):
+    metrics = {}
+    for key, value in results.items():
+        if key == "meta":
+            continue
+        if isinstance(value, dict):
+            metrics.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not key.startswith("_") and key != "items":
+            metrics[f"{prefix}{key}"] = value
+    return metrics
+
+
+def compare(results, baseline, tolerance, min_change_ms=0.0):
+    """
+    Imprime la variación de cada métrica respecto de la referencia y devuelve
+    las que empeoraron más de `tolerance`. En las métricas en milisegundos, una
+    diferencia menor que `min_change_ms` no cuenta: en tiempos de 1-2 ms el
+    ruido entre ejecuciones supera fácilmente el 20%.
+    """
+    current, previous = flatten(results), flatten(baseline)
+    regressions = []
+    print(f"\nComparación con la referencia (tolerancia {tolerance:.0%}, mínimo {min_change_ms} ms)")
+    for name in sorted(current.keys() & previous.keys()):
+        if not previous[name]:
+            continue
+        change = (current[name] - previous[name]) / previous[name]
+        worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+        small = name.endswith("ms") and abs(current[name] - previous[name]) < min_change_ms
+        mark = ""
+        if worse > tolerance and name.endswith(INFORMATIVE):
+            mark = "  (informativa)"
+        elif worse > tolerance and not small:
+            mark = "  << regresión"
+            regressions.append(name)
+        print(f"  {name:45} {previous[name]:12.2f} -> {current[name]:12.2f}  {change:+7.1%}{mark}")
+    return regressions
+
+
+def run_options(options):
+    # Opciones que cambian las métricas: dos ejecuciones solo son comparables si coinciden
+    return {"runs": options.runs, "repeat": options.repeat, "ingest_sizes": options.ingest_sizes,
+            "api_items": options.api_items, "api_requests": options.api_requests}
+
+
+def median_results(runs):
+    """Mediana de cada métrica entre ejecuciones con la misma estructura de resultados."""
+    first = runs[0]
+    if isinstance(first, dict):
+        return {key: median_results([run[key] for run in runs]) for key in first}
+    if isinstance(first, (int, float)) and not isinstance(first, bool):
+        return statistics.median(runs)
+    return first
+
+
+def main(options):
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": SQLALCHEMY_DATABASE_URL.split(":", 1)[0],
+            "html_parser": HTML_PARSER,
+            "suites": options.suite,
+            "options": run_options(options),
+        }
+    }
+    runners = {"parse": bench_parse, "ingest": bench_ingest, "api": bench_api}
+    for suite in options.suite:
+        runs = []
+        for run in range(options.runs):
+            print(f"\n[{suite}]" + (f" ejecución {run + 1}/{options.runs}" if options.runs > 1 else ""))
+            runs.append(runners[suite](options))
+        results[suite] = median_results(runs)
+
+    with open(options.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados guardados en {options.output}")
+
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        baseline_options = baseline.get("meta", {}).get("options")
+        if baseline_options and baseline_options != run_options(options):
+            print(f"\nAtención: la referencia se midió con otras opciones ({baseline_options})")
+        for suite in SUITES:
+            # Los tiempos sobre páginas sintéticas no se comparan con los de páginas reales
+            if "synthetic" in (results.get(suite, {}).get("_pages"), baseline.get(suite, {}).get("_pages")):
+                print(f"\nSuite {suite} sin comparar: se midió sobre páginas sintéticas")
+                results = {key: value for key, value in results.items() if key != suite}
+                baseline = {key: value for key, value in baseline.items() if key != suite}
+        regressions = compare(results, baseline, options.tolerance, options.min_change_ms)
+        if regressions:
+            print(f"{len(regressions)} métricas empeoraron más de {options.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de parseo, ingesta y API")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--output", default="benchmark_results.json", help="archivo JSON de resultados")
+    parser.add_argument("--baseline", help="resultados de referencia con los que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="empeoramiento admitido (0.2 = 20%%)")
+    parser.add_argument("--min-change-ms", type=float, default=1.0,
+                        help="diferencia mínima en ms para contar una regresión de tiempo")
+    parser.add_argument("--repeat", type=int, default=5, help="ejecuciones por página en la suite parse")
+    parser.add_argument("--runs", type=int, default=1,
+                        help="ejecuciones de cada suite; se guarda la mediana de cada métrica")
+    parser.add_argument("--ingest-sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--api-items", type=int, default=100000, help="items de la base de la suite api")
+    parser.add_argument("--api-requests", type=int, default=200, help="peticiones medidas por escenario")
+    main(parser.parse_args())
@@ -0,0 +1,152 @@
+"""
+Compara el parseo de las páginas de listado con el parser anterior
+(html.parser sobre la página completa) y con el parser rápido limitado a la
+parte relevante de cada página (lxml + SoupStrainer).
+
+Las páginas son las grabaciones de replay_scrapers.py (replay_fixtures/),
+que hay que hacer antes con `python replay_scrapers.py record`. Con
+--fixtures-dir tests/synthetic_fixtures se usan las páginas sintéticas de las
+pruebas: son mucho más chicas que las reales y los tiempos solo sirven como
+prueba de humo. Si falta alguna página o algún parser no encuentra items (o
+encuentra distinta cantidad que la referencia), el proceso termina con error.
+
+Uso:
+    python benchmark_parsing.py
+    python benchmark_parsing.py --repeat 20
+    python benchmark_parsing.py --fixtures-dir tests/synthetic_fixtures
+"""
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+from app.scrapers.parsing import LXML_AVAILABLE, use_backend
+from app.scrapers.replay import fixture_path, load_fixture
+from replay_scrapers import FIXTURES_DIR
+
+# (página, módulo, función de parseo, URL, argumentos extra de la función)
+PAGES = [
+    ("anamed", "app.scrapers.anamed_scraper", "parse_anamed",
+     "https://www.ispch.gob.cl/categorias-alertas/anamed/", ()),
+    ("congreso", "app.scrapers.congreso_scraper", "parse_congreso",
+     "https://comunicaciones.congreso.gob.pe/?s=&date=&post_type%5B%5D=noticias", ()),
+    ("digemid_noticias", "app.scrapers.digemid_noticias_scraper", "parse_digemid_noticias",
+     "https://www.digemid.minsa.gob.pe/webDigemid/?s=", ()),
+    ("digesa", "app.scrapers.digesa_scraper", "parse_digesa",
+     "http://www.digesa.minsa.gob.pe/noticias/comunicados.asp",
+     ("http://www.digesa.minsa.gob.pe/noticias/comunicados.asp",)),
+    ("digesa_noticias", "app.scrapers.digesa_noticias_scraper", "parse_digesa_noticias_archivo",
+     "http://www.digesa.minsa.gob.pe/noticias/index.asp", ()),
+    ("diputados_noticias", "app.scrapers.diputados_noticias_scraper", "parse_diputados_noticias",
+     "https://www.camara.cl/cms/noticias/", ()),
+    ("diputados_proyectos", "app.scrapers.diputados_proyectos_scraper", "parse_diputados_proyectos",
+     "https://www.camara.cl/legislacion/ProyectosDeLey/proyectos_ley.aspx", ()),
+    ("ispch_noticias", "app.scrapers.ispch_noticias_scraper", "parse_ispch_noticias",
+     "https://www.ispch.gob.cl/noticia/", ()),
+    ("ispch_resoluciones", "app.scrapers.ispch_resoluciones_scraper", "parse_ispch_resoluciones",
+     "https://www.ispch.gob.cl/resoluciones/", ()),
+    ("minsa_normas", "app.scrapers.minsa_normas_scraper", "parse_minsa_normas",
+     "https://www.gob.pe/institucion/minsa/normas-legales", ()),
+    ("minsa_noticias", "app.scrapers.minsa_noticias_scraper", "parse_minsa_noticias",
+     "https://www.gob.pe/institucion/minsa/noticias", ()),
+    ("senado_noticias", "app.scrapers.senado_noticias_scraper", "parse_tarjetas",
+     "https://www.senado.cl/comunicaciones/noticias", ()),
+]
+
+# (nombre, parser, usar SoupStrainer); el primero es la referencia
+BACKENDS = [("html.parser (página completa)", "html.parser", False)]
+if LXML_AVAILABLE:
+    BACKENDS += [
+        ("lxml (página completa)", "lxml", False),
+        ("lxml + SoupStrainer", "lxml", True),
+    ]
+else:
+    BACKENDS += [("html.parser + SoupStrainer", "html.parser", True)]
+
+
+def load_pages(fixtures_dir=FIXTURES_DIR):
+    """
+    HTML de cada página de PAGES, leído de su fixture de replay_scrapers.py.
+    Termina con error si falta alguna: un benchmark sin páginas no mide nada.
+    """
+    pages, missing = {}, []
+    for name, _, _, url, _ in PAGES:
+        path = fixture_path(fixtures_dir, httpx.Request("GET", url))
+        if not os.path.exists(path):
+            missing.append(f"{name}: {url}")
+            continue
+        fixture = load_fixture(path)
+        pages[name] = httpx.Response(fixture["status_code"], headers=fixture["headers"],
+                                     content=fixture["body"]).text
+    if missing:
+        raise SystemExit(f"Faltan páginas grabadas en {fixtures_dir} (python replay_scrapers.py record):\n  "
+                         + "\n  ".join(missing))
+    return pages
+
+
+def measure(func, html, args, repeat):
+    # Mejor tiempo de `repeat` ejecuciones y pico de memoria de una ejecución
+    # (sin los mensajes que imprimen las funciones de parseo)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return _measure(func, html, args, repeat)
+
+
+def _measure(func, html, args, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html, *args)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(html, *args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, len(result)
+
+
+def run(repeat, fixtures_dir=FIXTURES_DIR):
+    """Mide cada página con cada parser; devuelve las páginas cuyo resultado no coincide o está vacío."""
+    pages = load_pages(fixtures_dir)
+    totals = {name: [0.0, 0] for name, _, _ in BACKENDS}
+    failed = []
+    for name, module_name, func_name, _, args in PAGES:
+        html = pages[name]
+        func = getattr(importlib.import_module(module_name), func_name)
+
+        print(f"\n{name} ({len(html) / 1024:.0f} KB)")
+        baseline = None
+        for backend_name, parser, strain in BACKENDS:
+            with use_backend(parser, strain):
+                elapsed, peak, count = measure(func, html, args, repeat)
+            totals[backend_name][0] += elapsed
+            totals[backend_name][1] = max(totals[backend_name][1], peak)
+            if baseline is None:
+                baseline = (elapsed, count)
+            speedup = baseline[0] / elapsed if elapsed else 0
+            warning = ""
+            if not count or count != baseline[1]:
+                warning = f"  ¡{count} items vs {baseline[1]}!"
+                failed.append(f"{name} ({backend_name})")
+            print(f"  {backend_name:32} {elapsed * 1000:8.1f} ms  {peak / 1024 / 1024:7.1f} MB  x{speedup:4.1f}  {count} items{warning}")
+
+    print("\nTotal")
+    for backend_name, (elapsed, peak) in totals.items():
+        print(f"  {backend_name:32} {elapsed * 1000:8.1f} ms  pico {peak / 1024 / 1024:7.1f} MB")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de parseo de las páginas de listado")
+    parser.add_argument("--repeat", type=int, default=5, help="ejecuciones por página y parser")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR, help="directorio de las páginas grabadas")
+    options = parser.parse_args()
+    failed = run(options.repeat, options.fixtures_dir)
+    if failed:
+        print(f"\nParseos sin items o con distinta cantidad que la referencia: {', '.join(failed)}")
+        sys.exit(1)
@@ -0,0 +1,343 @@
+"""
+Generador de datos sintéticos para pruebas de carga: llena las tablas
+sources, users, keywords e items con volúmenes de producción (millones de
+items) usando INSERT en bloque.
+
+Los items imitan lo que producen los scrapers: títulos y descripciones en
+español, la distribución de países y source_type de cada fuente, fechas
+concentradas en los últimos meses y el extra_data JSON de cada scraper.
+
+Uso:
+    python generate_dataset.py --items 5000000               # en synthetic.db
+    SQLALCHEMY_DATABASE_URL=postgresql://... python generate_dataset.py --items 1000000
+    python generate_dataset.py --items 200000 --users 1000 --clusters
+    python generate_dataset.py --reset --items 100000        # borra las tablas antes
+
+Por defecto escribe en ./synthetic.db (nunca en monitor_wind.db, salvo que
+se indique con SQLALCHEMY_DATABASE_URL). Las coincidencias de palabras clave
+y el índice de búsqueda se calculan al final en una sola pasada; los
+clusters de casi duplicados solo con --clusters (es el paso más lento).
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "sqlite:///./synthetic.db")
+
+from sqlalchemy import func, text  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import models  # noqa: E402
+from app.scrapers.registry import SCRAPER_TYPES  # noqa: E402
+from app.services.bulk import insert_ignoring_conflicts  # noqa: E402
+from app.services.keyword_matching import rebuild_keyword_matches  # noqa: E402
+from app.services.near_duplicates import rebuild_near_duplicates  # noqa: E402
+from app.services.normalization import item_fingerprint, normalize_url  # noqa: E402
+from app.services.search import ensure_search_index, rebuild_search_index, search_document  # noqa: E402
+
+CHUNK_SIZE = 10000
+
+# Fuente sintética: nombre y URL de la fuente real, país, source_type que
+# produce su scraper, URL de sus items, peso en el total de items y tipo de texto
+SourceProfile = namedtuple(
+    "SourceProfile", ["name", "scraper_type", "url", "country", "source_types", "item_url", "weight", "kind"]
+)
+
+SOURCES = [
+    SourceProfile("AlertasAnamed_CL", "anamed_cl", "https://www.ispch.gob.cl/categorias-alertas/anamed/",
+                  "Chile", ["Alerta Sanitaria", "Nota Informativa", "Retiro de Producto"],
+                  "https://www.ispch.gob.cl/anamed_alertas/alerta-{n}/", 1, "alerta"),
+    SourceProfile("Congreso_PE", "congreso_pe", "https://comunicaciones.congreso.gob.pe/?s=&date=&post_type%5B%5D=noticias",
+                  "Perú", ["NOTICIAS"], "https://comunicaciones.congreso.gob.pe/noticias/nota-{n}/", 15, "noticia"),
+    SourceProfile("Expediente_PE", "expediente_pe", "https://wb2server.congreso.gob.pe/spley-portal/#/expediente/search",
+                  "Perú", ["PROYECTO_LEY"], "https://wb2server.congreso.gob.pe/spley-portal/#/expediente/2021/{n}",
+                  20, "proyecto"),
+    SourceProfile("DIGESA_PE", "digesa_pe", "http://www.digesa.minsa.gob.pe/noticias/comunicados.asp",
+                  "Perú", ["DIGESA"], "http://www.digesa.minsa.gob.pe/noticias/comunicados/{n}.pdf", 2, "comunicado"),
+    SourceProfile("DIGESA_Noticias_PE", "digesa_noticias_pe", "http://www.digesa.minsa.gob.pe/noticias/index.asp",
+                  "Perú", ["DIGESA"], "http://www.digesa.minsa.gob.pe/noticias/nota_{n}.asp", 2, "noticia"),
+    SourceProfile("DiputadosNoticias_CL", "diputados_noticias_cl", "https://www.camara.cl/cms/noticias/",
+                  "Chile", ["diputados_noticias_cl"], "https://www.camara.cl/cms/noticias/{n}/", 8, "noticia"),
+    SourceProfile("DiputadosProyectos_CL", "diputados_proyectos_cl",
+                  "https://www.camara.cl/legislacion/ProyectosDeLey/proyectos_ley.aspx",
+                  "Chile", ["proyecto_ley"],
+                  "https://www.camara.cl/legislacion/ProyectosDeLey/tramitacion.aspx?prmBOLETIN={n}-11", 8, "proyecto"),
+    SourceProfile("ISPCH_Noticias_CL", "ispch_noticias_cl", "https://www.ispch.gob.cl/noticia/",
+                  "Chile", ["noticia"], "https://www.ispch.gob.cl/noticia/nota-{n}/", 5, "noticia"),
+    SourceProfile("ISPCH_Resoluciones_CL", "ispch_resoluciones_cl", "https://www.ispch.gob.cl/resoluciones/",
+                  "Chile", ["resolucion"], "https://www.ispch.gob.cl/resoluciones/resolucion-{n}/", 6, "norma"),
+    SourceProfile("MINSA_Normas_PE", "minsa_normas_pe", "https://www.gob.pe/institucion/minsa/normas-legales",
+                  "Perú", ["norma_legal"], "https://www.gob.pe/institucion/minsa/normas-legales/{n}", 6, "norma"),
+    SourceProfile("MINSA_Noticias_PE", "minsa_noticias_pe", "https://www.gob.pe/institucion/minsa/noticias",
+                  "Perú", ["noticia"], "https://www.gob.pe/institucion/minsa/noticias/{n}", 15, "noticia"),
+    SourceProfile("Senado_Noticias_CL", "senado_noticias_cl", "https://www.senado.cl/comunicaciones/noticias",
+                  "Chile", ["noticia"], "https://www.senado.cl/comunicaciones/noticias/nota-{n}", 8, "noticia"),
+    SourceProfile("DIGEMID_PE", "digemid_noticias_pe", "https://www.digemid.minsa.gob.pe/webDigemid/?s=",
+                  "Perú", ["noticia"], "https://www.digemid.minsa.gob.pe/webDigemid/noticias/{n}/", 4, "noticia"),
+]
+_SOURCE_WEIGHTS = [source.weight for source in SOURCES]
+
+ENTIDADES = {
+    "Perú": ["El Minsa", "La Digemid", "La Digesa", "El Congreso", "EsSalud", "El Instituto Nacional de Salud"],
+    "Chile": ["El Minsal", "El ISP", "La Cámara de Diputados", "El Senado", "Fonasa", "La Seremi de Salud"],
+}
+LUGARES = {
+    "Perú": ["Lima", "Piura", "Tumbes", "Arequipa", "Cusco", "Loreto", "La Libertad", "Lambayeque", "Junín"],
+    "Chile": ["Santiago", "Valparaíso", "Biobío", "Antofagasta", "La Araucanía", "Los Lagos", "Coquimbo"],
+}
+ACCIONES = ["anuncia", "lanza", "refuerza", "amplía", "presenta", "aprueba", "supervisa", "suspende", "actualiza"]
+TEMAS = [
+    "la campaña de vacunación contra la influenza", "el control de brotes de dengue", "la atención primaria",
+    "el registro sanitario de medicamentos", "el etiquetado de alimentos procesados", "la vigilancia de dispositivos médicos",
+    "el acceso a medicamentos genéricos", "la prevención de la anemia infantil", "la salud mental comunitaria",
+    "la calidad del agua para consumo humano", "el control de precios de medicamentos", "la telemedicina",
+    "la fiscalización de farmacias y boticas", "la inocuidad de alimentos", "la donación de sangre",
+]
+PRODUCTOS = ["paracetamol 500 mg", "jarabe para la tos", "suplemento vitamínico", "mascarillas quirúrgicas",
+             "test rápido de antígenos", "crema dermatológica", "insulina glargina", "suero oral", "Ozempic"]
+PROBLEMAS = ["falsificado", "sin registro sanitario", "con defectos de calidad", "contaminado",
+             "con rotulado incorrecto", "comercializado de forma ilegal"]
+ESTADOS_PROYECTO = ["Presentado", "En comisión", "Dictamen", "Aprobado", "Publicado", "Archivado"]
+PROPONENTES = ["Congreso", "Poder Ejecutivo", "Mensaje", "Moción", "Iniciativa ciudadana"]
+CATEGORIAS = ["Salud", "Legislativo", "Regiones", "Comisiones", "Actualidad"]
+
+# Palabras clave de los usuarios, de la más a la menos elegida (distribución de
+# Zipf): pocos temas populares que aparecen en muchos items y una cola larga
+# de términos poco frecuentes
+PALABRAS_CLAVE = [
+    "medicamentos", "vacuna", "dengue", "etiquetado", "farmacias", "registro sanitario", "alimentos",
+    "influenza", "genéricos", "dispositivos médicos", "anemia", "salud mental", "telemedicina",
+    "precios", "falsificado", "insulina", "Ozempic", "sangre", "atención primaria", "agua",
+] + PRODUCTOS + LUGARES["Perú"] + LUGARES["Chile"] + [
+    "cannabis medicinal", "tabaco", "obesidad", "cáncer", "VIH", "tuberculosis", "hepatitis", "sarampión",
+    "viruela del mono", "antibióticos", "resistencia antimicrobiana", "oncología", "trasplantes",
+    "ley de fármacos", "Cenabast", "isapres", "licencias médicas", "bioequivalencia", "cosméticos",
+    "plaguicidas", "sellos de advertencia", "comida chatarra", "lactancia", "salud ocupacional",
+]
+_KEYWORD_WEIGHTS = [1 / (rank + 1) for rank in range(len(PALABRAS_CLAVE))]
+
+
+def _random_date(rng, today, mean_days, max_days):
+    # Distribución exponencial: la mayoría de los items son de los últimos meses
+    days = min(int(rng.expovariate(1 / mean_days)), max_days)
+    return today - timedelta(days=days, seconds=rng.randrange(86400))
+
+
+def _texts(rng, source, n, date):
+    """Título, descripción y extra_data según el tipo de fuente."""
+    country = source.country
+    tema = rng.choice(TEMAS)
+    lugar = rng.choice(LUGARES[country])
+    if source.kind == "proyecto":
+        estado = rng.choice(ESTADOS_PROYECTO)
+        proponente = rng.choice(PROPONENTES)
+        title = f"Ley que fortalece {tema} en {lugar} ({n})"
+        description = f"Número: {n}\nEstado: {estado}\nProponente: {proponente}"
+        extra = {"numero_boletin": str(n), "tipo_proyecto": proponente, "estado": estado}
+    elif source.kind == "norma":
+        numero = f"{n % 9999:04d}-{date.year}"
+        title = f"Resolución N° {numero} que aprueba la norma técnica sobre {tema}"
+        description = f"Aprueban la norma técnica de salud sobre {tema}, de aplicación en {lugar}."
+        extra = {"numero_resolucion": numero, "categoria": rng.choice(CATEGORIAS), "tipo": "resolucion"}
+    elif source.kind == "alerta":
+        producto = rng.choice(PRODUCTOS)
+        title = f"Alerta sanitaria N° {n}: {producto} {rng.choice(PROBLEMAS)}"
+        description = f"Se informa a la población sobre {producto} detectado en {lugar}. No consumir ni comercializar."
+        extra = {"nota_url": None, "publicacion_url": None}
+    elif source.kind == "comunicado":
+        title = f"Comunicado N° {n % 999:03d}-{date.year}: {tema}"
+        description = f"La Dirección General de Salud Ambiental informa sobre {tema} en {lugar}."
+        extra = {"tipo": "comunicado", "institucion": "DIGESA", "año": str(date.year), "pais": country}
+    else:
+        entidad = rng.choice(ENTIDADES[country])
+        title = f"{entidad} {rng.choice(ACCIONES)} {tema} en {lugar}"
+        if rng.random() < 0.5:
+            title += f" y atiende a más de {rng.randrange(100, 50000)} personas"
+        description = (f"{entidad} informó que {tema} llegará a {rng.randrange(2, 60)} distritos de {lugar}. "
+                       f"También se refuerza {rng.choice(TEMAS)}.")
+        extra = {"categoria": rng.choice(CATEGORIAS), "imagen_url": f"{source.item_url.format(n=n).rstrip('/')}.jpg",
+                 "tipo": f"noticia_{source.scraper_type}"}
+    return title, description, json.dumps(extra, ensure_ascii=False)
+
+
+def synthetic_items(count, seed=0, start=0, today=None, mean_days=365, max_days=6 * 365):
+    """
+    Items con la misma forma que devuelven los scrapers. Los números de
+    `start` a `start + count` hacen únicas las URLs; con la misma semilla se
+    generan los mismos items.
+    """
+    rng = random.Random(seed)
+    today = today or datetime(2024, 12, 31)
+    items = []
+    for n in range(start, start + count):
+        source = rng.choices(SOURCES, weights=_SOURCE_WEIGHTS)[0]
+        presentation_date = _random_date(rng, today, mean_days, max_days)
+        title, description, extra_data = _texts(rng, source, n, presentation_date)
+        items.append({
+            "title": title,
+            "description": description,
+            "country": source.country,
+            "source_type": rng.choice(source.source_types),
+            "source_url": source.item_url.format(n=n),
+            "presentation_date": presentation_date,
+            "extra_data": extra_data,
+        })
+    return items
+
+
+def item_rows(items, now):
+    """Filas de la tabla items, con las mismas columnas derivadas que calcula la ingesta."""
+    return [
+        dict(
+            item,
+            source_url=normalize_url(item["source_url"]),
+            fingerprint=item_fingerprint(item["title"], item["presentation_date"], item["source_type"]),
+            search_text=search_document(item["title"], item["description"]),
+            created_at=now,
+            updated_at=now,
+        )
+        for item in items
+    ]
+
+
+def _generate_chunk(args):
+    # Se ejecuta en el pool de procesos: generar y normalizar es lo más costoso
+    start, count, seed, today, mean_days, max_days = args
+    items = synthetic_items(count, seed=seed, start=start, today=today, mean_days=mean_days, max_days=max_days)
+    return item_rows(items, datetime.utcnow())
+
+
+def reset_tables():
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("DROP TABLE IF EXISTS items_fts"))
+    Base.metadata.drop_all(bind=engine)
+
+
+def insert_sources(db):
+    existing = {name for (name,) in db.query(models.Source.name)}
+    now = datetime.utcnow()
+    rows = [
+        {"name": source.name, "url": source.url, "scraper_type": source.scraper_type, "active": True,
+         "created_at": now, "refresh_interval": SCRAPER_TYPES[source.scraper_type].refresh_interval,
+         "consecutive_failures": 0}
+        for source in SOURCES if source.name not in existing
+    ]
+    if rows:
+        db.execute(insert_ignoring_conflicts(db, models.Source.__table__), rows)
+    db.commit()
+    return len(rows)
+
+
+def insert_users(db, count, keywords_per_user, seed):
+    """Usuarios con entre 1 y 2·keywords_per_user palabras clave distintas cada uno."""
+    rng = random.Random(seed)
+    first = (db.query(func.max(models.User.id)).scalar() or 0) + 1
+    now = datetime.utcnow()
+    total_keywords = 0
+    for start in range(first, first + count, CHUNK_SIZE):
+        ids = range(start, min(start + CHUNK_SIZE, first + count))
+        db.execute(insert_ignoring_conflicts(db, models.User.__table__), [
+            {"id": user_id, "email": f"usuario{user_id}@example.com", "hashed_password": "-",
+             "is_active": rng.random() > 0.05, "created_at": now}
+            for user_id in ids
+        ])
+        keywords = [
+            {"word": word, "user_id": user_id, "created_at": now}
+            for user_id in ids
+            for word in set(rng.choices(PALABRAS_CLAVE, weights=_KEYWORD_WEIGHTS, k=rng.randint(1, 2 * keywords_per_user)))
+        ]
+        db.execute(models.Keyword.__table__.insert(), keywords)
+        db.commit()
+        total_keywords += len(keywords)
+    return total_keywords
+
+
+def insert_items(db, count, seed, workers, mean_days, max_days):
+    """
+    Genera los items en bloques de CHUNK_SIZE en un pool de procesos y los
+    inserta con un INSERT multi-fila por bloque (ON CONFLICT DO NOTHING).
+    En SQLite el trigger del índice FTS se desactiva durante la carga y el
+    índice se reconstruye al final en una sola pasada.
+    """
+    first = (db.query(func.max(models.Item.id)).scalar() or 0) + 1
+    today = datetime.utcnow().replace(microsecond=0)
+    chunks = [
+        (start, min(CHUNK_SIZE, first + count - start), seed + start, today, mean_days, max_days)
+        for start in range(first, first + count, CHUNK_SIZE)
+    ]
+    sqlite = engine.dialect.name == "sqlite"
+    if sqlite:
+        db.execute(text("DROP TRIGGER IF EXISTS items_fts_ai"))
+        db.execute(text("PRAGMA synchronous=OFF"))
+        db.commit()
+
+    statement = insert_ignoring_conflicts(db, models.Item.__table__)
+    generated = 0
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for rows in pool.map(_generate_chunk, chunks):
+            db.execute(statement, rows)
+            db.commit()
+            generated += len(rows)
+            elapsed = time.perf_counter() - started
+            print(f"  items: {generated}/{count} ({generated / elapsed:.0f} filas/s)")
+
+    if sqlite:
+        ensure_search_index(engine)
+        print("  reconstruyendo el índice de búsqueda...")
+        rebuild_search_index(engine)
+    return generated
+
+
+def main(options):
+    print(f"Base de datos: {engine.url.render_as_string(hide_password=True)}")
+    if options.reset:
+        reset_tables()
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        print(f"Fuentes nuevas: {insert_sources(db)}")
+        keywords = insert_users(db, options.users, options.keywords_per_user, options.seed)
+        print(f"Usuarios: {options.users}, palabras clave: {keywords}")
+        insert_items(db, options.items, options.seed, options.workers,
+                     options.mean_age_days, options.years * 365)
+
+        if not options.skip_keyword_matches:
+            print("Calculando coincidencias de palabras clave...")
+            print(f"  coincidencias: {rebuild_keyword_matches(db)}")
+        if options.clusters:
+            print("Calculando clusters de casi duplicados...")
+            print(f"  items agrupados: {rebuild_near_duplicates(db)}")
+
+        # Estadísticas actualizadas para el planificador (conteos aproximados, planes de consulta)
+        db.execute(text("ANALYZE"))
+        db.commit()
+        total = db.query(func.count(models.Item.id)).scalar()
+    finally:
+        db.close()
+    print(f"Listo en {time.perf_counter() - started:.0f}s: {total} items en la base")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos para pruebas de carga")
+    parser.add_argument("--items", type=int, default=1000000, help="items a generar")
+    parser.add_argument("--users", type=int, default=100,
+                        help="usuarios a generar (cada uno agrega sus coincidencias a item_keyword_matches)")
+    parser.add_argument("--keywords-per-user", type=int, default=3, help="palabras clave promedio por usuario")
+    parser.add_argument("--years", type=int, default=6, help="antigüedad máxima de los items en años")
+    parser.add_argument("--mean-age-days", type=int, default=365, help="antigüedad promedio de los items en días")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos que generan los items")
+    parser.add_argument("--seed", type=int, default=0, help="semilla (misma semilla, mismos datos)")
+    parser.add_argument("--skip-keyword-matches", action="store_true",
+                        help="no calcular las coincidencias de palabras clave")
+    parser.add_argument("--clusters", action="store_true", help="calcular los clusters de casi duplicados (lento)")
+    parser.add_argument("--reset", action="store_true", help="borrar todas las tablas antes de generar")
+    main(parser.parse_args())
@@ -1,10 +1,12 @@
 from app.database import SessionLocal, engine, Base
 from app.models import models
+from app.services.search import ensure_search_index
 from datetime import datetime
 
 def init_db():
     # Crear todas las tablas
     Base.metadata.create_all(bind=engine)
+    ensure_search_index(engine)
     
     # Crear una sesión
     db = SessionLocal()
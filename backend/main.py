@@ -3,15 +3,55 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse, FileResponse
 from sqlalchemy.orm import Session
-from backend.app.database import SessionLocal, engine, Base
+from backend.app.database import SessionLocal, engine, Base, missing_columns
 from backend.app.models import models
 from backend.app.api import items, scraping, users
+from backend.app.scrapers import executor
+from backend.app.scrapers.http_client import ScrapingClient
+from backend.app.scrapers.scheduler import SCRAPING_SCHEDULER_ENABLED, ScrapingScheduler
+from backend.app.services import run_state
+from backend.app.services.search import ensure_search_index
+from backend.app.services.status_bus import status_bus
+from contextlib import asynccontextmanager
+import asyncio
+from functools import partial
 import os
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+# Las columnas nuevas de tablas existentes solo las agrega la migración: sin
+# ellas las consultas fallarían en cada petición, así que no se arranca
+_missing = missing_columns(engine)
+if _missing:
+    raise SystemExit(
+        "La base de datos no está migrada, faltan las columnas: " + ", ".join(_missing) + ". "
+        "Ejecute `cd backend && python migrate_db.py` (con MIGRATE_DELETE_DUPLICATES=1 "
+        "si la migración encuentra items duplicados) antes de iniciar la aplicación."
+    )
+ensure_search_index(engine)
 
-app = FastAPI(title="MonitorWind API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cliente HTTP compartido por todos los scrapers (conexiones keep-alive reutilizadas)
+    app.state.http_client = ScrapingClient()
+    # Eventos de scraping de todos los workers, leídos de la base de datos
+    status_poller = asyncio.create_task(status_bus.follow(run_state.fetch_events, run_state.fetch_last_event_id))
+    # Scheduler de scraping: solo uno activo entre todos los workers (lock entre procesos)
+    scheduler = None
+    if SCRAPING_SCHEDULER_ENABLED:
+        scheduler = ScrapingScheduler(partial(scraping.run_scheduled, client=app.state.http_client))
+        scheduler.start()
+    try:
+        yield
+    finally:
+        if scheduler is not None:
+            await scheduler.stop()
+        status_poller.cancel()
+        await app.state.http_client.aclose()
+        # Pools de hilos y procesos del scraping
+        executor.shutdown()
+
+app = FastAPI(title="MonitorWind API", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
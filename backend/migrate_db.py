@@ -0,0 +1,247 @@
+import os
+
+from app.database import SessionLocal, engine, Base
+from app.models import models
+from app.services.normalization import item_fingerprint, normalize_url
+from app.services.pagination import POSTGRES_LISTING_INDEX_DDL
+from app.services.keyword_matching import rebuild_keyword_matches
+from app.services.near_duplicates import rebuild_near_duplicates
+from app.services.search import ensure_search_index, rebuild_search_index, search_document, search_index_exists
+from sqlalchemy import inspect, text
+
+BATCH_SIZE = 1000
+
+def add_column_if_missing(table, column, ddl_type):
+    columns = [c["name"] for c in inspect(engine).get_columns(table)]
+    if column not in columns:
+        print(f"Agregando columna {table}.{column}...")
+        with engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+
+def create_missing_indexes(table):
+    # Los índices sobre columnas que agrega una migración posterior se crean en ese paso
+    columns = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    for index in table.indexes:
+        if all(column.name in columns for column in index.columns):
+            index.create(bind=engine, checkfirst=True)
+
+UNIQUE_ITEM_INDEXES = ("ix_items_source_url", "ix_items_fingerprint")
+
+def unique_item_indexes_exist():
+    existing = {ix["name"]: ix for ix in inspect(engine).get_indexes("items")}
+    return all(name in existing and existing[name]["unique"] for name in UNIQUE_ITEM_INDEXES)
+
+def duplicate_items(db, column):
+    """Items que repiten `column` con uno anterior: (id, id conservado, título, valor)."""
+    return db.execute(text(f"""
+        SELECT items.id, kept.id, items.title, items.{column}
+        FROM items
+        JOIN (
+            SELECT min(id) AS id, {column} AS value FROM items
+            WHERE {column} IS NOT NULL GROUP BY {column}
+        ) AS kept ON kept.value = items.{column}
+        WHERE items.id <> kept.id
+        ORDER BY items.id
+    """)).all()
+
+def migrate_item_fingerprints():
+    """
+    Agrega la columna fingerprint a items, normaliza source_url, calcula la
+    huella de los registros que no la tienen, elimina los duplicados que
+    quedan (conservando el id más antiguo) y crea los índices únicos.
+
+    Los duplicados se listan antes de borrarlos y solo se eliminan con
+    MIGRATE_DELETE_DUPLICATES=1; sin esa variable la migración se detiene.
+    Una vez creados los índices únicos no puede haber duplicados y ese paso
+    se omite.
+    """
+    print("Migración: huella e índices únicos en items")
+    add_column_if_missing("items", "fingerprint", "VARCHAR(64)")
+
+    db = SessionLocal()
+    try:
+        # Calcular huellas y normalizar URLs por lotes, solo de items sin huella
+        last_id = 0
+        updated = 0
+        while True:
+            rows = db.query(
+                models.Item.id,
+                models.Item.title,
+                models.Item.presentation_date,
+                models.Item.source_type,
+                models.Item.source_url
+            ).filter(
+                models.Item.id > last_id,
+                models.Item.fingerprint.is_(None)
+            ).order_by(models.Item.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            db.bulk_update_mappings(models.Item, [
+                {
+                    "id": item_id,
+                    "fingerprint": item_fingerprint(title, presentation_date, source_type),
+                    "source_url": normalize_url(source_url)
+                }
+                for item_id, title, presentation_date, source_type, source_url in rows
+            ])
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+        print(f"Huellas calculadas para {updated} items")
+
+        if unique_item_indexes_exist():
+            print("Índices únicos ya creados, no hay duplicados que eliminar")
+            return
+
+        # Eliminar duplicados antes de crear los índices únicos
+        delete = os.getenv("MIGRATE_DELETE_DUPLICATES", "0") == "1"
+        for column in ("source_url", "fingerprint"):
+            duplicates = duplicate_items(db, column)
+            if not duplicates:
+                continue
+            print(f"Duplicados por {column}: {len(duplicates)}")
+            for item_id, kept_id, title, value in duplicates:
+                print(f"  item {item_id} (se conserva {kept_id}): {(title or '')[:80]} | {value}")
+            if not delete:
+                raise SystemExit(
+                    "Hay items duplicados: revise la lista y vuelva a ejecutar con "
+                    "MIGRATE_DELETE_DUPLICATES=1 para eliminarlos"
+                )
+            result = db.execute(text(f"""
+                DELETE FROM items
+                WHERE {column} IS NOT NULL
+                  AND id NOT IN (
+                      SELECT min(id) FROM items WHERE {column} IS NOT NULL GROUP BY {column}
+                  )
+            """))
+            db.commit()
+            print(f"Duplicados eliminados por {column}: {result.rowcount}")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # Reemplazar índices no únicos creados por versiones anteriores
+    existing = {ix["name"]: ix for ix in inspect(engine).get_indexes("items")}
+    for name in UNIQUE_ITEM_INDEXES:
+        if name in existing and not existing[name]["unique"]:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP INDEX {name}"))
+    create_missing_indexes(models.Item.__table__)
+    print("Índices de items creados")
+
+def migrate_search_index():
+    """
+    Agrega la columna search_text, la calcula para los items existentes y
+    crea el índice de texto completo (FTS5 en SQLite, GIN en PostgreSQL).
+    """
+    print("Migración: índice de texto completo")
+    add_column_if_missing("items", "search_text", "TEXT")
+
+    db = SessionLocal()
+    try:
+        last_id = 0
+        updated = 0
+        while True:
+            rows = db.query(
+                models.Item.id,
+                models.Item.title,
+                models.Item.description
+            ).filter(
+                models.Item.id > last_id,
+                models.Item.search_text.is_(None)
+            ).order_by(models.Item.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            db.bulk_update_mappings(models.Item, [
+                {"id": item_id, "search_text": search_document(title, description)}
+                for item_id, title, description in rows
+            ])
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+        print(f"Texto de búsqueda calculado para {updated} items")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    # El índice solo se reconstruye si se acaba de crear o si cambió el texto
+    # de items existentes; si ya estaba, los triggers lo mantienen al día
+    created = not search_index_exists(engine)
+    if ensure_search_index(engine) and (created or updated):
+        rebuild_search_index(engine)
+        print("Índice de texto completo creado" if created else "Índice de texto completo reconstruido")
+
+def migrate_item_indexes():
+    """Crea los índices de items agregados después de la creación de la tabla."""
+    print("Migración: índices de items")
+    create_missing_indexes(models.Item.__table__)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text(POSTGRES_LISTING_INDEX_DDL))
+
+def migrate_keyword_matches():
+    """Calcula la tabla item_keyword_matches para las palabras clave existentes."""
+    print("Migración: coincidencias de palabras clave")
+    db = SessionLocal()
+    try:
+        if db.query(models.ItemKeywordMatch).first() is None:
+            total = rebuild_keyword_matches(db)
+            print(f"Coincidencias calculadas: {total}")
+    finally:
+        db.close()
+
+def migrate_source_schedule():
+    """Columnas de planificación por fuente usadas por el scheduler."""
+    print("Migración: planificación de fuentes")
+    add_column_if_missing("sources", "refresh_interval", "INTEGER")
+    add_column_if_missing("sources", "consecutive_failures", "INTEGER DEFAULT 0")
+    add_column_if_missing("sources", "next_scrape_at", "TIMESTAMP")
+
+def migrate_source_watermarks():
+    """Marca de agua por fuente para el scraping incremental."""
+    print("Migración: marcas de agua de fuentes")
+    add_column_if_missing("sources", "watermark_date", "TIMESTAMP")
+    add_column_if_missing("sources", "watermark_urls", "TEXT")
+
+def migrate_near_duplicates():
+    """
+    Firmas MinHash, índice LSH y clusters de casi duplicados de los items
+    existentes. Con REBUILD_NEAR_DUPLICATES=1 se recalculan aunque ya existan
+    (p. ej. después de cambiar las reglas o el umbral del detector).
+    """
+    print("Migración: casi duplicados")
+    add_column_if_missing("items", "cluster_id", "INTEGER")
+    create_missing_indexes(models.Item.__table__)
+    force = os.getenv("REBUILD_NEAR_DUPLICATES", "0") == "1"
+    db = SessionLocal()
+    try:
+        if (force or db.query(models.ItemSignature).first() is None) and db.query(models.Item).first() is not None:
+            clustered = rebuild_near_duplicates(db)
+            print(f"Items agrupados con un casi duplicado: {clustered}")
+    finally:
+        db.close()
+
+MIGRATIONS = [
+    migrate_item_fingerprints,
+    migrate_search_index,
+    migrate_item_indexes,
+    migrate_keyword_matches,
+    migrate_source_schedule,
+    migrate_source_watermarks,
+    migrate_near_duplicates,
+]
+
+def migrate_db():
+    # Las tablas nuevas se crean directamente; las existentes se migran paso a paso
+    Base.metadata.create_all(bind=engine)
+    for migration in MIGRATIONS:
+        migration()
+
+if __name__ == "__main__":
+    print("Iniciando migración de la base de datos...")
+    migrate_db()
+    print("Migración completada")
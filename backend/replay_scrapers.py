@@ -0,0 +1,176 @@
+"""
+Graba y reproduce las respuestas HTTP de los scrapers para ejecutarlos sin
+red: los fixtures comprimidos (estado, cabeceras y cuerpo de cada petición,
+incluidos los POST a la API de expedientes) quedan en replay_fixtures/.
+
+Uso:
+    python replay_scrapers.py record                        # todos los scrapers
+    python replay_scrapers.py record --source anamed_cl --archive-pages 3
+    python replay_scrapers.py replay                        # sin red, desde los fixtures
+    python replay_scrapers.py replay --strict               # falla si falta un fixture
+    python replay_scrapers.py replay --fixtures-dir tests/synthetic_fixtures
+
+Ambos modos usan una base SQLite temporal vacía (salvo que se defina
+SQLALCHEMY_DATABASE_URL), así las fechas conocidas y los validadores HTTP no
+cambian las peticiones entre la grabación y la reproducción.
+
+Una fuente falla si lanza o registra una excepción (un mensaje "Error ..."
+en su salida) o si, habiendo respuestas grabadas para ella, no produce
+ningún item; en ese caso el proceso termina con código 1.
+
+El repositorio no incluye grabaciones reales. tests/synthetic_fixtures/
+tiene páginas escritas a mano con el marcado que esperan los scrapers, en el
+mismo formato, con las que tests/test_replay_scrapers.py prueba la
+reproducción y los parsers; no sirven para detectar cambios en los sitios.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import re
+import sys
+import tempfile
+import time
+
+os.environ.setdefault(
+    "SQLALCHEMY_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="replay_"), "replay.db")
+)
+# Los parseos se hacen en hilos del mismo proceso, así sus mensajes de error
+# quedan en la salida capturada de cada fuente
+os.environ.setdefault("SCRAPING_PARSE_WORKERS", "0")
+
+from app.database import Base, engine  # noqa: E402
+from app.models import models  # noqa: E402,F401
+from app.scrapers import conditional_cache, executor, registry  # noqa: E402
+from app.scrapers.http_client import ScrapingClient  # noqa: E402
+from app.scrapers.replay import RecordingTransport, ReplayTransport  # noqa: E402
+
+FIXTURES_DIR = os.getenv(
+    "REPLAY_FIXTURES_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_fixtures")
+)
+# Páginas sintéticas de las pruebas (no son respuestas reales de los sitios)
+SYNTHETIC_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "synthetic_fixtures")
+
+# Mensajes con los que los scrapers registran las excepciones que capturan
+ERROR_PATTERN = re.compile(r"\bError\b")
+
+# Estados de una fuente que hacen fallar la ejecución
+FAILED_STATUSES = ("error", "vacio")
+
+
+class Tee(io.TextIOBase):
+    """Salida que escribe en `stream` y guarda una copia para revisarla después."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.captured = io.StringIO()
+
+    def write(self, text):
+        self.stream.write(text)
+        self.captured.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def responses(transport):
+    """Respuestas grabadas (record) o servidas desde fixtures (replay) hasta el momento."""
+    return transport.recorded if hasattr(transport, "recorded") else transport.served
+
+
+async def run_source(scraper_type, client, archive_pages, transport):
+    """
+    Ejecuta el scraper de la fuente y las primeras páginas de su archivo; devuelve las estadísticas.
+
+    Estados: "ok"; "error" si lanza o registra una excepción; "vacio" si hubo
+    respuestas grabadas para la fuente pero ningún item; "sin fixture" si en
+    replay no hay ninguna respuesta grabada (sin --strict no es un fallo).
+    """
+    stats = {"source": scraper_type, "items": 0, "archive_items": 0, "status": "ok", "errors": []}
+    start = time.perf_counter()
+    before = responses(transport)
+    output = Tee(sys.stdout)
+    scraper = registry.load_scraper(scraper_type)
+    try:
+        with contextlib.redirect_stdout(output):
+            # force: sin validadores previos, todas las páginas se descargan y parsean
+            with conditional_cache.source_validators(force=True):
+                items = await executor.run_scraper(scraper, client)
+            stats["items"] = len(items or [])
+            archive_page = registry.load_archive(scraper_type)
+            if archive_page is not None:
+                with executor.scraper_context(scraper):
+                    for page in range(1, archive_pages + 1):
+                        items = await archive_page(client, page)
+                        if not items:
+                            break
+                        stats["archive_items"] += len(items)
+    except Exception as e:
+        print(f"[Replay] Error en {scraper_type}: {str(e)}")
+        stats["status"] = "error"
+    stats["elapsed"] = time.perf_counter() - start
+
+    stats["errors"] = [line for line in output.captured.getvalue().splitlines() if ERROR_PATTERN.search(line)]
+    if stats["status"] == "ok":
+        if stats["errors"]:
+            stats["status"] = "error"
+        elif responses(transport) == before:
+            stats["status"] = "sin fixture"
+        elif not stats["items"] + stats["archive_items"]:
+            stats["status"] = "vacio"
+    return stats
+
+
+def print_report(results, transport, fixtures_dir):
+    print(f"\n  {'Fuente':26} {'Estado':11} {'Items':>7} {'Archivo':>8} {'Tiempo':>8}")
+    for stats in results:
+        print(f"  {stats['source']:26} {stats['status']:11} {stats['items']:7} "
+              f"{stats['archive_items']:8} {stats['elapsed']:7.2f}s")
+        for line in stats["errors"]:
+            print(f"      {line}")
+    if hasattr(transport, "recorded"):
+        print(f"\n{transport.recorded} respuestas grabadas en {fixtures_dir}")
+    else:
+        print(f"\n{transport.served} respuestas servidas desde {fixtures_dir}, {len(transport.missing)} sin fixture")
+        for request in transport.missing:
+            print(f"  sin fixture: {request}")
+
+
+async def main(options):
+    Base.metadata.create_all(bind=engine)
+    sources = options.source or list(registry.SCRAPER_TYPES)
+    if options.mode == "record":
+        transport = RecordingTransport(options.fixtures_dir)
+    else:
+        transport = ReplayTransport(options.fixtures_dir, strict=options.strict)
+    results = []
+    try:
+        async with ScrapingClient(transport=transport) as client:
+            # Una fuente a la vez: el orden de las peticiones es siempre el mismo
+            for scraper_type in sources:
+                print(f"[Replay] {options.mode} {scraper_type}")
+                results.append(await run_source(scraper_type, client, options.archive_pages, transport))
+    finally:
+        executor.shutdown()
+    print_report(results, transport, options.fixtures_dir)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grabación y reproducción offline de los scrapers")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--source", action="append", choices=sorted(registry.SCRAPER_TYPES),
+                        help="scraper_type a ejecutar (repetible; por defecto todos)")
+    parser.add_argument("--archive-pages", type=int, default=1,
+                        help="páginas del archivo (modo backfill) a incluir por fuente")
+    parser.add_argument("--strict", action="store_true", help="en replay, error si falta un fixture")
+    parser.add_argument("--fixtures-dir", default=FIXTURES_DIR, help="directorio de los fixtures")
+    results = asyncio.run(main(parser.parse_args()))
+    failed = [stats["source"] for stats in results if stats["status"] in FAILED_STATUSES]
+    if failed:
+        print(f"Fuentes con fallos: {', '.join(failed)}")
+        sys.exit(1)
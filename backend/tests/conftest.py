@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+# Base SQLite propia de las pruebas: se define antes de importar app.database
+os.environ["SQLALCHEMY_DATABASE_URL"] = "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="monitor_tests_"), "test.db"
+)
+# Los parseos de los scrapers se hacen en hilos, sin pool de procesos
+os.environ["SCRAPING_PARSE_WORKERS"] = "0"
+
+import pytest  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api import items, users  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.models import models  # noqa: F401,E402
+from app.services.item_counts import invalidate_counts  # noqa: E402
+from app.services.search import ensure_search_index  # noqa: E402
+
+Base.metadata.create_all(bind=engine)
+ensure_search_index(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        # Cada prueba empieza con las tablas vacías (los triggers limpian el índice FTS)
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+        session.close()
+        invalidate_counts()
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(items.router, prefix="/api")
+    app.include_router(users.router, prefix="/api/users")
+    return TestClient(app)
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime
+
+from app.models import models
+from app.scrapers import backfill, registry
+
+
+def make_source(db):
+    source = models.Source(name="ANAMED", url="https://www.ispch.gob.cl/categorias-alertas/anamed/",
+                           scraper_type="anamed_cl")
+    db.add(source)
+    db.commit()
+    return registry.SourceJob(source.id, source.name, source.scraper_type, "www.ispch.gob.cl")
+
+
+def archive(pages, fail_at=None):
+    """Archivo paginado falso: `pages` páginas de 2 items; `fail_at` lanza en esa página."""
+    requested = []
+
+    async def archive_page(client, page):
+        requested.append(page)
+        if page == fail_at:
+            raise RuntimeError("conexión cortada")
+        if page > pages:
+            return []
+        return [{
+            "title": f"Alerta {page}-{n}",
+            "description": "",
+            "country": "Chile",
+            "source_type": "alerta",
+            "source_url": f"https://www.ispch.gob.cl/alerta/{page}-{n}",
+            # Como en los archivos reales, cada página es más vieja que la anterior
+            "presentation_date": datetime(2024, 5, 20 - page),
+        } for n in range(2)]
+    return archive_page, requested
+
+
+def run(job, archive_page, monkeypatch, **options):
+    monkeypatch.setattr(registry, "load_archive", lambda scraper_type: archive_page)
+    return asyncio.run(backfill.backfill_source(job, None, page_concurrency=1, **options))
+
+
+def test_backfill_resumes_from_the_checkpoint(db, monkeypatch):
+    job = make_source(db)
+
+    archive_page, _ = archive(pages=5, fail_at=3)
+    stats = run(job, archive_page, monkeypatch)
+    assert stats["status"] == "error"
+    assert backfill.load_checkpoint(job.source_id) == {
+        "next_page": 3, "items_seen": 4, "items_inserted": 4, "finished": False
+    }
+
+    archive_page, requested = archive(pages=5)
+    stats = run(job, archive_page, monkeypatch)
+    assert stats["status"] == "ok"
+    assert requested == [3, 4, 5, 6]
+    assert backfill.load_checkpoint(job.source_id)["finished"]
+    assert db.query(models.Item).count() == 10
+
+    # Terminado: no vuelve a pedir páginas salvo con restart
+    archive_page, requested = archive(pages=5)
+    assert run(job, archive_page, monkeypatch)["status"] == "completo"
+    assert requested == []
+    stats = run(job, archive_page, monkeypatch, restart=True)
+    assert stats["pages"] == 5
+    assert stats["inserted"] == 0
+
+
+def test_backfill_stops_at_since(db, monkeypatch):
+    job = make_source(db)
+    archive_page, requested = archive(pages=5)
+    stats = run(job, archive_page, monkeypatch, since=datetime(2024, 5, 17, 12))
+    assert requested == [1, 2, 3]
+    assert stats["items"] == 4
+    assert backfill.load_checkpoint(job.source_id)["finished"]
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from app.models import models
+from app.services import cleanup
+from app.services.ingest import save_items_to_db
+
+
+def make_item(n, title, source_type):
+    return {
+        "title": title,
+        "description": "",
+        "country": "Perú",
+        "source_type": source_type,
+        "source_url": f"https://www.gob.pe/{n}",
+        "presentation_date": datetime(2024, 5, 1),
+    }
+
+
+def seed(db):
+    # Mismo título y fecha desde tres fuentes: la huella distinta no los deduplica en la ingesta
+    save_items_to_db([
+        make_item(1, "Alerta por Ozempic falsificado", "alerta"),
+        make_item(2, "Alerta por Ozempic falsificado", "noticia"),
+        make_item(3, "Alerta por Ozempic falsificado", "norma"),
+        make_item(4, "Congreso aprueba ley de etiquetado", "noticia"),
+    ], db)
+    user = models.User(email="ana@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    keyword = models.Keyword(word="ozempic", user_id=user.id)
+    db.add(keyword)
+    db.commit()
+    ids = sorted(item.id for item in db.query(models.Item))
+    db.add_all([models.ItemKeywordMatch(item_id=item_id, keyword_id=keyword.id) for item_id in ids[:3]])
+    db.commit()
+    return ids
+
+
+def test_dry_run_counts_without_deleting(db):
+    seed(db)
+    assert cleanup.count_duplicates(db) == {"url": 0, "title_date": 2, "total": 2}
+    assert db.query(models.Item).count() == 4
+
+
+def test_remove_duplicates_keeps_the_oldest_in_batches(db):
+    ids = seed(db)
+
+    deleted = cleanup.remove_duplicates(db, batch_size=1, pause=0)
+    assert deleted == {"url": 0, "title_date": 2, "total": 2}
+    assert sorted(item.id for item in db.query(models.Item)) == [ids[0], ids[3]]
+    # Las coincidencias de palabras clave de los borrados también se eliminan
+    assert [match.item_id for match in db.query(models.ItemKeywordMatch)] == [ids[0]]
+    assert cleanup.count_duplicates(db)["total"] == 0
@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+
+from app.api import scraping
+from app.models import models
+from app.scrapers import conditional_cache, minsa_normas_scraper, registry
+from app.scrapers.http_client import ScrapingClient
+from app.services import run_state
+
+MINSA_URL = "https://www.gob.pe/institucion/minsa/normas-legales"
+SENADO_URL = "https://www.senado.cl/comunicaciones/noticias"
+
+MINSA_PAGE = """
+<ul><li class="hover:bg-gray-70 p-4">
+  <a class="mb-2" href="/institucion/minsa/normas-legales/6263554-861-2024-minsa">Resolución Ministerial N.° 861-2024-MINSA</a>
+  <div id="p-filter-item-0">Dar por concluida la designación.</div>
+  <time datetime="2024-12-06 00:00:00">6 de diciembre de 2024</time>
+</li></ul>
+"""
+
+SENADO_PAGE = """
+<a class="card" href="/comunicaciones/noticias/comision-aprueba-proyecto">
+  <h3 class="subtitle">Comisión aprueba proyecto</h3>
+</a>
+<a class="card" href="/comunicaciones/noticias/sala-despacha-ley">
+  <h3 class="subtitle">Sala despacha ley</h3>
+</a>
+"""
+
+SENADO_DETAIL = '<p class="color-blue-75">15 de mayo de 2024</p>'
+
+
+def make_source(db, name, url, scraper_type, host):
+    source = models.Source(name=name, url=url, scraper_type=scraper_type)
+    db.add(source)
+    db.commit()
+    return registry.SourceJob(source.id, source.name, source.scraper_type, host)
+
+
+def scrape(db, job, handler, force=False):
+    run_id = run_state.start_run(db, 1, "api")
+
+    async def main():
+        async with ScrapingClient(transport=httpx.MockTransport(handler)) as client:
+            await scraping.scrape_source(
+                run_id, job, client, asyncio.Semaphore(1), {job.host: asyncio.Semaphore(1)},
+                {"total_sources": 1, "completed_sources": 0}, force=force
+            )
+    asyncio.run(main())
+    run_state.finish_run(db, run_id)
+    db.expire_all()
+    return db.get(models.Source, job.source_id)
+
+
+def minsa_server(headers=None):
+    """Servidor falso de MINSA que responde 304 si recibe el ETag que envió."""
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        etag = (headers or {}).get("ETag")
+        if etag and request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, request=request)
+        return httpx.Response(200, text=MINSA_PAGE, headers=headers, request=request)
+    return handler, requests
+
+
+def test_not_modified_page_is_skipped(db, monkeypatch):
+    job = make_source(db, "MINSA normas", MINSA_URL, "minsa_normas_pe", "www.gob.pe")
+    handler, requests = minsa_server({"ETag": '"v1"'})
+
+    scrape(db, job, handler)
+    assert conditional_cache.get_validator(MINSA_URL).etag == '"v1"'
+    assert db.query(models.Item).count() == 1
+
+    parsed = []
+    monkeypatch.setattr(minsa_normas_scraper, "parse_minsa_normas", parsed.append)
+    source = scrape(db, job, handler)
+    assert requests[-1].headers["If-None-Match"] == '"v1"'
+    assert parsed == []
+    assert source.consecutive_failures == 0
+
+    # Con force la página se descarga y parsea aunque no haya cambiado
+    scrape(db, job, handler, force=True)
+    assert "If-None-Match" not in requests[-1].headers
+    assert len(parsed) == 1
+
+
+def test_same_body_hash_is_skipped_without_validators(db, monkeypatch):
+    job = make_source(db, "MINSA normas", MINSA_URL, "minsa_normas_pe", "www.gob.pe")
+    handler, _ = minsa_server()
+    scrape(db, job, handler)
+
+    parsed = []
+    monkeypatch.setattr(minsa_normas_scraper, "parse_minsa_normas", parsed.append)
+    scrape(db, job, handler)
+    assert parsed == []
+
+
+def test_parser_crash_does_not_persist_validators(db, monkeypatch):
+    job = make_source(db, "MINSA normas", MINSA_URL, "minsa_normas_pe", "www.gob.pe")
+    handler, requests = minsa_server({"ETag": '"v1"'})
+
+    def crash(html):
+        raise AttributeError("'NoneType' object has no attribute 'find_all'")
+    with monkeypatch.context() as patch:
+        patch.setattr(minsa_normas_scraper, "parse_minsa_normas", crash)
+        scrape(db, job, handler)
+    assert conditional_cache.get_validator(MINSA_URL) is None
+
+    # La página no se da por vista: la próxima ejecución la descarga y la ingiere
+    scrape(db, job, handler)
+    assert "If-None-Match" not in requests[-1].headers
+    assert db.query(models.Item).count() == 1
+
+
+def test_failed_detail_fetch_drops_validators(db):
+    job = make_source(db, "Senado noticias", SENADO_URL, "senado_noticias_cl", "www.senado.cl")
+    detail_up = {"sala-despacha-ley": False}
+
+    def handler(request):
+        slug = request.url.path.rsplit("/", 1)[-1]
+        if request.url.path == "/comunicaciones/noticias":
+            return httpx.Response(200, text=SENADO_PAGE, headers={"ETag": '"v1"'}, request=request)
+        if detail_up.get(slug, True):
+            return httpx.Response(200, text=SENADO_DETAIL, request=request)
+        return httpx.Response(503, request=request)
+
+    source = scrape(db, job, handler)
+    assert source.consecutive_failures == 1
+    assert conditional_cache.get_validator(SENADO_URL) is None
+    # La noticia con fecha se ingiere igual
+    assert [item.title for item in db.query(models.Item)] == ["Comisión aprueba proyecto"]
+
+    detail_up["sala-despacha-ley"] = True
+    source = scrape(db, job, handler)
+    assert source.consecutive_failures == 0
+    assert conditional_cache.get_validator(SENADO_URL).etag == '"v1"'
+    assert db.query(models.Item).count() == 2
@@ -0,0 +1,20 @@
+from sqlalchemy import create_engine, text
+
+from app.database import missing_columns
+
+
+def test_missing_columns_lists_columns_added_after_the_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, title VARCHAR, description TEXT)"))
+
+    missing = missing_columns(engine)
+    assert "items.fingerprint" in missing
+    assert "items.cluster_id" in missing
+    assert "items.title" not in missing
+    # Las tablas que no existen las crea create_all, no son columnas faltantes
+    assert not any(column.startswith("sources.") for column in missing)
+
+
+def test_test_database_is_fully_migrated():
+    assert missing_columns() == []
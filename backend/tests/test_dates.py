@@ -0,0 +1,42 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.scrapers.dates import parse_date, wall_time
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("2024-12-05", datetime(2024, 12, 5)),
+    ("2024-12-07 08:29:00.000", datetime(2024, 12, 7, 8, 29)),
+    # La hora con offset se conserva como la publicó la fuente, sin pasar a UTC
+    ("2024-12-05T21:27:54-03:00", datetime(2024, 12, 5, 21, 27, 54)),
+    ("2024-12-05T23:10:00Z", datetime(2024, 12, 5, 23, 10)),
+    ("Publicado el 2024-12-05T21:27:54-0500", datetime(2024, 12, 5, 21, 27, 54)),
+    ("08-11-2024", datetime(2024, 11, 8)),
+    ("05/12/2024", datetime(2024, 12, 5)),
+    ("5.12.2024", datetime(2024, 12, 5)),
+    ("05 Dic 2024", datetime(2024, 12, 5)),
+    ("04 Dic. 2024", datetime(2024, 12, 4)),
+    ("2 diciembre, 2024", datetime(2024, 12, 2)),
+    ("2 de marzo de 2024", datetime(2024, 3, 2)),
+    ("15 de setiembre del 2024", datetime(2024, 9, 15)),
+    ("Santiago, 1 de ENERO de 2025", datetime(2025, 1, 1)),
+])
+def test_parse_date_formats(text, expected):
+    assert parse_date(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "sin fecha", "31/02/2024", "5 de brumario de 2024"])
+def test_parse_date_returns_none_when_not_a_date(text):
+    assert parse_date(text) is None
+
+
+def test_evening_news_stays_on_its_local_day():
+    # Una noticia de las 21:00 en Chile es del mismo día que las fuentes que solo publican la fecha
+    assert parse_date("2024-12-05T21:00:00-03:00").date() == parse_date("05/12/2024").date()
+
+
+def test_wall_time_drops_the_offset():
+    value = datetime(2024, 12, 5, 21, 0, tzinfo=timezone(timedelta(hours=-3)))
+    assert wall_time(value) == datetime(2024, 12, 5, 21, 0)
+    assert wall_time(datetime(2024, 12, 5)) == datetime(2024, 12, 5)
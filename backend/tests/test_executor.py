@@ -0,0 +1,58 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from app.scrapers import executor
+from app.scrapers.executor import execution_mode, get_execution_mode, run_parser, run_scraper
+
+
+def current_thread_name():
+    return threading.current_thread().name
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        execution_mode("gevent")
+
+
+def test_async_scraper_parses_in_the_thread_pool():
+    async def scraper(client):
+        return client, await run_parser(current_thread_name)
+
+    assert get_execution_mode(scraper) == "async"
+    client, thread_name = asyncio.run(run_scraper(scraper, "cliente"))
+    assert client == "cliente"
+    assert thread_name.startswith("scraping")
+
+
+def test_thread_scraper_runs_entirely_off_the_loop():
+    @execution_mode("thread")
+    def scraper():
+        return current_thread_name()
+
+    assert asyncio.run(run_scraper(scraper, None)).startswith("scraping")
+
+
+def test_process_scraper_parses_in_the_process_pool(monkeypatch):
+    monkeypatch.setattr(executor, "SCRAPING_PARSE_WORKERS", 1)
+
+    @execution_mode("process")
+    async def scraper(client):
+        # os.getpid se puede enviar al pool: devuelve el pid del worker
+        return await run_parser(os.getpid)
+
+    try:
+        assert asyncio.run(run_scraper(scraper, None)) != os.getpid()
+    finally:
+        executor.shutdown()
+
+
+def test_process_mode_without_parse_workers_uses_threads():
+    # Las pruebas corren con SCRAPING_PARSE_WORKERS=0 (ver conftest.py)
+    @execution_mode("process")
+    async def scraper(client):
+        return await run_parser(current_thread_name)
+
+    assert asyncio.run(run_scraper(scraper, None)).startswith("scraping")
@@ -0,0 +1,44 @@
+import asyncio
+import json
+from datetime import datetime
+
+from app.scrapers.expediente_scraper import scrape_expediente
+from app.models import models
+from app.scrapers.replay import replay_client
+from app.services.ingest import save_items_to_db
+from replay_scrapers import SYNTHETIC_FIXTURES_DIR
+
+
+def run(scraper):
+    async def main():
+        async with replay_client(SYNTHETIC_FIXTURES_DIR, strict=True) as client:
+            return await scraper(client)
+    return asyncio.run(main())
+
+
+def test_items_from_synthetic_api_response_match_the_portal_table():
+    items = run(scrape_expediente)
+
+    assert len(items) == 3
+    assert items[0] == {
+        'title': '"LEY QUE CREA EL SISTEMA NACIONAL DE VIDEOVIGILANCIA"',
+        'description': 'Número: 09713/2024-CR\nEstado: PRESENTADO\nProponente: Congreso',
+        'source_type': 'PROYECTO_LEY',
+        'country': 'Perú',
+        'source_url': 'https://wb2server.congreso.gob.pe/spley-portal/#/expediente/2021-2026/09713/2024-CR',
+        'presentation_date': datetime(2024, 12, 5),
+        'extra_data': json.dumps({
+            'numero_expediente': '09713/2024-CR',
+            'estado': 'PRESENTADO',
+            'proponente': 'Congreso',
+            'periodo': '2021-2026'
+        })
+    }
+    assert [item['source_url'].rsplit('/', 2)[1] for item in items] == ['09713', '09712', '09711']
+
+
+def test_expediente_fields_are_kept_in_extra_data(db):
+    save_items_to_db(run(scrape_expediente), db)
+
+    item = db.query(models.Item).order_by(models.Item.id).first()
+    assert json.loads(item.extra_data)["estado"] == "PRESENTADO"
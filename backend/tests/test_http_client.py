@@ -0,0 +1,66 @@
+import asyncio
+from collections import Counter
+
+import httpx
+
+from app.scrapers import http_client
+from app.scrapers.http_client import ScrapingClient, fetch_archive_page
+
+
+def test_requests_per_host_are_limited(monkeypatch):
+    monkeypatch.setattr(http_client, "SCRAPING_MAX_CONNECTIONS_PER_HOST", 2)
+    running = Counter()
+    peaks = Counter()
+
+    async def handler(request):
+        host = request.url.host
+        running[host] += 1
+        peaks[host] = max(peaks[host], running[host])
+        await asyncio.sleep(0.01)
+        running[host] -= 1
+        return httpx.Response(200, text="ok", request=request)
+
+    async def main():
+        async with ScrapingClient(transport=httpx.MockTransport(handler)) as client:
+            urls = [f"https://{host}/{n}" for host in ("www.gob.pe", "www.senado.cl") for n in range(5)]
+            return await asyncio.gather(*[client.get(url) for url in urls])
+
+    responses = asyncio.run(main())
+    assert [response.text for response in responses] == ["ok"] * 10
+    assert peaks == {"www.gob.pe": 2, "www.senado.cl": 2}
+
+
+def test_common_headers_are_sent():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, request=request)
+
+    async def main():
+        async with ScrapingClient(transport=httpx.MockTransport(handler)) as client:
+            await client.get("https://www.gob.pe/a")
+            await client.post("https://www.gob.pe/b", json={"page": 1})
+
+    asyncio.run(main())
+    assert [request.method for request in seen] == ["GET", "POST"]
+    assert all(request.headers["User-Agent"] == http_client.USER_AGENT for request in seen)
+
+
+def test_missing_archive_page_ends_the_archive():
+    def handler(request):
+        if request.url.path == "/archivo/2":
+            return httpx.Response(404, request=request)
+        return httpx.Response(200, text="<li>uno</li><li>dos</li>", request=request)
+
+    def parse(html):
+        return html.count("<li>")
+
+    async def main():
+        async with ScrapingClient(transport=httpx.MockTransport(handler)) as client:
+            return [
+                await fetch_archive_page(client, f"https://www.gob.pe/archivo/{page}", parse)
+                for page in (1, 2)
+            ]
+
+    assert asyncio.run(main()) == [2, []]
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from app.models import models
+from app.services import ingest
+from app.services.ingest import save_items_to_db
+
+
+def make_item(n, title=None, day=1, url=None):
+    return {
+        "title": title or f"Resolución número {n}",
+        "description": "",
+        "country": "Perú",
+        "source_type": "norma",
+        "source_url": url or f"https://www.gob.pe/normas/{n}",
+        "presentation_date": datetime(2024, 5, day),
+    }
+
+
+def test_counts_inserted_skipped_and_invalid(db):
+    saved = save_items_to_db([make_item(1), make_item(2)], db)
+    assert saved == {"inserted": 2, "skipped": 0, "invalid": 0}
+
+    saved = save_items_to_db([
+        make_item(1),                                   # ya guardado (misma URL)
+        make_item(3, title="Resolución número 2"),      # ya guardado (misma huella)
+        make_item(4),
+        make_item(4),                                   # repetido dentro del lote
+        make_item(5, url="HTTPS://WWW.GOB.PE:443/normas/4"),  # misma URL normalizada
+        dict(make_item(6), presentation_date=None),     # inválido
+        dict(make_item(7), title=""),                   # inválido
+    ], db)
+    assert saved == {"inserted": 1, "skipped": 6, "invalid": 2}
+    assert sorted(item.source_url for item in db.query(models.Item)) == [
+        f"https://www.gob.pe/normas/{n}" for n in (1, 2, 4)
+    ]
+
+
+def test_batches_larger_than_a_chunk(db, monkeypatch):
+    monkeypatch.setattr(ingest, "INGEST_CHUNK_SIZE", 3)
+    save_items_to_db([make_item(n) for n in range(4)], db)
+
+    saved = save_items_to_db([make_item(n) for n in range(10)], db)
+    assert saved == {"inserted": 6, "skipped": 4, "invalid": 0}
+    assert db.query(models.Item).count() == 10
+
@@ -0,0 +1,139 @@
+from datetime import datetime
+
+from app.models import models
+from app.services.ingest import save_items_to_db
+
+
+def make_item(n, title, country="Perú", source_type="noticia", day=1):
+    return {
+        "title": title,
+        "description": "",
+        "country": country,
+        "source_type": source_type,
+        "source_url": f"https://example.com/{n}",
+        "presentation_date": datetime(2024, 5, day),
+    }
+
+
+def cluster(db, item_ids, cluster_id):
+    # Clusters fijados a mano: las pruebas de la API no dependen del detector
+    db.query(models.Item).update({"cluster_id": None}, synchronize_session=False)
+    db.query(models.Item).filter(models.Item.id.in_(item_ids)).update(
+        {"cluster_id": cluster_id}, synchronize_session=False
+    )
+    db.commit()
+
+
+def ids_by_title(db):
+    return {item.title: item.id for item in db.query(models.Item)}
+
+
+def titles(response):
+    return sorted(item["title"] for item in response.json()["items"])
+
+
+def test_collapse_keeps_earliest_item_of_each_cluster(db, client):
+    save_items_to_db([
+        make_item(1, "Minsa declara alerta por dengue en Piura", day=1),
+        make_item(2, "Congreso aprueba ley de etiquetado", day=2),
+        make_item(3, "Minsa declara alerta por dengue en Piura y Tumbes", day=3),
+    ], db)
+    ids = ids_by_title(db)
+    first = ids["Minsa declara alerta por dengue en Piura"]
+    cluster(db, [first, ids["Minsa declara alerta por dengue en Piura y Tumbes"]], first)
+
+    response = client.get("/api/items", params={"collapse_duplicates": True})
+    assert response.json()["total"] == 2
+    assert titles(response) == ["Congreso aprueba ley de etiquetado", "Minsa declara alerta por dengue en Piura"]
+
+
+def test_collapse_with_search_matching_a_later_cluster_member(db, client):
+    # La búsqueda solo encuentra el segundo item del cluster: debe devolverlo
+    save_items_to_db([
+        make_item(1, "Resolución Ministerial N° 858-2024-MINSA", day=1),
+        make_item(2, "Aprueban la Resolución Ministerial N° 858-2024-MINSA sobre vacunas", day=2),
+    ], db)
+    ids = list(ids_by_title(db).values())
+    cluster(db, ids, min(ids))
+
+    for sort in ("date", "relevance"):
+        plain = client.get("/api/items", params={"search": "vacunas", "sort": sort})
+        collapsed = client.get("/api/items", params={"search": "vacunas", "sort": sort, "collapse_duplicates": True})
+        assert plain.json()["total"] == 1
+        assert collapsed.json()["total"] == 1
+        assert titles(collapsed) == titles(plain)
+
+
+def test_collapse_picks_representative_within_filters(db, client):
+    save_items_to_db([
+        make_item(1, "Alerta sanitaria por Ozempic falsificado", country="Perú", day=1),
+        make_item(2, "Alerta sanitaria por Ozempic falsificado en Chile", country="Chile", day=2),
+    ], db)
+    ids = list(ids_by_title(db).values())
+    cluster(db, ids, min(ids))
+
+    response = client.get("/api/items", params={"country": "Chile", "collapse_duplicates": True})
+    assert titles(response) == ["Alerta sanitaria por Ozempic falsificado en Chile"]
+
+
+def test_collapse_with_cursor_pagination(db, client):
+    save_items_to_db([make_item(n, f"Noticia número {n}", day=n) for n in range(1, 6)], db)
+    ids = sorted(ids_by_title(db).values())
+    cluster(db, ids[:2], ids[0])
+
+    seen = []
+    cursor = ""
+    while cursor is not None:
+        body = client.get("/api/items", params={"collapse_duplicates": True, "cursor": cursor, "limit": 2}).json()
+        seen.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+    assert sorted(seen) == [ids[0]] + ids[2:]
+
+
+def test_cursor_pagination_puts_undated_items_last(db, client):
+    save_items_to_db([make_item(n, f"Noticia número {n}", day=n) for n in range(1, 4)], db)
+    # La ingesta rechaza items sin fecha; solo quedan de registros antiguos
+    for n in range(4, 7):
+        db.add(models.Item(title=f"Registro antiguo {n}", country="Perú", source_type="noticia",
+                           source_url=f"https://example.com/{n}"))
+    db.commit()
+    dated = sorted((item.presentation_date, item.id) for item in db.query(models.Item)
+                   if item.presentation_date is not None)
+    undated = sorted((item.id for item in db.query(models.Item) if item.presentation_date is None),
+                     reverse=True)
+    expected = [item_id for _, item_id in reversed(dated)] + undated
+
+    for limit in (2, 4):
+        seen = []
+        cursor = ""
+        while cursor is not None:
+            body = client.get("/api/items", params={"cursor": cursor, "limit": limit}).json()
+            seen.extend(item["id"] for item in body["items"])
+            cursor = body["next_cursor"]
+        assert seen == expected
+    # El listado con offset usa el mismo orden
+    body = client.get("/api/items", params={"limit": 10}).json()
+    assert [item["id"] for item in body["items"]] == expected
+
+
+def test_count_cache_keeps_country_accents_apart(db, client):
+    save_items_to_db([make_item(1, "Alerta sanitaria en Lima")], db)
+
+    assert client.get("/api/items", params={"country": "Perú"}).json()["total"] == 1
+    assert client.get("/api/items", params={"country": "PERÚ"}).json()["total"] == 0
+    # ilike no ignora tildes: "peru" no puede reutilizar el total de "Perú"
+    assert client.get("/api/items", params={"country": "peru"}).json()["total"] == 0
+    assert client.get("/api/items", params={"country": "pERú"}).json()["total"] == 1
+
+def test_search_with_only_stopwords_returns_nothing(db, client):
+    save_items_to_db([
+        make_item(1, "Alerta de Digemid sobre Ozempic falsificado"),
+        make_item(2, "Congreso aprueba ley de etiquetado", day=2),
+    ], db)
+
+    for search in ("de", "de la", "¿?"):
+        for sort in ("date", "relevance"):
+            body = client.get("/api/items", params={"search": search, "sort": sort}).json()
+            assert body["total"] == 0
+            assert body["items"] == []
+    assert client.get("/api/items", params={"search": "la ley"}).json()["total"] == 1
@@ -0,0 +1,137 @@
+from datetime import datetime
+
+from sqlalchemy import func
+
+from app.models import models
+from app.services import near_duplicates
+from app.services.ingest import save_items_to_db
+from app.services.near_duplicates import rebuild_near_duplicates
+
+
+def make_item(title, source_url, day=1):
+    return {
+        "title": title,
+        "description": "",
+        "country": "Perú",
+        "source_type": "noticia",
+        "source_url": source_url,
+        "presentation_date": datetime(2024, 5, day),
+    }
+
+
+def clusters(db):
+    """Títulos agrupados por cluster (tras agrupar los pendientes), solo los clusters con más de un item."""
+    near_duplicates.cluster_pending_items(db)
+    groups = {}
+    for item in db.query(models.Item).order_by(models.Item.id):
+        groups.setdefault(item.cluster_id or item.id, []).append(item.title)
+    return [titles for titles in groups.values() if len(titles) > 1]
+
+
+def test_cross_source_duplicate_is_clustered(db):
+    save_items_to_db([
+        make_item("Digemid fortalece competencias de profesionales de la salud en el uso de la receta electrónica",
+                  "https://www.gob.pe/institucion/minsa/noticias/1070129"),
+        make_item("DIGEMID fortalece competencias de profesionales de la salud en el uso de la receta electrónica",
+                  "https://www.digemid.minsa.gob.pe/webDigemid/notas/2024/receta", day=2),
+    ], db)
+    assert len(clusters(db)) == 1
+
+
+def test_numbered_series_from_one_source_is_not_clustered(db):
+    # Resoluciones y alertas consecutivas: casi el mismo título, distinto documento
+    save_items_to_db([
+        make_item(f"Resolución Ministerial N.° {n}-2024-MINSA", f"https://cdn.www.gob.pe/rm-{n}.pdf")
+        for n in range(844, 862)
+    ] + [
+        make_item(f"ALERTA DIGEMID Nº {n}-2024", f"https://www.digemid.minsa.gob.pe/alertas/{n}")
+        for n in range(122, 130)
+    ], db)
+    assert clusters(db) == []
+
+
+def test_different_document_numbers_are_not_clustered_across_sources(db):
+    save_items_to_db([
+        make_item("Proyecto de ley 17274-11 que regula los medicamentos bioequivalentes",
+                  "https://www.camara.cl/proyecto/17274-11"),
+        make_item("Proyecto de ley 17275-11 que regula los medicamentos bioequivalentes",
+                  "https://www.senado.cl/proyecto/17275-11"),
+        make_item("Proyecto de ley 17274-11 que regula los medicamentos bioequivalentes en Chile",
+                  "https://www.senado.cl/proyecto/17274-11"),
+    ], db)
+    assert clusters(db) == [[
+        "Proyecto de ley 17274-11 que regula los medicamentos bioequivalentes",
+        "Proyecto de ley 17274-11 que regula los medicamentos bioequivalentes en Chile",
+    ]]
+
+
+def test_items_are_compared_with_the_cluster_representative(db):
+    # B se parece a A y C a B, pero C no a A: C no entra al cluster de A por medio de B
+    save_items_to_db([
+        make_item("Minsa declara alerta epidemiológica por dengue en Piura Tumbes y Lambayeque",
+                  "https://a.example.com/1"),
+        make_item("Minsa declara alerta epidemiológica por dengue en Piura Tumbes Lambayeque y Loreto",
+                  "https://b.example.com/1"),
+        make_item("Declaran alerta epidemiológica por dengue en Piura Tumbes Lambayeque Loreto y San Martín",
+                  "https://c.example.com/1"),
+    ], db)
+    assert clusters(db) == [[
+        "Minsa declara alerta epidemiológica por dengue en Piura Tumbes y Lambayeque",
+        "Minsa declara alerta epidemiológica por dengue en Piura Tumbes Lambayeque y Loreto",
+    ]]
+
+
+def test_clusters_respect_the_date_window(db):
+    save_items_to_db([
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias", "https://a.example.com/1", day=1),
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias del país", "https://b.example.com/1",
+                  day=20),
+    ], db)
+    assert clusters(db) == []
+
+
+def test_rebuild_matches_ingest(db):
+    save_items_to_db([
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias", "https://a.example.com/1"),
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias del país", "https://b.example.com/1"),
+        make_item("Resolución Ministerial N.° 858-2024-MINSA", "https://cdn.www.gob.pe/rm-858.pdf"),
+        make_item("Resolución Ministerial N.° 859-2024-MINSA", "https://cdn.www.gob.pe/rm-859.pdf"),
+    ], db)
+    ingested = clusters(db)
+    assert rebuild_near_duplicates(db) == 1
+    assert clusters(db) == ingested
+
+
+def test_full_buckets_stop_growing(db, monkeypatch):
+    monkeypatch.setattr(near_duplicates, "NEAR_DUPLICATE_MAX_BUCKET", 3)
+    save_items_to_db([
+        make_item(f"Resolución Directoral N° {n}-2024-DIGESA", f"https://cdn.www.gob.pe/rd-{n}.pdf")
+        for n in range(1, 11)
+    ], db)
+    near_duplicates.cluster_pending_items(db)
+    sizes = db.query(func.count()).select_from(models.ItemLshBucket).group_by(
+        models.ItemLshBucket.band, models.ItemLshBucket.bucket
+    )
+    assert max(size for size, in sizes) == 3
+    assert db.query(models.ItemSignature).count() == 10
+
+    # Un duplicado de otra fuente se sigue encontrando por los buckets que no se llenaron
+    save_items_to_db([
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias", "https://a.example.com/1"),
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias del país", "https://b.example.com/1"),
+    ], db)
+    assert len(clusters(db)) == 1
+
+
+def test_ingest_leaves_clusters_pending(db):
+    save_items_to_db([
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias", "https://a.example.com/1"),
+        make_item("Digemid alerta sobre la venta de Ozempic falsificado en farmacias del país", "https://b.example.com/1"),
+        # Sin palabras indexables: queda en su propio cluster y no vuelve a quedar pendiente
+        make_item("¿?", "https://c.example.com/1"),
+    ], db)
+    assert db.query(models.Item).filter(models.Item.cluster_id.is_(None)).count() == 3
+
+    assert near_duplicates.cluster_pending_items(db) == 1
+    assert db.query(models.Item).filter(models.Item.cluster_id.is_(None)).count() == 0
+    assert near_duplicates.cluster_pending_items(db) == 0
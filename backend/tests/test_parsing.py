@@ -0,0 +1,20 @@
+import pytest
+
+from app.scrapers.digemid_noticias_scraper import parse_digemid_noticias
+from app.scrapers.parsing import only, parse_html, use_backend
+
+HTML = """
+<article class="post-51 post type-post status-publish">
+  <h2 class="entry-title"><a href="https://www.digemid.minsa.gob.pe/webDigemid/comunicados/2024/comunicado-n-051-2024/">COMUNICADO N° 051-2024</a></h2>
+  <div class="post-date"><time datetime="2024-12-05T10:12:00-05:00">5 diciembre, 2024</time></div>
+</article>
+<article class="postal"><h2 class="entry-title"><a href="/otro">Otro</a></h2></article>
+"""
+
+
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+def test_only_matches_one_class_of_a_multi_class_element(parser):
+    with use_backend(parser):
+        soup = parse_html(HTML, only('article', class_='post'))
+        assert [a.text for a in soup.find_all('a')] == ["COMUNICADO N° 051-2024"]
+        assert [item['title'] for item in parse_digemid_noticias(HTML)] == ["COMUNICADO N° 051-2024"]
@@ -0,0 +1,86 @@
+import asyncio
+from collections import Counter
+
+from app.api import scraping
+from app.models import models
+from app.scrapers import registry
+from app.services import run_state
+
+
+def make_jobs(db, monkeypatch, hosts):
+    # scraper_type = host: así el scraper falso sabe a qué host "pide"
+    jobs = []
+    for n, host in enumerate(hosts):
+        monkeypatch.setitem(registry.SCRAPER_TYPES, host, registry.ScraperEntry(None, None, 3600))
+        source = models.Source(name=f"Fuente {n}", url=f"https://{host}/noticias/{n}", scraper_type=host)
+        db.add(source)
+        db.commit()
+        jobs.append(registry.SourceJob(source.id, source.name, source.scraper_type, host))
+    return jobs
+
+
+def tracking_scrapers(limit):
+    """
+    Scrapers falsos que anotan cuántas fuentes (en total y por host) corren a
+    la vez. Cada uno espera a que se alcance `limit` (o un timeout) antes de
+    terminar, para que el resultado no dependa de la velocidad de la máquina.
+    """
+    running = Counter()
+    peaks = Counter()
+    reached = asyncio.Event()
+
+    def load_scraper(host):
+        async def scraper(client):
+            for key in ("total", host):
+                running[key] += 1
+                peaks[key] = max(peaks[key], running[key])
+            if running["total"] >= limit:
+                reached.set()
+            try:
+                await asyncio.wait_for(reached.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                pass
+            for key in ("total", host):
+                running[key] -= 1
+            return []
+        return scraper
+    return load_scraper, peaks
+
+
+def test_sources_run_concurrently_within_limits(db, monkeypatch):
+    hosts = ["www.gob.pe"] * 3 + ["www.senado.cl"] * 3 + ["www.ispch.gob.cl", "www.camara.cl"]
+    jobs = make_jobs(db, monkeypatch, hosts)
+    load_scraper, peaks = tracking_scrapers(3)
+    monkeypatch.setattr(registry, "load_scraper", load_scraper)
+
+    run_id = run_state.start_run(db, len(jobs), "api")
+    asyncio.run(scraping.process_sources(run_id, jobs, 3, client=None))
+
+    assert peaks["total"] == 3
+    assert all(peaks[host] == scraping.SCRAPING_MAX_PER_HOST for host in set(hosts))
+    _, state = run_state.fetch_snapshot()
+    assert state["is_running"] is False
+    assert state["completed_sources"] == len(jobs)
+    assert [result["status"] for result in state["results"]] == ["success"] * len(jobs)
+    db.expire_all()
+    assert all(db.get(models.Source, job.source_id).last_scraped is not None for job in jobs)
+
+
+def test_failing_source_does_not_stop_the_others(db, monkeypatch):
+    jobs = make_jobs(db, monkeypatch, ["www.gob.pe", "www.senado.cl"])
+
+    def load_scraper(host):
+        async def scraper(client):
+            if host == "www.gob.pe":
+                raise RuntimeError("conexión cortada")
+            return []
+        return scraper
+    monkeypatch.setattr(registry, "load_scraper", load_scraper)
+
+    run_id = run_state.start_run(db, len(jobs), "api")
+    asyncio.run(scraping.process_sources(run_id, jobs, 2, client=None))
+
+    _, state = run_state.fetch_snapshot()
+    assert sorted(result["status"] for result in state["results"]) == ["error", "success"]
+    db.expire_all()
+    assert [db.get(models.Source, job.source_id).consecutive_failures for job in jobs] == [1, 0]
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.models import models
+from app.scrapers import registry
+from app.scrapers.minsa_noticias_scraper import scrape_minsa_noticias
+
+
+def make_source(db, name, scraper_type="minsa_noticias_pe", **fields):
+    source = models.Source(name=name, url=f"https://www.gob.pe/{name}", scraper_type=scraper_type, **fields)
+    db.add(source)
+    db.commit()
+    return source
+
+
+def names(jobs):
+    return sorted(job.name for job in jobs)
+
+
+def test_sources_to_scrape_uses_each_refresh_interval(db):
+    now = datetime.utcnow()
+    make_source(db, "nunca")
+    make_source(db, "vencida", last_scraped=now - timedelta(hours=2))
+    make_source(db, "reciente", last_scraped=now - timedelta(minutes=10))
+    make_source(db, "intervalo-propio", last_scraped=now - timedelta(minutes=10), refresh_interval=60)
+    make_source(db, "inactiva", active=False)
+    make_source(db, "desconocida", scraper_type="no_existe")
+
+    assert names(registry.sources_to_scrape(db)) == ["intervalo-propio", "nunca", "vencida"]
+    assert names(registry.sources_to_scrape(db, force=True)) == [
+        "intervalo-propio", "nunca", "reciente", "vencida"
+    ]
+    job = next(job for job in registry.sources_to_scrape(db) if job.name == "nunca")
+    assert job.host == "www.gob.pe"
+
+
+def test_due_sources_schedules_new_sources_with_jitter(db):
+    now = datetime.utcnow()
+    new = make_source(db, "nueva")
+    make_source(db, "pendiente", next_scrape_at=now - timedelta(minutes=1))
+    make_source(db, "futura", next_scrape_at=now + timedelta(hours=1))
+
+    assert names(registry.due_sources(db)) == ["pendiente"]
+    db.refresh(new)
+    # La primera ejecución queda dentro del jitter inicial, no todas a la vez al arrancar
+    assert now <= new.next_scrape_at <= now + timedelta(seconds=registry.SCRAPING_START_JITTER + 1)
+
+
+def test_load_scraper_imports_the_registered_function():
+    assert registry.load_scraper("minsa_noticias_pe") is scrape_minsa_noticias
+    with pytest.raises(ValueError):
+        registry.load_scraper("no_existe")
@@ -0,0 +1,17 @@
+import argparse
+import asyncio
+
+import replay_scrapers
+from app.scrapers import registry
+
+
+def test_every_scraper_parses_its_synthetic_pages(db):
+    # Páginas escritas a mano con el marcado esperado, no grabaciones de los sitios
+    options = argparse.Namespace(mode="replay", source=None, archive_pages=1, strict=True,
+                                 fixtures_dir=replay_scrapers.SYNTHETIC_FIXTURES_DIR)
+    results = asyncio.run(replay_scrapers.main(options))
+
+    assert [stats["source"] for stats in results] == list(registry.SCRAPER_TYPES)
+    for stats in results:
+        assert stats["status"] == "ok", stats
+        assert stats["items"] + stats["archive_items"] > 0
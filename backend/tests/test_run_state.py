@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+
+from app.models import models
+from app.services import run_state
+
+
+def test_only_one_run_holds_the_lock(db):
+    run_id = run_state.start_run(db, 3, "api")
+    assert run_id is not None
+    assert run_state.start_run(db, 3, "scheduler") is None
+
+    run_state.finish_run(db, run_id)
+    assert run_state.start_run(db, 3, "scheduler") is not None
+
+
+def test_run_without_heartbeat_is_interrupted_and_frees_the_lock(db):
+    run_id = run_state.start_run(db, 3, "api")
+    db.query(models.ScrapingRun).update(
+        {"heartbeat_at": datetime.utcnow() - timedelta(seconds=run_state.SCRAPING_RUN_STALE + 1)}
+    )
+    db.commit()
+
+    assert run_state.start_run(db, 3, "scheduler") is not None
+    assert db.get(models.ScrapingRun, run_id).status == "interrupted"
+    assert not run_state.heartbeat(db, run_id)
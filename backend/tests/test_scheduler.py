@@ -0,0 +1,65 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.models import models
+from app.scrapers import registry
+from app.scrapers.scheduler import SchedulerLock, ScrapingScheduler
+
+
+def make_source(db, **fields):
+    source = models.Source(name="MINSA noticias", url="https://www.gob.pe/institucion/minsa/noticias",
+                           scraper_type="minsa_noticias_pe", **fields)
+    db.add(source)
+    db.commit()
+    return source
+
+
+def test_next_scrape_at_backs_off_exponentially(db, monkeypatch):
+    monkeypatch.setattr(registry, "SCRAPING_MAX_BACKOFF", 8 * 3600)
+    source = make_source(db, refresh_interval=3600)
+    now = datetime(2024, 5, 1)
+
+    for failures, hours in [(0, 1), (1, 2), (2, 4), (3, 8), (10, 8)]:
+        delay = registry.next_scrape_at(source, now, failures) - now
+        # Jitter menor a SCRAPING_JITTER_RATIO del intervalo
+        assert timedelta(hours=hours) <= delay <= timedelta(hours=hours, seconds=3600 * registry.SCRAPING_JITTER_RATIO)
+
+
+def test_backoff_never_shortens_a_long_interval(db, monkeypatch):
+    monkeypatch.setattr(registry, "SCRAPING_MAX_BACKOFF", 3600)
+    source = make_source(db, refresh_interval=6 * 3600)
+    now = datetime(2024, 5, 1)
+    assert registry.next_scrape_at(source, now, 3) - now >= timedelta(hours=6)
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    first, second = SchedulerLock(path=path), SchedulerLock(path=path)
+
+    assert first.acquire()
+    assert first.acquire()  # ya lo tiene
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_only_the_lock_holder_runs_due_sources(db, tmp_path):
+    make_source(db, next_scrape_at=datetime.utcnow() - timedelta(minutes=1))
+    path = str(tmp_path / "scheduler.lock")
+    runs = {"holder": [], "other": []}
+
+    def scheduler(name):
+        async def run_jobs(jobs):
+            runs[name].append([job.name for job in jobs])
+        return ScrapingScheduler(run_jobs, lock=SchedulerLock(path=path))
+
+    async def main():
+        holder, other = scheduler("holder"), scheduler("other")
+        await holder.run_once()
+        await other.run_once()
+        await holder.stop()
+        await other.stop()
+
+    asyncio.run(main())
+    assert runs == {"holder": [["MINSA noticias"]], "other": []}
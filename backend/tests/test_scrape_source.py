@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+
+from app.api import scraping
+from app.models import models
+from app.scrapers import minsa_normas_scraper, registry
+from app.scrapers.http_client import ScrapingClient
+from app.services import run_state
+
+URL = "https://www.gob.pe/institucion/minsa/normas-legales"
+
+PAGE = """
+<ul><li class="hover:bg-gray-70 p-4">
+  <a class="mb-2" href="/institucion/minsa/normas-legales/6263554-861-2024-minsa">Resolución Ministerial N.° 861-2024-MINSA</a>
+  <div id="p-filter-item-0">Dar por concluida la designación.</div>
+  <time datetime="2024-12-06 00:00:00">6 de diciembre de 2024</time>
+</li></ul>
+"""
+
+
+def make_source(db):
+    source = models.Source(name="MINSA normas", url=URL, scraper_type="minsa_normas_pe")
+    db.add(source)
+    db.commit()
+    return registry.SourceJob(source.id, source.name, source.scraper_type, "www.gob.pe")
+
+
+def scrape(db, job, handler):
+    run_id = run_state.start_run(db, 1, "api")
+
+    async def main():
+        async with ScrapingClient(transport=httpx.MockTransport(handler)) as client:
+            await scraping.scrape_source(
+                run_id, job, client, asyncio.Semaphore(1), {job.host: asyncio.Semaphore(1)},
+                {"total_sources": 1, "completed_sources": 0}
+            )
+    asyncio.run(main())
+    run_state.finish_run(db, run_id)
+    db.expire_all()
+    return db.get(models.Source, job.source_id)
+
+
+def respond(status, body=""):
+    return lambda request: httpx.Response(status, text=body, request=request)
+
+
+def test_http_error_counts_as_failure_and_backs_off(db):
+    job = make_source(db)
+
+    source = scrape(db, job, respond(500))
+    assert source.consecutive_failures == 1
+    assert source.last_scraped is None
+    first_delay = source.next_scrape_at - datetime.utcnow()
+
+    source = scrape(db, job, respond(500))
+    assert source.consecutive_failures == 2
+    # Cada fallo consecutivo duplica la espera (más un jitter menor al 10%)
+    assert source.next_scrape_at - datetime.utcnow() > first_delay * 1.5
+
+
+def test_parser_crash_counts_as_failure(db, monkeypatch):
+    job = make_source(db)
+
+    def crash(html):
+        raise AttributeError("'NoneType' object has no attribute 'find_all'")
+    monkeypatch.setattr(minsa_normas_scraper, "parse_minsa_normas", crash)
+
+    source = scrape(db, job, respond(200, PAGE))
+    assert source.consecutive_failures == 1
+    assert db.query(models.Item).count() == 0
+
+
+def test_success_resets_the_failure_count(db):
+    job = make_source(db)
+    scrape(db, job, respond(500))
+
+    source = scrape(db, job, respond(200, PAGE))
+    assert source.consecutive_failures == 0
+    assert source.last_scraped is not None
+    assert db.query(models.Item).count() == 1
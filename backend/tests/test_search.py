@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from app.services.ingest import save_items_to_db
+from app.services.search import search_document, tokenize
+
+ITEMS = [
+    ("Campaña de vacunación contra la influenza", "El Minsa inicia la campaña en Lima"),
+    ("Digemid alerta sobre vacunas falsificadas", ""),
+    ("Congreso aprueba ley de etiquetado", "Octógonos en alimentos procesados"),
+]
+
+
+def seed(db):
+    save_items_to_db([{
+        "title": title,
+        "description": description,
+        "country": "Perú",
+        "source_type": "noticia",
+        "source_url": f"https://www.gob.pe/{n}",
+        "presentation_date": datetime(2024, 5, n + 1),
+    } for n, (title, description) in enumerate(ITEMS)], db)
+
+
+def titles(client, **params):
+    return sorted(item["title"] for item in client.get("/api/items", params=params).json()["items"])
+
+
+def test_tokenize_folds_accents_stopwords_and_plurals():
+    assert tokenize("Las VACUNAS de la campaña") == ["vacun", "campan"]
+    assert tokenize("vacunación")[0].startswith(tokenize("vacuna")[0])
+    assert search_document("Ley", "de etiquetado") == "ley etiquetad"
+
+
+def test_search_ignores_accents_case_and_plurals(db, client):
+    seed(db)
+    both = sorted(title for title, _ in ITEMS[:2])
+    assert titles(client, search="VACUNA") == both
+    assert titles(client, search="vacunacion") == [ITEMS[0][0]]
+    assert titles(client, search="octogono") == [ITEMS[2][0]]
+
+
+def test_search_requires_every_word(db, client):
+    seed(db)
+    assert titles(client, search="vacunas Lima") == [ITEMS[0][0]]
+    assert titles(client, search="vacunas Congreso") == []
+    assert titles(client, search="vacuna", sort="relevance") == sorted(title for title, _ in ITEMS[:2])
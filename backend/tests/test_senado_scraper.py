@@ -0,0 +1,66 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+
+from app.scrapers import senado_noticias_scraper
+from app.scrapers.http_client import ScrapingClient
+from app.scrapers.senado_noticias_scraper import parse_tarjetas, tarjetas_a_items
+from app.services.ingest import save_items_to_db
+
+SLUGS = [f"noticia-{n}" for n in range(6)]
+
+PAGE = "".join(f"""
+<a class="card" href="/comunicaciones/noticias/{slug}">
+  <h3 class="subtitle">Noticia {slug}</h3>
+</a>""" for slug in SLUGS)
+
+
+def detail_server():
+    """Servidor falso de páginas de detalle que anota cuántas se piden a la vez."""
+    requested = []
+    state = {"running": 0, "peak": 0}
+
+    async def handler(request):
+        requested.append(request.url.path.rsplit("/", 1)[-1])
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        return httpx.Response(200, text='<p class="color-blue-75">15 de mayo de 2024</p>', request=request)
+    return handler, requested, state
+
+
+def run(handler):
+    async def main():
+        async with ScrapingClient(transport=httpx.MockTransport(handler)) as client:
+            return await tarjetas_a_items(client, parse_tarjetas(PAGE))
+    return asyncio.run(main())
+
+
+def test_detail_pages_are_fetched_concurrently_within_the_limit(db, monkeypatch):
+    monkeypatch.setattr(senado_noticias_scraper, "SENADO_DETAIL_CONCURRENCY", 2)
+    handler, requested, state = detail_server()
+
+    items = run(handler)
+    assert sorted(requested) == SLUGS
+    assert state["peak"] == 2
+    # Los items conservan el orden del listado
+    assert [item["title"] for item in items] == [f"Noticia {slug}" for slug in SLUGS]
+    assert all(item["presentation_date"] == datetime(2024, 5, 15) for item in items)
+
+
+def test_known_dates_skip_the_detail_page(db):
+    save_items_to_db([{
+        "title": "Noticia noticia-0",
+        "description": "",
+        "country": "Chile",
+        "source_type": "noticia",
+        "source_url": "https://www.senado.cl/comunicaciones/noticias/noticia-0",
+        "presentation_date": datetime(2024, 5, 2),
+    }], db)
+    handler, requested, _ = detail_server()
+
+    items = run(handler)
+    assert sorted(requested) == SLUGS[1:]
+    assert items[0]["presentation_date"] == datetime(2024, 5, 2)
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+from app.services.status_bus import HEARTBEAT, StatusBus, parse_last_event_id
+
+
+def stored(*ids):
+    # Eventos como los devuelve run_state: (id, evento, datos JSON)
+    return [(event_id, "source_finished", json.dumps({"completed_sources": event_id})) for event_id in ids]
+
+
+def snapshot_of(bus_state):
+    async def snapshot():
+        return bus_state["last_id"], {"completed_sources": bus_state["last_id"]}
+    return snapshot
+
+
+def event_ids(messages):
+    return [message.split("\n", 1)[0] for message in messages]
+
+
+def read(bus, count, last_event_id=None, heartbeat=5, publish=()):
+    """Lee `count` mensajes de una suscripción; `publish` se agrega al bus después del primero."""
+    async def main():
+        messages = []
+        stream = bus.subscribe(snapshot_of({"last_id": bus._last_id}), last_event_id, heartbeat)
+        async for message in stream:
+            messages.append(message)
+            if len(messages) == 1 and publish:
+                asyncio.get_running_loop().call_later(0.01, bus.extend, stored(*publish))
+            if len(messages) == count:
+                break
+        await stream.aclose()
+        return messages
+    return asyncio.run(asyncio.wait_for(main(), 5))
+
+
+def test_new_subscriber_gets_a_snapshot_and_then_pushed_events():
+    bus = StatusBus()
+    bus.extend(stored(1, 2))
+
+    messages = read(bus, 3, publish=(3, 4))
+    assert messages[0].startswith("id: 2\nevent: snapshot\n")
+    assert event_ids(messages[1:]) == ["id: 3", "id: 4"]
+
+
+def test_resume_from_last_event_id_sends_only_missed_events():
+    bus = StatusBus(history_size=3)
+    bus.extend(stored(1, 2, 3, 4))
+    # Los eventos ya conocidos se ignoran
+    bus.extend(stored(3, 4))
+
+    assert event_ids(read(bus, 1, last_event_id=3)) == ["id: 4"]
+    assert event_ids(read(bus, 2, last_event_id=2)) == ["id: 3", "id: 4"]
+
+
+def test_resume_outside_the_history_sends_a_snapshot():
+    bus = StatusBus(history_size=2)
+    bus.extend(stored(1, 2, 3, 4))
+
+    for last_event_id in (1, 99):
+        assert "event: snapshot" in read(bus, 1, last_event_id=last_event_id)[0]
+
+
+def test_idle_stream_sends_heartbeats():
+    bus = StatusBus()
+    bus.extend(stored(1))
+    assert read(bus, 2, heartbeat=0.01)[1] == HEARTBEAT
+
+
+def test_parse_last_event_id():
+    assert parse_last_event_id("42") == 42
+    assert parse_last_event_id(None) is None
+    assert parse_last_event_id("abc") is None
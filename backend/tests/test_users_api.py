@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from app.models import models
+from app.services import keyword_matching
+from app.services.ingest import save_items_to_db
+
+
+def make_item(n, title):
+    return {
+        "title": title,
+        "description": "",
+        "country": "Perú",
+        "source_type": "noticia",
+        "source_url": f"https://example.com/{n}",
+        "presentation_date": datetime(2024, 5, 1),
+    }
+
+
+def test_new_keyword_is_matched_against_existing_items_in_batches(db, client, monkeypatch):
+    monkeypatch.setattr(keyword_matching, "MATCH_BATCH_SIZE", 2)
+    save_items_to_db([make_item(n, f"Campaña de vacunación número {n}") for n in range(5)]
+                     + [make_item(5, "Alerta por dengue en Piura")], db)
+    user = models.User(email="ana@example.com", hashed_password="-")
+    db.add(user)
+    db.commit()
+
+    response = client.post(f"/api/users/{user.id}/keywords/", json={"word": "Vacunación"})
+    assert response.status_code == 200
+    keyword_id = response.json()["id"]
+
+    matched = db.query(models.ItemKeywordMatch).filter(models.ItemKeywordMatch.keyword_id == keyword_id).count()
+    assert matched == 5
+    body = client.get("/api/items", params={"user_id": user.id, "use_keywords": True}).json()
+    assert body["total"] == 5
+
+
+def test_items_ingested_later_match_existing_keywords(db, client, monkeypatch):
+    # El autómata en caché podría ser de otra prueba con los mismos ids de palabras clave
+    monkeypatch.setattr(keyword_matching, "_matcher", None)
+    user = models.User(email="ana@example.com", hashed_password="-")
+    db.add(user)
+    db.commit()
+    client.post(f"/api/users/{user.id}/keywords/", json={"word": "dengue"})
+    client.post(f"/api/users/{user.id}/keywords/", json={"word": "Vacunación"})
+
+    save_items_to_db([
+        make_item(1, "Alerta por DENGUE en Piura"),
+        make_item(2, "Campaña de vacunacion en Lima"),
+        make_item(3, "Congreso aprueba ley de etiquetado"),
+    ], db)
+    body = client.get("/api/items", params={"user_id": user.id, "use_keywords": True}).json()
+    assert sorted(item["title"] for item in body["items"]) == [
+        "Alerta por DENGUE en Piura", "Campaña de vacunacion en Lima"
+    ]
+
+    # El recálculo completo da las mismas coincidencias
+    before = sorted(db.query(models.ItemKeywordMatch.item_id, models.ItemKeywordMatch.keyword_id).all())
+    assert keyword_matching.rebuild_keyword_matches(db) == 2
+    assert sorted(db.query(models.ItemKeywordMatch.item_id, models.ItemKeywordMatch.keyword_id).all()) == before
+
+    # Al borrar la palabra clave se borran sus coincidencias
+    client.delete(f"/api/users/{user.id}/keywords/", params={"word": "dengue"})
+    body = client.get("/api/items", params={"user_id": user.id, "use_keywords": True}).json()
+    assert [item["title"] for item in body["items"]] == ["Campaña de vacunacion en Lima"]
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from app.models import models
+from app.scrapers import watermark
+
+
+def make_item(url, day):
+    return {"title": url, "source_url": url, "presentation_date": datetime(2024, 5, day)}
+
+
+def make_source(db):
+    source = models.Source(name="Minsa noticias", url="https://www.gob.pe/institucion/minsa/noticias",
+                           scraper_type="minsa_noticias_pe")
+    db.add(source)
+    db.commit()
+    return source.id
+
+
+def test_watermark_keeps_newest_date_and_recent_urls(db):
+    source_id = make_source(db)
+    assert watermark.load_watermark(db, source_id) is None
+
+    watermark.save_watermark(db, source_id, [make_item("https://a.example.com/1", 10),
+                                             make_item("https://a.example.com/2", 20)])
+    # Una ejecución con items más viejos no retrocede la fecha
+    watermark.save_watermark(db, source_id, [make_item("https://a.example.com/3", 5)])
+
+    mark = watermark.load_watermark(db, source_id)
+    assert mark.date == datetime(2024, 5, 20)
+    assert mark.urls == {"https://a.example.com/1", "https://a.example.com/2", "https://a.example.com/3"}
+
+
+def test_known_items_by_url_or_older_than_the_overlap(db):
+    mark = watermark.Watermark(datetime(2024, 5, 20), frozenset({"https://a.example.com/1"}))
+
+    new, known = watermark.split([
+        make_item("HTTPS://A.EXAMPLE.COM/1", 25),   # URL ya vista (normalizada)
+        make_item("https://a.example.com/2", 15),   # dentro de los días de tolerancia
+        make_item("https://a.example.com/3", 1),    # anterior a la marca de agua
+    ], mark)
+    assert [item["source_url"] for item in new] == ["https://a.example.com/2"]
+    assert [item["source_url"] for item in known] == ["HTTPS://A.EXAMPLE.COM/1", "https://a.example.com/3"]
+    assert watermark.reached(known, mark)
+    assert not watermark.reached(new, mark)
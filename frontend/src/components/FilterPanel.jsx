@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import { 
   TextField, 
   Box,
@@ -24,7 +24,7 @@ const FilterPanel = ({ filters, onFilterChange }) => {
   const [country, setCountry] = useState(filters.country)
   const [isScrapingLoading, setIsScrapingLoading] = useState(false)
   const [scrapingStatus, setScrapingStatus] = useState(null)
-  const [scrapingInterval, setScrapingInterval] = useState(null)
+  const statusSourceRef = useRef(null)
   const [snackbar, setSnackbar] = useState({ open: false, message: '', severity: 'success' })
   const [keywords, setKeywords] = useState([])
   const [newKeyword, setNewKeyword] = useState('')
@@ -57,14 +57,14 @@ const FilterPanel = ({ filters, onFilterChange }) => {
     fetchKeywords()
   }, [])
 
-  // Limpiar el intervalo cuando el componente se desmonte
+  // Cerrar el stream de estado cuando el componente se desmonte
   useEffect(() => {
     return () => {
-      if (scrapingInterval) {
-        clearInterval(scrapingInterval)
+      if (statusSourceRef.current) {
+        statusSourceRef.current.close()
       }
     }
-  }, [scrapingInterval])
+  }, [])
 
   const handleCountryChange = (event, newCountry) => {
     setCountry(newCountry)
@@ -129,39 +129,79 @@ const FilterPanel = ({ filters, onFilterChange }) => {
     }
   }
 
+  const finishScraping = () => {
+    if (statusSourceRef.current) {
+      statusSourceRef.current.close()
+      statusSourceRef.current = null
+    }
+    setIsScrapingLoading(false)
+    setSnackbar({
+      open: true,
+      message: 'Scraping completado exitosamente',
+      severity: 'success'
+    })
+  }
+
+  // Suscribirse al stream SSE: un snapshot inicial y luego solo los cambios.
+  // EventSource se reconecta solo y envía Last-Event-ID para recibir lo perdido.
+  const subscribeToStatus = () => {
+    if (statusSourceRef.current) {
+      statusSourceRef.current.close()
+    }
+    const source = new EventSource('http://localhost:8000/api/scraping/status/stream')
+    statusSourceRef.current = source
+
+    const listen = (event, handler) => {
+      source.addEventListener(event, (e) => handler(JSON.parse(e.data)))
+    }
+
+    listen('snapshot', (data) => {
+      setScrapingStatus(data)
+      if (!data.is_running && data.total_sources > 0 && data.completed_sources === data.total_sources) {
+        finishScraping()
+      }
+    })
+    listen('run_started', (data) => {
+      setScrapingStatus({ ...data, is_running: true, completed_sources: 0, running_sources: [], results: [] })
+    })
+    listen('source_started', (data) => {
+      setScrapingStatus(prev => prev && {
+        ...prev,
+        running_sources: [...prev.running_sources, data.source]
+      })
+    })
+    listen('source_finished', (data) => {
+      setScrapingStatus(prev => prev && {
+        ...prev,
+        completed_sources: data.completed_sources,
+        running_sources: prev.running_sources.filter(name => name !== data.source),
+        results: [...prev.results, data.result]
+      })
+    })
+    listen('run_finished', (data) => {
+      setScrapingStatus(prev => ({ ...prev, ...data, is_running: false, running_sources: [] }))
+      finishScraping()
+    })
+    source.onerror = (error) => {
+      console.error('Error en el stream de estado:', error)
+    }
+  }
+
   const handleStartScraping = async () => {
     try {
       setIsScrapingLoading(true);
-      await axios.post('http://localhost:8000/api/scraping/');
-      
-      // Función para verificar el estado
-      const checkStatus = async () => {
-        const { data } = await axios.get('http://localhost:8000/api/scraping/status');
-        
-        if (!data.is_running && data.completed_sources === data.total_sources) {
-          setIsScrapingLoading(false);
-          setSnackbar({
-            open: true,
-            message: 'Scraping completado exitosamente',
-            severity: 'success'
-          });
-          return true; // Proceso terminado
-        }
-        return false; // Proceso aún en ejecución
-      };
-
-      // Verificar el estado cada segundo hasta que termine
-      const interval = setInterval(async () => {
-        try {
-          const finished = await checkStatus();
-          if (finished) {
-            clearInterval(interval);
-          }
-        } catch (error) {
-          console.error('Error al verificar estado:', error);
-        }
-      }, 1000);
-
+      const { data } = await axios.post('http://localhost:8000/api/scraping/');
+      if (!data.is_running) {
+        // No hay fuentes pendientes de actualizar
+        setIsScrapingLoading(false);
+        setSnackbar({
+          open: true,
+          message: data.message,
+          severity: 'info'
+        });
+        return;
+      }
+      subscribeToStatus();
     } catch (error) {
       console.error('Error al iniciar scraping:', error);
       setIsScrapingLoading(false);
@@ -327,9 +367,9 @@ const FilterPanel = ({ filters, onFilterChange }) => {
               <Typography variant="body2" sx={{ whiteSpace: 'nowrap' }}>
                 Actualizando... {scrapingStatus?.completed_sources || 0}/{scrapingStatus?.total_sources || 0}
               </Typography>
-              {scrapingStatus?.current_source && (
+              {scrapingStatus?.running_sources?.length > 0 && (
                 <Typography variant="caption" sx={{ whiteSpace: 'nowrap' }}>
-                  Procesando: {scrapingStatus.current_source}
+                  Procesando: {scrapingStatus.running_sources.join(', ')}
                 </Typography>
               )}
             </Box>
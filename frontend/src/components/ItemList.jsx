@@ -44,6 +44,7 @@ const ItemList = ({ filters, onTotalItemsChange }) => {
           limit: itemsPerPage,
           use_keywords: filters.use_keywords,
           user_id: 1, // TODO: Get this from authentication context
+          count: 'approximate', // No esperar un conteo exacto para mostrar la página
         }
 
         if (filters.country) {
@@ -52,7 +53,7 @@ const ItemList = ({ filters, onTotalItemsChange }) => {
         
         const response = await axios.get('http://localhost:8000/api/items', { params })
         setItems(response.data.items)
-        setTotal(response.data.total)
+        setTotal(response.data.total ?? 0)
         setError(null)
       } catch (err) {
         setError('Error al cargar los items')